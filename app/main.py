@@ -1,11 +1,49 @@
+# Imported first so its startup timings include the imports below
+from app.services.warmup import warmup
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from app.routers import retrieve
 from app.routers import generate
+from app.routers import documents
+from app.routers import metrics
+from app.routers import rag
+from app.routers import models
+from app.routers import ready
+from app.services.inference_worker import generation_worker
+from core import config
+from core.embeddings.registry import embedding_registry
+from core.generator.model_manager import model_manager
+from core.retriever.session_store import session_collections
+from core.retriever.store_manager import store_manager
 
-app = FastAPI(title="RAG Application")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load configured models in the background so the API answers (and reports
+    # readiness on /api/ready) right away, and the first query skips the load.
+    warmup.start({
+        "embedding": (embedding_registry.get, config.EMBEDDING_WARMUP_MODELS),
+        "generation": (model_manager.get, config.GENERATION_PRELOAD_MODELS),
+    })
+    if config.WARMUP_BLOCKING:
+        await run_in_threadpool(warmup.wait)
+    session_collections.start_gc(config.SESSION_GC_INTERVAL_SECONDS)
+    yield
+    session_collections.stop_gc()
+    generation_worker.shutdown()
+    store_manager.close_all()
+
+
+app = FastAPI(title="RAG Application", lifespan=lifespan)
 
 app.include_router(retrieve.router, prefix="/api")
 app.include_router(generate.router, prefix="/api")
+app.include_router(documents.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
+app.include_router(rag.router, prefix="/api")
+app.include_router(models.router, prefix="/api")
+app.include_router(ready.router, prefix="/api")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from pydantic import BaseModel
+from typing import List, Dict, Any
+from app.services.document_service import ingest_json_documents, ingest_pdfs
+import traceback
+
+router = APIRouter()
+
+class DocumentsRequest(BaseModel):
+    documents: List[Dict[str, Any]]
+    embedding_model: str
+
+
+@router.post("/documents/")
+def upload_documents(request: DocumentsRequest):
+    try:
+        return ingest_json_documents(request.documents, request.embedding_model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print("Error in document ingestion:", str(e))
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/documents/pdf")
+def upload_pdfs(files: List[UploadFile] = File(...), embedding_model: str = Form(...)):
+    try:
+        return ingest_pdfs([(file.filename, file.file.read()) for file in files], embedding_model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print("Error in document ingestion:", str(e))
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
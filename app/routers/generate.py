@@ -1,17 +1,98 @@
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.generation_service import generate_answer
+from typing import Literal, Optional
+from app.services.generation_service import cached_generation, generate_answer, lookup_answer, stream_answer
+from app.services.inference_worker import generation_worker, QueueFullError
+from core.generator.model_manager import ModelNotAllowedError, model_manager
 
 router = APIRouter()
 
 class GenerationRequest(BaseModel):
     prompt: str
     generation_model: str
+    # "greedy" or a seed make the output reproducible and cacheable
+    decoding: Literal["sample", "greedy"] = "sample"
+    seed: Optional[int] = None
+    # Optional semantic answer cache: the user's question (without retrieved
+    # context) and the collection and embedding model it was answered from
+    question: Optional[str] = None
+    collection: Optional[str] = None
+    existing_qdrant_path: Optional[str] = None
+    embedding_model: Optional[str] = None
+    # False to skip the semantic answer cache (greedy and seeded requests always skip it)
+    use_cache: bool = True
+
+    def cache_args(self):
+        return (self.question, self.generation_model, self.embedding_model, self.collection, self.existing_qdrant_path,
+                self.decoding, self.seed, None, self.use_cache)
+
+def format_sse(data: dict, event: str = None) -> str:
+    """Format one Server-Sent Events message."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
 
 @router.post("/generate/")
-async def retrieve(request: GenerationRequest):
+async def generate(request: GenerationRequest):
     try:
-        result = generate_answer(request.prompt, request.generation_model)
+        model_manager.check_allowed(request.generation_model)
+        remember = None
+        if request.question:
+            hit, remember = await run_in_threadpool(lookup_answer, *request.cache_args())
+            if hit:
+                return {"answer": hit["answer"], "cached": True, "similarity": hit["similarity"], "status_code": 200}
+        cached = await run_in_threadpool(cached_generation, request.prompt, request.generation_model, request.decoding, request.seed)
+        if cached is not None:
+            return {"answer": cached, "cached": True, "status_code": 200}
+        result = await generation_worker.run(
+            generate_answer, request.prompt, request.generation_model, request.decoding, request.seed
+        )
+        if remember:
+            remember(result["answer"])
+        result["cached"] = False
         return result
+    except ModelNotAllowedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Generation timed out.")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/generate/stream")
+def generate_stream(request: GenerationRequest):
+    """
+    Stream the answer as Server-Sent Events: one `data: {"token": ...}` message per
+    decoded piece of text, then an `end` event (or an `error` event on failure).
+    A cached answer is sent as a single token.
+    """
+    try:
+        model_manager.check_allowed(request.generation_model)
+        hit, remember = lookup_answer(*request.cache_args()) if request.question else (None, None)
+        tokens = [hit["answer"]] if hit else stream_answer(
+            request.prompt, request.generation_model, request.decoding, request.seed
+        )
+    except ModelNotAllowedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def events():
+        try:
+            answer = []
+            for token in tokens:
+                answer.append(token)
+                yield format_sse({"token": token})
+            if remember and not hit:
+                remember("".join(answer))
+            yield format_sse({"cached": bool(hit)}, event="end")
+        except Exception as e:
+            yield format_sse({"detail": str(e)}, event="error")
+
+    return StreamingResponse(events(), media_type="text/event-stream")
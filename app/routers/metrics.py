@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from app.services.generation_service import answer_cache_stats, batching_stats, generation_cache_stats, streaming_stats
+from app.services.inference_worker import generation_worker
+from core.embeddings.cache import embedding_cache
+from core.embeddings.registry import embedding_registry
+from core.retriever.session_store import session_collections
+
+router = APIRouter()
+
+@router.get("/metrics/")
+async def metrics():
+    return {
+        "embedding_models": embedding_registry.stats(),
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "session_collections": session_collections.stats(),
+        "generation_worker": generation_worker.stats(),
+        "generation_batching": batching_stats(),
+        "generation_streaming": streaming_stats(),
+        "answer_cache": answer_cache_stats(),
+        "generation_cache": generation_cache_stats(),
+        "status_code": 200,
+    }
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from core.generator.model_manager import model_manager
+
+router = APIRouter()
+
+@router.get("/models/")
+async def models():
+    """List the servable language models with their load state, size and usage."""
+    return {**model_manager.stats(), "status_code": 200}
@@ -0,0 +1,89 @@
+import asyncio
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import Field
+from typing import Literal, Optional
+from app.routers.generate import format_sse
+from app.routers.retrieve import RetrieveRequest
+from app.services.inference_worker import QueueFullError
+from app.services.rag_service import answer_question, stream_rag
+from core.generator.model_manager import ModelNotAllowedError
+from core.retriever.reranker import RerankModelNotAllowedError
+from core.retriever.session_store import CollectionNotFoundError
+from core.retriever.store_manager import QdrantLocationNotAllowedError
+import traceback
+
+router = APIRouter()
+
+class RagRequest(RetrieveRequest):
+    # `query` is the user's question; retrieval, prompt assembly and generation happen server-side
+    generation_model: str
+    expand_query: bool = True
+    decoding: Literal["sample", "greedy"] = "sample"
+    seed: Optional[int] = None
+    # Token budget for the retrieved context; defaults to CONTEXT_MAX_TOKENS, 0 disables it
+    context_tokens: Optional[int] = Field(None, ge=0)
+    # False to skip the semantic answer cache (greedy and seeded requests always skip it)
+    use_cache: bool = True
+
+    def rag_kwargs(self):
+        return {
+            "documents": self.documents,
+            "existing_collection": self.existing_collection,
+            "existing_qdrant_path": self.existing_qdrant_path,
+            "existing_qdrant_url": self.existing_qdrant_url,
+            "collection_id": self.collection_id,
+            "rerank": self.rerank_kwargs(),
+            "expand": self.expand_query,
+            "decoding": self.decoding,
+            "seed": self.seed,
+            "context_tokens": self.context_tokens,
+            "use_cache": self.use_cache,
+            **self.search_kwargs(),
+        }
+
+@router.post("/rag/")
+async def rag(request: RagRequest):
+    try:
+        return await answer_question(request.query, request.generation_model, request.embedding_model, **request.rag_kwargs())
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ModelNotAllowedError, RerankModelNotAllowedError, QdrantLocationNotAllowedError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Generation timed out.")
+    except Exception as e:
+        print("Error in RAG:", str(e))
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/rag/stream")
+def rag_stream(request: RagRequest):
+    """
+    Stream a RAG answer as Server-Sent Events: a `chunks` event with the retrieved
+    docs, one `data: {"token": ...}` message per piece of the answer, then an `end`
+    event with timings (or an `error` event on failure).
+    """
+    try:
+        events = stream_rag(request.query, request.generation_model, request.embedding_model, **request.rag_kwargs())
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ModelNotAllowedError, RerankModelNotAllowedError, QdrantLocationNotAllowedError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        print("Error in RAG:", str(e))
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def messages():
+        try:
+            for event, data in events:
+                yield format_sse(data, event=event)
+        except Exception as e:
+            yield format_sse({"detail": str(e)}, event="error")
+
+    return StreamingResponse(messages(), media_type="text/event-stream")
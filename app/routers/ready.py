@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services.warmup import warmup
+
+router = APIRouter()
+
+# No trailing slash: probes treat the redirect to "/ready/" as success.
+@router.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the preloaded models are loaded or given up on, 503 before."""
+    status = warmup.status()
+    status_code = 200 if status["ready"] else 503
+    return JSONResponse({**status, "status_code": status_code}, status_code=status_code)
@@ -1,31 +1,117 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-from app.services.retrieval_service import perform_retrieval
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Literal
+from app.services.retrieval_service import perform_retrieval, perform_batch_retrieval
+from core.retriever.reranker import RerankModelNotAllowedError
+from core.retriever.session_store import CollectionNotFoundError
+from core.retriever.store_manager import QdrantLocationNotAllowedError
 import traceback
 
 router = APIRouter()
 
 class RetrieveRequest(BaseModel):
     documents: Optional[List[Dict[str, Any]]] = []
+    # Id returned by /documents/; replaces sending `documents` with every query
+    collection_id: Optional[str] = None
     query: str
     existing_collection: Optional[str] = None
     existing_qdrant_path: Optional[str] = None
+    existing_qdrant_url: Optional[str] = None
     embedding_model: str
+    # Search options; "similarity" skips MMR re-ranking for the lowest latency,
+    # "hybrid" adds BM25 keyword matching for exact identifiers
+    search_type: Literal["mmr", "similarity", "hybrid"] = "mmr"
+    k: int = Field(2, ge=1)
+    fetch_k: int = Field(20, ge=1)
+    lambda_mult: float = Field(0.5, ge=0.0, le=1.0)
+    score_threshold: Optional[float] = None
+    # Search-time index options for large, quantized collections on a Qdrant server
+    hnsw_ef: Optional[int] = Field(None, ge=1)
+    rescore: Optional[bool] = None
+    oversampling: Optional[float] = Field(None, ge=1.0)
+    # Optional cross-encoder re-ranking of the top `rerank_top_n` candidates;
+    # skipped when it is predicted to take longer than `rerank_budget_ms`
+    rerank: bool = False
+    rerank_top_n: int = Field(20, ge=1, le=200)
+    rerank_budget_ms: Optional[float] = Field(None, gt=0)
+    rerank_model: Optional[str] = None
 
+    def rerank_kwargs(self):
+        if not self.rerank:
+            return None
+        return {
+            "rerank_top_n": self.rerank_top_n,
+            "rerank_budget_ms": self.rerank_budget_ms,
+            "rerank_model": self.rerank_model,
+        }
 
+    def search_kwargs(self):
+        return {
+            "search_type": self.search_type,
+            "k": self.k,
+            "fetch_k": self.fetch_k,
+            "lambda_mult": self.lambda_mult,
+            "score_threshold": self.score_threshold,
+            "hnsw_ef": self.hnsw_ef,
+            "rescore": self.rescore,
+            "oversampling": self.oversampling,
+        }
+
+class BatchRetrieveRequest(BaseModel):
+    queries: List[str]
+    k: int = Field(2, ge=1)
+    score_threshold: Optional[float] = None
+    collection_id: Optional[str] = None
+    existing_collection: Optional[str] = None
+    existing_qdrant_path: Optional[str] = None
+    existing_qdrant_url: Optional[str] = None
+    embedding_model: str
+
+
+# Plain `def` so FastAPI runs the blocking search in its threadpool instead of on the event loop.
 @router.post("/retrieve/")
-async def retrieve(request: RetrieveRequest):
+def retrieve(request: RetrieveRequest):
     try:
         result = perform_retrieval(
             request.documents,
             request.query,
             request.existing_collection,
             request.existing_qdrant_path,
-            request.embedding_model
+            request.embedding_model,
+            request.existing_qdrant_url,
+            request.collection_id,
+            rerank=request.rerank_kwargs(),
+            **request.search_kwargs(),
         )
         return result
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (RerankModelNotAllowedError, QdrantLocationNotAllowedError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print("Error in retrieval:", str(e))  # Print error to logs
         print(traceback.format_exc())  # Print full traceback
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/retrieve/batch")
+def retrieve_batch(request: BatchRetrieveRequest):
+    try:
+        return perform_batch_retrieval(
+            request.queries,
+            request.k,
+            request.score_threshold,
+            request.existing_collection,
+            request.existing_qdrant_path,
+            request.embedding_model,
+            request.existing_qdrant_url,
+            request.collection_id,
+        )
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QdrantLocationNotAllowedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print("Error in batch retrieval:", str(e))
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,45 @@
+import os
+import tempfile
+from app.services.retrieval_service import json_to_document
+from core.retriever.retriever import Retriever
+
+def load_pdf(filename, content):
+    """Extract pages from raw PDF bytes as LangChain Document objects."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, os.path.basename(filename) or "upload.pdf")
+        with open(path, "wb") as f:
+            f.write(content)
+        # Imported on first upload; the loader pulls in langchain_community
+        from langchain_community.document_loaders import PyMuPDFLoader
+        pages = PyMuPDFLoader(path).load()
+    # Report the uploaded file name rather than the temporary path
+    for page in pages:
+        page.metadata["source"] = filename
+        page.metadata["file_path"] = filename
+    return pages
+
+def ingest_documents(docs, embedding_model):
+    """
+    Index documents once and return the id that later queries use to search them.
+    """
+    if not docs:
+        raise ValueError("No documents provided for ingestion.")
+    retriever = Retriever(model_name=embedding_model)
+    retriever.create_vector_store(docs)
+    return {
+        "collection_id": retriever.collection_name,
+        "num_documents": len(docs),
+        "status_code": 200
+    }
+
+def ingest_json_documents(documents, embedding_model):
+    return ingest_documents([json_to_document(doc) for doc in documents], embedding_model)
+
+def ingest_pdfs(files, embedding_model):
+    """
+    Parse raw PDF uploads given as (filename, bytes) pairs and index their pages.
+    """
+    docs = []
+    for filename, content in files:
+        docs.extend(load_pdf(filename, content))
+    return ingest_documents(docs, embedding_model)
@@ -1,22 +1,226 @@
-from core.generator.language_model import LanguageModel
+import json
+import threading
+import time
+from app.services.inference_worker import generation_worker
+from core import config
+from core.embeddings.registry import embedding_registry
+from core.generator.answer_cache import answer_cache
+from core.generator.backends import model_settings
+from core.generator.batching import BatchScheduler
+from core.generator.generation_cache import generation_cache, generation_key
+from core.generator.model_manager import model_manager
+from core.ingestion.manifest import collection_version
 
 
-# Global model instance (lazy-loaded)
-MODEL_INSTANCES = {}
+# One batch scheduler per loaded model
+SCHEDULERS = {}
+# One lock per loaded model, held by its batches and streams while they generate
+GENERATION_LOCKS = {}
+_schedulers_lock = threading.Lock()
+# Time-to-first-token of streamed generations
+STREAM_STATS = {"streams": 0, "ttft_seconds": 0.0, "last_ttft_ms": None}
+_stream_stats_lock = threading.Lock()
 
 def get_model(generation_model):
     """
-    Retrieve or create a cached instance of the language model.
+    Retrieve a loaded language model from the model manager, loading it on first use.
+
+    Raises ModelNotAllowedError for models outside GENERATION_MODELS.
+    """
+    return model_manager.get(generation_model)
+
+def _close_scheduler(generation_model):
+    with _schedulers_lock:
+        scheduler = SCHEDULERS.pop(generation_model, None)
+        GENERATION_LOCKS.pop(generation_model, None)
+    if scheduler is not None:
+        scheduler.close()
+
+# A scheduler holds on to its model, so it goes away when the model is unloaded
+model_manager.on_evict(_close_scheduler)
+
+def generation_lock(generation_model):
     """
-    
-    if generation_model not in MODEL_INSTANCES:
+    Return the lock that lets one generation at a time run on a model.
 
-        MODEL_INSTANCES[generation_model] = LanguageModel(model_name=generation_model)
-        MODEL_INSTANCES[generation_model].load_language_model(quantization="8bit")
-        MODEL_INSTANCES[generation_model].load_hg_pipeline()
-    return MODEL_INSTANCES[generation_model]
+    Batches and streams both hold it while they call the model, so a stream
+    never runs `generate()` alongside a batch on the same weights.
+    """
+    with _schedulers_lock:
+        return GENERATION_LOCKS.setdefault(generation_model, threading.Lock())
 
-def generate_answer(prompt, generation_model):
+def get_scheduler(generation_model):
+    """
+    Retrieve or create the batch scheduler that serializes access to a model.
+    """
     model = get_model(generation_model)
-    response = model.inference(prompt)
-    return {"answer": response, "status_code": 200} 
+    lock = generation_lock(generation_model)
+    with _schedulers_lock:
+        if generation_model not in SCHEDULERS:
+            SCHEDULERS[generation_model] = BatchScheduler(
+                lambda items: _run_batch(model, items, lock),
+                max_batch_size=config.GENERATION_MAX_BATCH_SIZE,
+                max_wait_ms=config.GENERATION_BATCH_WAIT_MS,
+                name=generation_model,
+                # Only requests with the same generation settings share a batch
+                key_fn=lambda item: item[1],
+            )
+        return SCHEDULERS[generation_model]
+
+def _run_batch(model, items, lock):
+    """Generate a batch of (prompt, settings) items that all have the same settings."""
+    with lock:
+        return model.batch_inference([prompt for prompt, _ in items], **dict(items[0][1]))
+
+def _holding(lock, fn):
+    """Wrap `fn` so it runs while holding `lock`."""
+    def run():
+        with lock:
+            return fn()
+    return run
+
+def generation_settings(decoding="sample", seed=None):
+    """
+    Return the hashable generation settings of a request.
+
+    Greedy decoding does not sample, so its seed is dropped.
+    """
+    return (("decoding", decoding), ("seed", None if decoding == "greedy" else seed))
+
+def _generation_cache_key(prompt, generation_model, settings):
+    """
+    Cache key of a deterministic request, or None when sampling makes its output vary.
+
+    The key covers the model's effective decoding arguments (token limit,
+    temperature, ...) and its configured backend, weights file and draft model,
+    so completions cached under other settings are not served after a change.
+    """
+    options = dict(settings)
+    if generation_cache is None or (options["decoding"] == "sample" and options["seed"] is None):
+        return None
+    options["decoding_kwargs"] = get_model(generation_model).decoding_kwargs(options["decoding"])
+    options["model_settings"] = {"quantization": config.GENERATION_QUANTIZATION, **model_settings(generation_model)}
+    return generation_key(generation_model, prompt, options)
+
+def cached_generation(prompt, generation_model, decoding="sample", seed=None):
+    """
+    Return the cached completion of a deterministic (greedy or seeded) request, or None.
+    """
+    key = _generation_cache_key(prompt, generation_model, generation_settings(decoding, seed))
+    return generation_cache.get(key) if key else None
+
+def generation_cache_stats():
+    return generation_cache.stats() if generation_cache is not None else None
+
+def batching_stats():
+    with _schedulers_lock:
+        schedulers = dict(SCHEDULERS)
+    return {name: scheduler.stats() for name, scheduler in schedulers.items()}
+
+def streaming_stats():
+    with _stream_stats_lock:
+        streams = STREAM_STATS["streams"]
+        return {
+            "streams": streams,
+            "mean_ttft_ms": round(1000 * STREAM_STATS["ttft_seconds"] / streams, 1) if streams else None,
+            "last_ttft_ms": STREAM_STATS["last_ttft_ms"],
+        }
+
+def answer_cache_stats():
+    return answer_cache.stats() if answer_cache is not None else None
+
+def lookup_answer(question, generation_model, embedding_model=None, collection=None, qdrant_path=None,
+                  decoding="sample", seed=None, options=None, use_cache=True):
+    """
+    Look a question up in the semantic answer cache.
+
+    Answers are only shared between questions about the same collection, asked
+    with the same models and options; re-indexing the collection invalidates them.
+    Greedy and seeded requests skip the cache: they ask for the completion of
+    their exact prompt, which the generation cache keeps.
+
+    Args:
+        options (dict, optional): Other settings the answer depends on, e.g. `k`,
+            `search_type` and `rerank`. Must be JSON serializable.
+        use_cache (bool): False to neither look up nor store the answer.
+
+    Returns:
+        tuple: (cached answer dict or None, function storing the answer to this question)
+    """
+    if answer_cache is None or not use_cache or decoding == "greedy" or seed is not None:
+        return None, lambda answer, sources=None: None
+    embedding_model = embedding_model or config.EMBEDDING_MODEL_NAME
+    version = collection_version(qdrant_path, collection) if collection else None
+    namespace = (collection, version, generation_model, embedding_model, json.dumps(options or {}, sort_keys=True))
+    vector = embedding_registry.get(embedding_model).embed_query(question)
+    hit = answer_cache.lookup(namespace, vector)
+    return hit, lambda answer, sources=None: answer_cache.store(namespace, vector, question, answer, sources)
+
+def generate_answer(prompt, generation_model, decoding="sample", seed=None):
+    """
+    Generate a completion through the model's batch scheduler.
+
+    Deterministic completions are stored in the generation cache; check
+    `cached_generation` before queuing a request.
+    """
+    settings = generation_settings(decoding, seed)
+    # The lease keeps the model from being unloaded while the request waits for its batch
+    with model_manager.lease(generation_model):
+        response = get_scheduler(generation_model).infer((prompt, settings))
+    key = _generation_cache_key(prompt, generation_model, settings)
+    if key and response is not None:
+        generation_cache.put(key, response)
+    return {"answer": response, "status_code": 200}
+
+def stream_answer(prompt, generation_model, decoding="sample", seed=None):
+    """
+    Start generating on the inference worker and return an iterator over the answer text.
+
+    A cached deterministic completion is returned as a single piece of text.
+    Raises QueueFullError right away if the worker has no capacity left.
+    """
+    start = time.perf_counter()
+    settings = generation_settings(decoding, seed)
+    key = _generation_cache_key(prompt, generation_model, settings)
+    cached = generation_cache.get(key) if key else None
+    if cached is not None:
+        return iter([cached])
+    model = model_manager.acquire(generation_model)
+    lock = generation_lock(generation_model)
+    futures = []
+    try:
+        # The stream waits on the worker for batches and other streams of this model
+        streamer = model.stream(
+            prompt,
+            launch=lambda fn: futures.append(generation_worker.submit(_holding(lock, fn))),
+            **dict(settings),
+        )
+    except BaseException:
+        model_manager.release(generation_model)
+        raise
+    # Keep the model loaded until generation finishes, even if the client disconnects
+    futures[0].add_done_callback(lambda _: model_manager.release(generation_model))
+    on_complete = (lambda text: generation_cache.put(key, text)) if key else None
+    return _timed_tokens(streamer, futures[0], start, on_complete)
+
+def _timed_tokens(streamer, future, start, on_complete=None):
+    first = True
+    pieces = []
+    for text in streamer:
+        if not text:
+            continue
+        if first:
+            ttft = time.perf_counter() - start
+            with _stream_stats_lock:
+                STREAM_STATS["streams"] += 1
+                STREAM_STATS["ttft_seconds"] += ttft
+                STREAM_STATS["last_ttft_ms"] = round(1000 * ttft, 1)
+            first = False
+        pieces.append(text)
+        yield text
+    # Surface a generation failure instead of ending the stream silently.
+    error = future.exception()
+    if error is not None:
+        raise error
+    if on_complete:
+        on_complete("".join(pieces))
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core import config
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue has no room for another request."""
+
+
+class InferenceWorker:
+    def __init__(self, max_workers: int = 1, max_queue: int = 8, timeout: float = None):
+        """
+        Runs blocking model calls on a bounded thread pool, away from the event loop.
+
+        Args:
+            max_workers (int): Number of calls running at the same time.
+            max_queue (int): Number of calls allowed to wait for a free worker.
+            timeout (float, optional): Default seconds a caller waits for its result.
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"completed": 0, "rejected": 0, "timed_out": 0, "failed": 0}
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self._stats["failed"] += 1
+            else:
+                self._stats["completed"] += 1
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queues `fn(*args, **kwargs)` on the worker pool.
+
+        Returns:
+            concurrent.futures.Future: Future holding the result.
+
+        Raises:
+            QueueFullError: If all workers are busy and the queue is full.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise QueueFullError("Inference queue is full, try again later.")
+            self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args, timeout: float = None, **kwargs):
+        """
+        Awaits `fn(*args, **kwargs)` on the worker pool without blocking the event loop.
+
+        A call that times out while still queued is cancelled. A call that is
+        already running cannot be interrupted and keeps its worker until it ends.
+
+        Raises:
+            QueueFullError: If all workers are busy and the queue is full.
+            asyncio.TimeoutError: If the result is not ready within the timeout.
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._stats["timed_out"] += 1
+            raise
+
+    def stats(self) -> dict:
+        """Returns queue depth and request counters."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._pending,
+                "queued": max(0, self._pending - self.max_workers),
+                **self._stats,
+            }
+
+    def shutdown(self):
+        """Stops accepting work and cancels calls that have not started."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+generation_worker = InferenceWorker(
+    max_workers=config.GENERATION_CONCURRENCY,
+    max_queue=config.GENERATION_QUEUE_SIZE,
+    timeout=config.GENERATION_TIMEOUT_SECONDS,
+)
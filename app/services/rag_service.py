@@ -0,0 +1,141 @@
+import time
+from fastapi.concurrency import run_in_threadpool
+from app.services.generation_service import cached_generation, generate_answer, lookup_answer, stream_answer
+from app.services.inference_worker import generation_worker
+from app.services.retrieval_service import format_docs, json_to_document, open_vector_store, search_documents
+from core import config
+from core.generator.context_budget import ContextBudgeter, context_budget
+from core.generator.model_manager import model_manager
+from core.generator.prompt import build_context, expand_query, format_prompt
+from core.retriever.retriever import Retriever
+
+
+def _elapsed_ms(start):
+    return round(1000 * (time.perf_counter() - start), 2)
+
+def fit_context(docs, question, generation_model, max_tokens=None):
+    """
+    Pack retrieved chunks, best first, into the context budget of the generation model.
+
+    Returns:
+        tuple: (docs to put in the prompt, budget info)
+    """
+    max_tokens = config.CONTEXT_MAX_TOKENS if max_tokens is None else max_tokens
+    model = model_manager.get(generation_model)
+    budgeter = ContextBudgeter(model.count_tokens, min_trim_tokens=config.CONTEXT_MIN_TRIM_TOKENS)
+    reserved = model.count_tokens([format_prompt("", question)])[0]
+    return budgeter.pack(docs, context_budget(model, reserved, max_tokens))
+
+def retrieve_context(question, embedding_model, documents=None, existing_collection=None, existing_qdrant_path=None,
+                     existing_qdrant_url=None, collection_id=None, rerank=None, expand=True,
+                     generation_model=None, context_tokens=None, **search_kwargs):
+    """
+    Retrieve the chunks for a question and build the generation prompt.
+
+    With a generation model, the chunks are fitted to its token budget (see
+    `fit_context`); `context_tokens` overrides CONTEXT_MAX_TOKENS, and 0
+    turns budgeting off.
+
+    Returns:
+        tuple: (prompt, formatted docs, timings)
+    """
+    docs = [json_to_document(doc) for doc in documents] if documents else []
+    retriever = Retriever(model_name=embedding_model)
+    with open_vector_store(retriever, docs, existing_collection, existing_qdrant_path, existing_qdrant_url, collection_id):
+        query = expand_query(question) if expand else question
+        relevant_docs, timings = search_documents(retriever, query, rerank, **search_kwargs)
+    max_tokens = config.CONTEXT_MAX_TOKENS if context_tokens is None else context_tokens
+    if generation_model and max_tokens > 0:
+        start = time.perf_counter()
+        relevant_docs, timings["context"] = fit_context(relevant_docs, question, generation_model, max_tokens)
+        timings["budget_ms"] = _elapsed_ms(start)
+    prompt = format_prompt(build_context(relevant_docs), question)
+    return prompt, format_docs(relevant_docs), timings
+
+# Retrieval options that name the collection; the others are part of the answer cache namespace
+_COLLECTION_KWARGS = ("documents", "collection_id", "existing_collection", "existing_qdrant_path")
+
+def _lookup(question, generation_model, embedding_model, decoding, seed, use_cache, retrieval_kwargs):
+    """Look the question up in the semantic answer cache of its collection."""
+    collection = retrieval_kwargs.get("collection_id") or retrieval_kwargs.get("existing_collection")
+    if retrieval_kwargs.get("documents") and not retrieval_kwargs.get("collection_id"):
+        # Inline documents are indexed per request, so there is no collection to key answers on
+        return None, lambda answer, sources=None: None
+    options = {key: value for key, value in retrieval_kwargs.items() if key not in _COLLECTION_KWARGS}
+    return lookup_answer(question, generation_model, embedding_model, collection, retrieval_kwargs.get("existing_qdrant_path"),
+                         decoding, seed, options, use_cache)
+
+async def answer_question(question, generation_model, embedding_model, decoding="sample", seed=None, use_cache=True,
+                          **retrieval_kwargs):
+    """
+    Answer a question in one call: query expansion, retrieval, prompt assembly and generation.
+
+    Near-duplicate questions about the same collection, asked with the same
+    options, are answered from the semantic answer cache without retrieving or
+    generating. Greedy and seeded requests do not use it.
+
+    Args:
+        question (str): The user's question.
+        generation_model (str): Language model generating the answer.
+        embedding_model (str): Embedding model of the collection.
+        decoding (str): "sample" or "greedy".
+        seed (int, optional): Seed for reproducible sampling.
+        use_cache (bool): False to skip the semantic answer cache.
+        **retrieval_kwargs: Collection and search options accepted by `retrieve_context`.
+
+    Returns:
+        dict: The answer, the retrieved docs, timings and whether the answer was cached.
+    """
+    model_manager.check_allowed(generation_model)
+    hit, remember = await run_in_threadpool(
+        _lookup, question, generation_model, embedding_model, decoding, seed, use_cache, retrieval_kwargs
+    )
+    if hit:
+        return {"answer": hit["answer"], "docs": hit["sources"] or [], "cached": True,
+                "similarity": hit["similarity"], "status_code": 200}
+
+    prompt, docs, timings = await run_in_threadpool(
+        retrieve_context, question, embedding_model, generation_model=generation_model, **retrieval_kwargs
+    )
+
+    start = time.perf_counter()
+    answer = await run_in_threadpool(cached_generation, prompt, generation_model, decoding, seed)
+    if answer is None:
+        result = await generation_worker.run(generate_answer, prompt, generation_model, decoding, seed)
+        answer = result["answer"]
+    timings["generate_ms"] = _elapsed_ms(start)
+    remember(answer, docs)
+    return {"answer": answer, "docs": docs, "timings": timings, "cached": False, "status_code": 200}
+
+def stream_rag(question, generation_model, embedding_model, decoding="sample", seed=None, use_cache=True,
+               **retrieval_kwargs):
+    """
+    Retrieve context for a question and start streaming the answer.
+
+    Retrieval runs before this returns, so a missing collection or a full
+    generation queue raises right away instead of inside the stream.
+
+    Returns:
+        iterator: (event, data) pairs; a `chunks` event with the retrieved docs,
+            one `None` event per answer token, and a final `end` event.
+    """
+    model_manager.check_allowed(generation_model)
+    hit, remember = _lookup(question, generation_model, embedding_model, decoding, seed, use_cache, retrieval_kwargs)
+    if hit:
+        return _events(hit["sources"] or [], [hit["answer"]], {}, cached=True)
+
+    prompt, docs, timings = retrieve_context(question, embedding_model, generation_model=generation_model, **retrieval_kwargs)
+    start = time.perf_counter()
+    tokens = stream_answer(prompt, generation_model, decoding, seed)
+    return _events(docs, tokens, timings, start, remember=remember)
+
+def _events(docs, tokens, timings, start=None, cached=False, remember=None):
+    yield "chunks", {"docs": docs}
+    start = start or time.perf_counter()
+    answer = []
+    for token in tokens:
+        answer.append(token)
+        yield None, {"token": token}
+    if remember:
+        remember("".join(answer), docs)
+    yield "end", {"cached": cached, "timings": {**timings, "generate_ms": _elapsed_ms(start)}}
@@ -1,5 +1,10 @@
-from langchain.schema import Document
+import time
+from contextlib import contextmanager
+from langchain_core.documents import Document
+from core import config
 from core.retriever.retriever import Retriever
+from core.retriever.session_store import session_collections
+from core.retriever.store_manager import store_manager
 
 def json_to_document(json_data):
     """Convert JSON dict to LangChain Document object."""
@@ -8,30 +13,72 @@ def json_to_document(json_data):
         metadata=json_data["metadata"]
     )
 
-def perform_retrieval(documents, query, existing_collection, existing_qdrant_path, embedding_model):
-    # Convert each JSON document to a LangChain Document object
-    if documents:
-        docs = [json_to_document(doc) for doc in documents]
-    
-    # Instantiate the retriever with the provided embedding model
-    retriever = Retriever(model_name=embedding_model)
-    
-    # Create a vector store and retrieve relevant documents
-    if documents:
-        retriever.create_vector_store(docs, collection_name="temp_collection")
-    elif existing_collection and existing_qdrant_path:
-        retriever.get_vector_store(qdrant_path=existing_qdrant_path, collection_name=existing_collection)
+@contextmanager
+def open_vector_store(retriever, docs, existing_collection, existing_qdrant_path, existing_qdrant_url=None, collection_id=None):
+    """
+    Point the retriever at an uploaded collection, new documents or an existing store.
+
+    Search inside the `with` block: session collections are not garbage-collected,
+    and other storage locations are not closed, until it exits.
+    """
+    store_manager.check_location(existing_qdrant_path, existing_qdrant_url)
+    if collection_id:
+        with session_collections.using(collection_id):
+            retriever.get_session_store(collection_id)
+            yield
+    elif docs:
+        retriever.create_vector_store(docs)
+        with session_collections.using(retriever.collection_name):
+            yield
+    elif existing_collection and (existing_qdrant_path or existing_qdrant_url or config.QDRANT_URL):
+        with store_manager.using(existing_qdrant_path, existing_qdrant_url):
+            retriever.get_vector_store(
+                qdrant_path=existing_qdrant_path,
+                collection_name=existing_collection,
+                qdrant_url=existing_qdrant_url,
+            )
+            yield
     else:
         raise ValueError("No documents or existing vector store provided.")
-    relevant_docs = retriever.retrieve_docs(query)
-    
-    # Format the response with a limited preview of page content
-    response_data = [
+
+def format_docs(docs):
+    # Chunks are bounded by CHUNK_SIZE_TOKENS, so they are returned whole
+    return [
         {
             "metadata": doc.metadata,
-            "page_content": doc.page_content[:500]  # Limit preview size
+            "page_content": doc.page_content
         }
-        for doc in relevant_docs
+        for doc in docs
     ]
+
+def search_documents(retriever, query, rerank=None, **search_kwargs):
+    """Search with optional re-ranking; `rerank` holds the re-ranking options. Timings separate both stages."""
+    if rerank:
+        results, timings = retriever.search_reranked(query, **rerank, **search_kwargs)
+        return [doc for doc, _ in results], timings
+    start = time.perf_counter()
+    relevant_docs = retriever.retrieve_docs(query, **search_kwargs)
+    timings = {"retrieve_ms": round(1000 * (time.perf_counter() - start), 2), "rerank_ms": 0.0, "reranked": False}
+    return relevant_docs, timings
+
+def perform_retrieval(documents, query, existing_collection, existing_qdrant_path, embedding_model, existing_qdrant_url=None, collection_id=None, rerank=None, **search_kwargs):
+    # Convert each JSON document to a LangChain Document object
+    docs = [json_to_document(doc) for doc in documents] if documents else []
+    
+    # Instantiate the retriever with the provided embedding model
+    retriever = Retriever(model_name=embedding_model)
     
-    return {"docs": response_data, "status_code": 200}
\ No newline at end of file
+    # Create a vector store and retrieve relevant documents
+    with open_vector_store(retriever, docs, existing_collection, existing_qdrant_path, existing_qdrant_url, collection_id):
+        relevant_docs, timings = search_documents(retriever, query, rerank, **search_kwargs)
+    
+    return {"docs": format_docs(relevant_docs), "timings": timings, "status_code": 200}
+
+def perform_batch_retrieval(queries, k, score_threshold, existing_collection, existing_qdrant_path, embedding_model, existing_qdrant_url=None, collection_id=None):
+    retriever = Retriever(model_name=embedding_model)
+    with open_vector_store(retriever, [], existing_collection, existing_qdrant_path, existing_qdrant_url, collection_id):
+        results = retriever.retrieve_docs_batch(queries, k=k, score_threshold=score_threshold)
+    return {
+        "results": [{"query": query, "docs": format_docs(docs)} for query, docs in zip(queries, results)],
+        "status_code": 200
+    }
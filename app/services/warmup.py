@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+
+from core import config
+
+
+class Warmup:
+    def __init__(self, started_at: float = None, max_attempts: int = 1, retry_seconds: float = 0):
+        """
+        Loads models in background threads after the API starts serving.
+
+        Each group of models (e.g. embedding and generation models) loads in its
+        own thread, one model after the other. Requests for a model that is still
+        loading wait for that load instead of starting another one, since the
+        registries load each model only once.
+
+        A failed load is retried after `retry_seconds`, doubling the wait each
+        time. Once a model has failed `max_attempts` times warm-up gives up on it:
+        the API reports ready with that model listed under `failed`, and requests
+        for it try to load it again.
+
+        Args:
+            started_at (float, optional): `time.perf_counter()` value when the
+                app started importing, to report how long startup took.
+            max_attempts (int): Loads tried per model before giving up.
+            retry_seconds (float): Wait before the first retry.
+        """
+        self.started_at = started_at or time.perf_counter()
+        self.max_attempts = max(1, max_attempts)
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._threads = []
+        self._models = {}  # (group, name) -> {"state", "attempts", "load_seconds", "error"}
+        self._timings = {"serving_seconds": None, "ready_seconds": None}
+
+    def _elapsed(self):
+        return round(time.perf_counter() - self.started_at, 3)
+
+    def start(self, groups: dict):
+        """
+        Starts loading models in the background.
+
+        Args:
+            groups (dict): Group name -> (loader, model names); `loader(name)` loads one model.
+        """
+        with self._lock:
+            self._timings["serving_seconds"] = self._elapsed()
+            for group, (loader, names) in groups.items():
+                for name in names:
+                    self._models[(group, name)] = {"state": "pending", "attempts": 0, "load_seconds": None, "error": None}
+            if not self._models:
+                self._timings["ready_seconds"] = self._timings["serving_seconds"]
+        for group, (loader, names) in groups.items():
+            if names:
+                thread = threading.Thread(
+                    target=self._load_all, args=(group, loader, list(names)), name=f"warmup-{group}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def _load(self, group, loader, name) -> bool:
+        entry = self._models[(group, name)]
+        with self._lock:
+            entry["state"] = "loading"
+            entry["attempts"] += 1
+            attempt = entry["attempts"]
+        start = time.perf_counter()
+        try:
+            loader(name)
+        except Exception as e:
+            logging.error(f"Failed to warm up {group} model '{name}' (attempt {attempt}): {e}")
+            with self._lock:
+                entry.update(state="failed" if attempt >= self.max_attempts else "retrying", error=str(e))
+            return False
+        with self._lock:
+            entry.update(state="loaded", load_seconds=round(time.perf_counter() - start, 3), error=None)
+        return True
+
+    def _load_all(self, group, loader, names):
+        delay = self.retry_seconds
+        # Each round loads the models the previous round failed on
+        for attempt in range(self.max_attempts):
+            if attempt:
+                logging.info(f"Retrying {len(names)} {group} model(s) in {delay:g}s.")
+                time.sleep(delay)
+                delay *= 2
+            names = [name for name in names if not self._load(group, loader, name)]
+            if not names:
+                break
+        with self._lock:
+            if self._ready():
+                self._timings["ready_seconds"] = self._elapsed()
+                logging.info(f"Warm-up finished {self._timings['ready_seconds']:.1f}s after startup.")
+
+    def wait(self, timeout: float = None):
+        """Blocks until every background load has finished."""
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def is_ready(self) -> bool:
+        """True once every model has loaded or warm-up has given up on it."""
+        with self._lock:
+            return self._ready()
+
+    def _ready(self) -> bool:
+        return all(entry["state"] in ("loaded", "failed") for entry in self._models.values())
+
+    def status(self) -> dict:
+        """Returns readiness, failed models, per-model warm-up state and startup timings in seconds."""
+        with self._lock:
+            models = [{"group": group, "model_name": name, **entry} for (group, name), entry in self._models.items()]
+            failed = [model["model_name"] for model in models if model["state"] == "failed"]
+            return {"ready": self._ready(), "failed": failed, "models": models, **self._timings}
+
+
+# Created when app.main starts importing, so startup timings include the imports.
+warmup = Warmup(max_attempts=config.WARMUP_MAX_ATTEMPTS, retry_seconds=config.WARMUP_RETRY_SECONDS)
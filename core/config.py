@@ -0,0 +1,149 @@
+"""
+Server-side configuration for the RAG service.
+
+Every setting is read from an environment variable so deployments can be
+tuned without code changes. Defaults match the models used by the frontend.
+"""
+import json
+import os
+
+
+def _env_list(name: str, default: str = "") -> list:
+    """Parse a comma separated environment variable into a list of strings."""
+    value = os.getenv(name, default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _env_json(name: str, default: str = "{}"):
+    """Parse a JSON environment variable."""
+    return json.loads(os.getenv(name) or default)
+
+
+# Embedding models
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "intfloat/multilingual-e5-large-instruct")
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE") or None
+
+# Embedding model registry: at most this many models stay loaded, and
+# optionally their combined parameter memory stays under the budget (0 = no budget).
+EMBEDDING_REGISTRY_MAX_MODELS = int(os.getenv("EMBEDDING_REGISTRY_MAX_MODELS", "4"))
+EMBEDDING_REGISTRY_MEMORY_BUDGET_MB = float(os.getenv("EMBEDDING_REGISTRY_MEMORY_BUDGET_MB", "0"))
+
+# Embedding models loaded when the API starts, e.g. "sentence-transformers/all-MiniLM-L12-v2"
+EMBEDDING_WARMUP_MODELS = _env_list("EMBEDDING_WARMUP_MODELS")
+
+# Warm-up models (EMBEDDING_WARMUP_MODELS, GENERATION_PRELOAD_MODELS) load in
+# the background while the API serves; /api/ready returns 503 until they are
+# loaded. Set WARMUP_BLOCKING to hold startup until they are loaded instead.
+# A failed load is retried WARMUP_MAX_ATTEMPTS times in all, waiting
+# WARMUP_RETRY_SECONDS and doubling the wait each time; after that /api/ready
+# returns 200 and lists the model under "failed".
+WARMUP_BLOCKING = os.getenv("WARMUP_BLOCKING", "false").lower() in ("1", "true", "yes")
+WARMUP_MAX_ATTEMPTS = int(os.getenv("WARMUP_MAX_ATTEMPTS", "3"))
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "10"))
+
+# Qdrant: when QDRANT_URL is set, existing collections are served from that
+# server instead of embedded local storage paths.
+QDRANT_URL = os.getenv("QDRANT_URL") or None
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY") or None
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() in ("1", "true", "yes")
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "16"))
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "30"))
+# Requests may only name the Qdrant servers in QDRANT_ALLOWED_URLS (QDRANT_URL
+# by default) and existing embedded storages under QDRANT_ALLOWED_PATHS; at most
+# QDRANT_MAX_HANDLES storage locations stay open.
+QDRANT_ALLOWED_URLS = _env_list("QDRANT_ALLOWED_URLS", QDRANT_URL or "")
+QDRANT_ALLOWED_PATHS = _env_list("QDRANT_ALLOWED_PATHS", "data/vector_stores")
+QDRANT_MAX_HANDLES = int(os.getenv("QDRANT_MAX_HANDLES", "16"))
+
+# Generation worker: number of requests in flight at once, how many more may
+# wait in the queue before requests get HTTP 429, and the per-request timeout.
+# In-flight requests share the model through the batch scheduler below, so
+# this should be at least GENERATION_MAX_BATCH_SIZE.
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "8"))
+GENERATION_QUEUE_SIZE = int(os.getenv("GENERATION_QUEUE_SIZE", "8"))
+GENERATION_TIMEOUT_SECONDS = float(os.getenv("GENERATION_TIMEOUT_SECONDS", "300"))
+
+# Micro-batching: prompts arriving within the wait window are generated together.
+GENERATION_MAX_BATCH_SIZE = int(os.getenv("GENERATION_MAX_BATCH_SIZE", "8"))
+GENERATION_BATCH_WAIT_MS = float(os.getenv("GENERATION_BATCH_WAIT_MS", "20"))
+
+# Language models: only models in GENERATION_MODELS can be requested. At most
+# GENERATION_MAX_MODELS stay loaded, and optionally their combined memory
+# footprint stays under the budget (0 = no budget); least recently used idle
+# models are unloaded first. GENERATION_PRELOAD_MODELS are loaded at startup.
+GENERATION_MODELS = _env_list("GENERATION_MODELS", "allenai/OLMo-2-1124-7B-Instruct")
+GENERATION_MAX_MODELS = int(os.getenv("GENERATION_MAX_MODELS", "1"))
+GENERATION_MEMORY_BUDGET_MB = float(os.getenv("GENERATION_MEMORY_BUDGET_MB", "0"))
+GENERATION_PRELOAD_MODELS = _env_list("GENERATION_PRELOAD_MODELS")
+GENERATION_QUANTIZATION = os.getenv("GENERATION_QUANTIZATION", "8bit")
+
+# Prefix caching: transformers models compute the keys and values of the fixed
+# prompt preamble once and start every RAG prompt from a copy of them.
+# llama.cpp already reuses the longest prefix shared with the previous prompt.
+GENERATION_PREFIX_CACHE = os.getenv("GENERATION_PREFIX_CACHE", "true").lower() in ("1", "true", "yes")
+
+# Generation backends, per model. GENERATION_MODEL_CONFIGS maps a model name to
+# its backend and options; models without an entry use GENERATION_BACKEND.
+# "transformers" loads the Hugging Face model (options: quantization, and
+# assistant_model plus num_assistant_tokens to draft tokens with a smaller model
+# sharing its tokenizer, e.g. "allenai/OLMo-2-0425-1B-Instruct"), while
+# "llama_cpp" runs a GGUF file on the CPU (options: model_path, or repo_id and
+# filename, plus n_ctx, n_threads, n_threads_batch, n_batch, n_gpu_layers), e.g.
+# {"allenai/OLMo-2-1124-7B-Instruct": {"backend": "llama_cpp",
+#   "model_path": "models/olmo-2-1124-7B-instruct-Q4_K_M.gguf", "n_threads": 8}}
+# llama.cpp thread counts default to the CPUs this process may run on.
+GENERATION_BACKEND = os.getenv("GENERATION_BACKEND", "transformers")
+GENERATION_MODEL_CONFIGS = _env_json("GENERATION_MODEL_CONFIGS")
+LLAMA_CPP_N_CTX = int(os.getenv("LLAMA_CPP_N_CTX", "4096"))
+LLAMA_CPP_N_THREADS = int(os.getenv("LLAMA_CPP_N_THREADS", "0")) or None
+LLAMA_CPP_N_BATCH = int(os.getenv("LLAMA_CPP_N_BATCH", "512"))
+
+# Persistent cache of document embeddings keyed by (model, content hash).
+# Set EMBEDDING_CACHE_MAX_ENTRIES to 0 to disable it.
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+
+# Collections built from uploaded documents. They are named after a hash of
+# the document set, reused by follow-up questions and deleted once unused for
+# SESSION_TTL_SECONDS. Use ":memory:" to keep them out of the file system.
+SESSION_QDRANT_PATH = os.getenv("SESSION_QDRANT_PATH", "data/vector_stores/sessions")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_GC_INTERVAL_SECONDS = float(os.getenv("SESSION_GC_INTERVAL_SECONDS", "60"))
+
+# Chunking before embedding: pages are split into pieces of at most this many
+# tokens of the embedding model's tokenizer (capped at its max sequence length),
+# overlapping by CHUNK_OVERLAP_TOKENS. Set CHUNK_SIZE_TOKENS to 0 to embed whole pages.
+CHUNK_SIZE_TOKENS = int(os.getenv("CHUNK_SIZE_TOKENS", "256"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+# Semantic answer cache: a question whose embedding has at least this cosine
+# similarity to an earlier question about the same collection and models gets
+# the cached answer. Set ANSWER_CACHE_MAX_ENTRIES to 0 to disable it.
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2048"))
+
+# Exact-match cache of deterministic (greedy or seeded) completions, keyed on
+# model, prompt and generation settings. Backends: "memory", "sqlite" or "none".
+GENERATION_CACHE_BACKEND = os.getenv("GENERATION_CACHE_BACKEND", "memory")
+GENERATION_CACHE_PATH = os.getenv("GENERATION_CACHE_PATH", "data/generation_cache.sqlite")
+GENERATION_CACHE_MAX_ENTRIES = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "1024"))
+
+# Context budget of RAG prompts: retrieved chunks are packed best first, and
+# trimmed at sentence boundaries, into at most CONTEXT_MAX_TOKENS tokens of the
+# generation model's tokenizer (less if its context window is smaller).
+# A partial chunk is only added if at least CONTEXT_MIN_TRIM_TOKENS are left.
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1536"))
+CONTEXT_MIN_TRIM_TOKENS = int(os.getenv("CONTEXT_MIN_TRIM_TOKENS", "32"))
+
+# Optional cross-encoder re-ranking of retrieved candidates
+RERANK_MODEL_NAME = os.getenv("RERANK_MODEL_NAME", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_DEVICE = os.getenv("RERANK_DEVICE", "cpu")
+# Only these cross-encoders can be requested with `rerank_model`; at most
+# RERANK_MAX_MODELS stay loaded, least recently used first out.
+RERANK_MODELS = _env_list("RERANK_MODELS", RERANK_MODEL_NAME)
+RERANK_MAX_MODELS = int(os.getenv("RERANK_MAX_MODELS", "2"))
+# Initial cost estimate per (query, chunk) pair for `rerank_budget_ms`. When
+# unset, each cross-encoder measures it on dummy chunks when it loads.
+RERANK_SECONDS_PER_PAIR = float(os.getenv("RERANK_SECONDS_PER_PAIR", "0")) or None
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+from core import config
+
+# SQLite limits the number of bound parameters per statement.
+_SQL_BATCH = 500
+
+
+def content_hash(text: str) -> str:
+    """Returns the SHA-256 hex digest of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_entries: int = 500000):
+        """
+        On-disk store of embedding vectors keyed by (model name, content hash).
+
+        Vectors are stored as float32 blobs in SQLite. When the store holds more
+        than `max_entries` vectors, the least recently used ones are deleted.
+
+        Args:
+            path (str): Path of the SQLite database file.
+            max_entries (int): Maximum number of vectors kept on disk.
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model_name: str, hashes: list) -> dict:
+        """
+        Looks up cached vectors.
+
+        Args:
+            model_name (str): Embedding model the vectors were computed with.
+            hashes (list): Content hashes to look up.
+
+        Returns:
+            dict: Content hash -> vector for the hashes found in the cache.
+        """
+        found = {}
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(hashes), _SQL_BATCH):
+                chunk = hashes[i:i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model_name, *chunk],
+                ).fetchall()
+                for digest, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[digest] = vector.tolist()
+            if found:
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                    [(now, model_name, digest) for digest in found],
+                )
+                conn.commit()
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(set(hashes)) - len(found)
+        return found
+
+    def put_many(self, model_name: str, vectors: dict):
+        """
+        Stores vectors and evicts the least recently used entries over the limit.
+
+        Args:
+            model_name (str): Embedding model the vectors were computed with.
+            vectors (dict): Content hash -> vector.
+        """
+        if not vectors:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(model_name, digest, array("f", vector).tobytes(), now) for digest, vector in vectors.items()],
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN"
+                    " (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self._stats["evictions"] += excess
+            conn.commit()
+
+    def stats(self) -> dict:
+        """Returns hit, miss and eviction counts."""
+        with self._lock:
+            return dict(self._stats)
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, embedding: Embeddings, cache: EmbeddingCache, model_name: str):
+        """
+        Embeddings wrapper that only encodes documents missing from the cache.
+
+        Args:
+            embedding (Embeddings): The underlying embedding model.
+            cache (EmbeddingCache): Store of previously computed vectors.
+            model_name (str): Model name used to namespace the cache.
+        """
+        self.embedding = embedding
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts: list) -> list:
+        hashes = [content_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model_name, list(dict.fromkeys(hashes)))
+
+        missing = {}
+        for digest, text in zip(hashes, texts):
+            if digest not in vectors:
+                missing.setdefault(digest, text)
+        if missing:
+            logging.info(f"Embedding {len(missing)} of {len(texts)} documents not found in the cache.")
+            computed = self.embedding.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            self.cache.put_many(self.model_name, new_vectors)
+            vectors.update(new_vectors)
+        return [vectors[digest] for digest in hashes]
+
+    def embed_query(self, text: str) -> list:
+        return self.embedding.embed_query(text)
+
+
+embedding_cache = (
+    EmbeddingCache(config.EMBEDDING_CACHE_PATH, config.EMBEDDING_CACHE_MAX_ENTRIES)
+    if config.EMBEDDING_CACHE_MAX_ENTRIES > 0
+    else None
+)
+
+
+def with_embedding_cache(embedding: Embeddings, model_name: str) -> Embeddings:
+    """Wraps an embedding model with the shared document cache, if it is enabled."""
+    if embedding_cache is None:
+        return embedding
+    return CachedEmbeddings(embedding, embedding_cache, model_name)
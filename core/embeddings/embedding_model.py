@@ -1,22 +1,34 @@
 import os
-from langchain_huggingface import HuggingFaceEmbeddings
+from typing import TYPE_CHECKING
 
-def get_embedding_model(model_name: str = None) -> HuggingFaceEmbeddings:
+if TYPE_CHECKING:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+def get_embedding_model(model_name: str = None, device: str = None) -> "HuggingFaceEmbeddings":
     """
     Returns an instance of an embedding model.
+
+    This always loads a new model. Request handlers should go through
+    `core.embeddings.registry.embedding_registry` to share loaded models.
     
     Parameters:
         model_name (str, optional): The name/identifier of the embedding model to use.
             If not provided, the function checks the environment variable 'EMBEDDING_MODEL_NAME'
             and falls back to a default value.
+        device (str, optional): Torch device to load the model on (e.g. "cpu", "cuda").
+            Defaults to sentence-transformers' own device selection.
             
     Returns:
         HuggingFaceEmbeddings: An instance of the embedding model.
     """
+    # Imported here so the API starts without loading torch and sentence-transformers
+    from langchain_huggingface import HuggingFaceEmbeddings
+
     # Use the provided model_name, otherwise check environment, then default.
     if model_name is None:
         model_name = os.getenv("EMBEDDING_MODEL_NAME", "intfloat/multilingual-e5-large-instruct")
-    return HuggingFaceEmbeddings(model_name=model_name)
+    model_kwargs = {"device": device} if device else {}
+    return HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs)
 
 if __name__ == "__main__":
     # Quick test to verify that the embedding model loads.
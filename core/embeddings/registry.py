@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from core import config
+from core.embeddings.embedding_model import get_embedding_model
+
+
+def estimate_model_bytes(embedding) -> int:
+    """
+    Estimates the memory held by a loaded embedding model.
+
+    Args:
+        embedding (HuggingFaceEmbeddings): A loaded embedding model.
+
+    Returns:
+        int: Bytes used by the model parameters and buffers, or 0 if unknown.
+    """
+    module = getattr(embedding, "client", None)
+    if module is None or not hasattr(module, "parameters"):
+        return 0
+    size = sum(p.numel() * p.element_size() for p in module.parameters())
+    size += sum(b.numel() * b.element_size() for b in module.buffers())
+    return size
+
+
+class EmbeddingModelRegistry:
+    def __init__(self,
+                 max_models: int = 4,
+                 memory_budget_bytes: int = None,
+                 loader=get_embedding_model):
+        """
+        Process-wide cache of loaded embedding models keyed by (model name, device).
+
+        Loading is single-flight: concurrent requests for a model that is still
+        loading wait for the first load instead of starting their own. When more
+        than `max_models` are loaded, or their estimated size exceeds
+        `memory_budget_bytes`, the least recently used models are evicted.
+
+        Args:
+            max_models (int): Maximum number of models kept loaded.
+            memory_budget_bytes (int, optional): Upper bound for the combined model size.
+            loader (callable): Function `(model_name, device) -> embeddings` used to load models.
+        """
+        self.max_models = max_models
+        self.memory_budget_bytes = memory_budget_bytes
+        self.loader = loader
+
+        self._lock = threading.Lock()
+        self._models = OrderedDict()  # key -> (embedding, size in bytes)
+        self._loading = {}  # key -> Future resolved when the load finishes
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "load_errors": 0, "load_seconds": {}}
+
+    @staticmethod
+    def _key(model_name: str = None, device: str = None):
+        return (model_name or config.EMBEDDING_MODEL_NAME, device or config.EMBEDDING_DEVICE)
+
+    def get(self, model_name: str = None, device: str = None):
+        """
+        Returns a loaded embedding model, loading it on first use.
+
+        Args:
+            model_name (str, optional): Embedding model name. Defaults to `EMBEDDING_MODEL_NAME`.
+            device (str, optional): Device to load the model on. Defaults to `EMBEDDING_DEVICE`.
+
+        Returns:
+            HuggingFaceEmbeddings: The shared embedding model instance.
+        """
+        key = self._key(model_name, device)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._models[key][0]
+            self._stats["misses"] += 1
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._loading[key] = future
+
+        if not owner:
+            return future.result()
+
+        start = time.perf_counter()
+        try:
+            embedding = self.loader(*key)
+        except BaseException as e:
+            with self._lock:
+                self._stats["load_errors"] += 1
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+        elapsed = time.perf_counter() - start
+        size = estimate_model_bytes(embedding)
+        logging.info(f"Loaded embedding model '{key[0]}' on {key[1] or 'default device'} in {elapsed:.2f}s.")
+
+        with self._lock:
+            self._models[key] = (embedding, size)
+            self._stats["load_seconds"][key[0]] = round(elapsed, 3)
+            del self._loading[key]
+            self._evict()
+        future.set_result(embedding)
+        return embedding
+
+    def _evict(self):
+        """Drops least recently used models until the limits are met. Caller holds the lock."""
+        def over_limit():
+            if len(self._models) > self.max_models:
+                return True
+            if self.memory_budget_bytes:
+                return sum(size for _, size in self._models.values()) > self.memory_budget_bytes
+            return False
+
+        # Always keep the most recently used model, even if it alone exceeds the budget.
+        while len(self._models) > 1 and over_limit():
+            key, _ = self._models.popitem(last=False)
+            self._stats["evictions"] += 1
+            logging.info(f"Evicted embedding model '{key[0]}' from the registry.")
+
+    def stats(self) -> dict:
+        """Returns registry metrics: hits, misses, evictions, load times and loaded models."""
+        with self._lock:
+            return {
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "evictions": self._stats["evictions"],
+                "load_errors": self._stats["load_errors"],
+                "load_seconds": dict(self._stats["load_seconds"]),
+                "loaded": [
+                    {"model_name": name, "device": device, "size_mb": round(size / 2**20, 1)}
+                    for (name, device), (_, size) in self._models.items()
+                ],
+            }
+
+
+embedding_registry = EmbeddingModelRegistry(
+    max_models=config.EMBEDDING_REGISTRY_MAX_MODELS,
+    memory_budget_bytes=int(config.EMBEDDING_REGISTRY_MEMORY_BUDGET_MB * 2**20) or None,
+)
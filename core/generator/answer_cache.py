@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+
+import numpy as np
+
+from core import config
+
+
+class SemanticAnswerCache:
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 86400, max_entries: int = 2048):
+        """
+        In-memory cache of generated answers, looked up by question similarity.
+
+        Answers are grouped in namespaces, typically (collection, collection
+        version, generation model, embedding model), and a lookup only compares
+        the question with earlier questions of the same namespace. Storing or
+        looking up a collection version drops the answers cached for other
+        versions of that collection, so re-indexing invalidates them.
+
+        Args:
+            threshold (float): Minimum cosine similarity between questions for a hit.
+            ttl_seconds (float): Age after which an answer is no longer returned.
+            max_entries (int): Number of answers kept; least recently used ones are evicted.
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._ids = count()
+        self._entries = OrderedDict()  # entry id -> (namespace, question, answer, sources, created), in LRU order
+        self._namespaces = {}  # namespace -> [entry ids, normalized question vectors (n x d)]
+        self._versions = {}  # collection -> version of its cached answers
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, namespace: tuple):
+        """Drops the answers of a collection cached under a different version."""
+        collection, version = namespace[0], namespace[1]
+        if self._versions.get(collection, version) != version:
+            stale = [key for key in self._namespaces if key[0] == collection and key[1] != version]
+            for key in stale:
+                for entry_id in self._namespaces.pop(key)[0]:
+                    del self._entries[entry_id]
+                    self._stats["invalidations"] += 1
+        self._versions[collection] = version
+
+    def _remove(self, entry_id):
+        namespace = self._entries.pop(entry_id)[0]
+        ids, vectors = self._namespaces[namespace]
+        row = ids.index(entry_id)
+        del ids[row]
+        if ids:
+            self._namespaces[namespace][1] = np.delete(vectors, row, axis=0)
+        else:
+            del self._namespaces[namespace]
+
+    def lookup(self, namespace: tuple, vector):
+        """
+        Returns the cached answer of the most similar earlier question.
+
+        Args:
+            namespace (tuple): (collection, collection version, *model names).
+            vector: Embedding of the question.
+
+        Returns:
+            dict: `answer`, `sources`, `question` and `similarity`, or None on a miss.
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            self._check_version(namespace)
+            ids, vectors = self._namespaces.get(namespace, ([], None))
+            if ids:
+                similarities = vectors @ query
+                row = int(np.argmax(similarities))
+                entry_id = ids[row]
+                _, question, answer, sources, created = self._entries[entry_id]
+                if time.time() - created > self.ttl_seconds:
+                    self._remove(entry_id)
+                elif similarities[row] >= self.threshold:
+                    self._entries.move_to_end(entry_id)
+                    self._stats["hits"] += 1
+                    return {
+                        "answer": answer,
+                        "sources": sources,
+                        "question": question,
+                        "similarity": round(float(similarities[row]), 4),
+                    }
+            self._stats["misses"] += 1
+            return None
+
+    def store(self, namespace: tuple, vector, question: str, answer: str, sources: list = None):
+        """
+        Caches the answer to a question, evicting the least recently used answers over the limit.
+
+        Args:
+            namespace (tuple): (collection, collection version, *model names).
+            vector: Embedding of the question.
+            question (str): The question, returned with hits for reference.
+            answer (str): The generated answer.
+            sources (list, optional): Retrieved chunks the answer was based on.
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            self._check_version(namespace)
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (namespace, question, answer, sources, time.time())
+            if namespace in self._namespaces:
+                ids, vectors = self._namespaces[namespace]
+                ids.append(entry_id)
+                self._namespaces[namespace][1] = np.vstack([vectors, query])
+            else:
+                self._namespaces[namespace] = [[entry_id], query[np.newaxis, :]]
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate(self, collection: str = None) -> int:
+        """
+        Drops the cached answers of one collection, or all of them.
+
+        Returns:
+            int: Number of answers dropped.
+        """
+        with self._lock:
+            stale = [entry_id for entry_id, entry in self._entries.items()
+                     if collection is None or entry[0][0] == collection]
+            for entry_id in stale:
+                self._remove(entry_id)
+            self._stats["invalidations"] += len(stale)
+            return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+                "threshold": self.threshold,
+            }
+
+
+answer_cache = (
+    SemanticAnswerCache(
+        threshold=config.ANSWER_CACHE_THRESHOLD,
+        ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+        max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+    )
+    if config.ANSWER_CACHE_MAX_ENTRIES > 0
+    else None
+)
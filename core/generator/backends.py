@@ -0,0 +1,70 @@
+from core import config
+from core.generator.prompt import PROMPT_PREFIX
+
+
+# Backends import their libraries when a model is loaded, so importing the API
+# does not pull in transformers or llama.cpp.
+
+def load_transformers_model(model_name: str, quantization: str = None, **generation_config):
+    """
+    Loads a Hugging Face model and its generation pipeline.
+
+    `generation_config` options are passed to `LanguageModel`, e.g. `assistant_model`
+    and `num_assistant_tokens` for assisted generation with a draft model.
+    """
+    from core.generator.language_model import LanguageModel
+
+    model = LanguageModel(
+        model_name=model_name,
+        generation_config={
+            "batch_size": config.GENERATION_MAX_BATCH_SIZE,
+            "prompt_prefixes": [PROMPT_PREFIX] if config.GENERATION_PREFIX_CACHE else [],
+            **generation_config,
+        },
+    )
+    model.load_language_model(quantization=quantization or config.GENERATION_QUANTIZATION)
+    model.load_hg_pipeline()
+    return model
+
+
+def load_llama_cpp_model(model_name: str, **options):
+    """Loads a GGUF model with llama.cpp; `options` are passed to `LlamaCppModel`."""
+    from core.generator.llama_cpp_model import LlamaCppModel
+
+    options.setdefault("n_ctx", config.LLAMA_CPP_N_CTX)
+    options.setdefault("n_threads", config.LLAMA_CPP_N_THREADS)
+    options.setdefault("n_batch", config.LLAMA_CPP_N_BATCH)
+    model = LlamaCppModel(model_name=model_name, **options)
+    model.load_language_model()
+    return model
+
+
+# Backend name -> loader `(model_name, **options) -> model`
+BACKENDS = {
+    "transformers": load_transformers_model,
+    "llama_cpp": load_llama_cpp_model,
+}
+
+
+def model_settings(model_name: str) -> dict:
+    """Returns the backend and options configured for a model in GENERATION_MODEL_CONFIGS."""
+    settings = dict(config.GENERATION_MODEL_CONFIGS.get(model_name, {}))
+    settings.setdefault("backend", config.GENERATION_BACKEND)
+    return settings
+
+
+def load_language_model(model_name: str):
+    """
+    Loads a language model with the backend configured for it.
+
+    Every backend returns a model with `batch_inference`, `stream` and
+    `memory_footprint` methods.
+
+    Raises:
+        ValueError: If the configured backend does not exist.
+    """
+    options = model_settings(model_name)
+    backend = options.pop("backend")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown generation backend '{backend}'. Available backends: {', '.join(BACKENDS)}.")
+    return BACKENDS[backend](model_name, **options)
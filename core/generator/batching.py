@@ -0,0 +1,153 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class BatchScheduler:
+    def __init__(self, batch_fn, max_batch_size: int = 8, max_wait_ms: float = 20, name: str = "batch", key_fn=None):
+        """
+        Collects concurrent requests into micro-batches for a single model.
+
+        A background thread takes the first waiting request, then keeps collecting
+        until `max_batch_size` requests are gathered or `max_wait_ms` has passed,
+        runs them through `batch_fn` in one call and hands each caller its result.
+
+        Args:
+            batch_fn (callable): Function mapping a list of inputs to a list of outputs.
+            max_batch_size (int): Maximum number of inputs per batch.
+            max_wait_ms (float): How long to wait for more inputs after the first arrives.
+            name (str): Name used for the worker thread and in logs.
+            key_fn (callable, optional): Maps an input to a hashable key; only inputs
+                with equal keys (e.g. the same generation settings) share a batch.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.key_fn = key_fn or (lambda item: None)
+
+        self._queue = queue.Queue()
+        self._deferred = deque()  # entries set aside for not matching the batch being collected
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "requests": 0,
+            "failed_batches": 0,
+            "batch_sizes": {},
+            "wait_seconds": 0.0,
+            "busy_seconds": 0.0,
+        }
+        self._thread = threading.Thread(target=self._loop, name=f"{name}-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        """
+        Queues an input for the next batch.
+
+        Returns:
+            Future: Resolves to the output for `item`.
+        """
+        if self._closed.is_set():
+            raise RuntimeError(f"Scheduler '{self.name}' is closed.")
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def infer(self, item, timeout: float = None):
+        """Submits an input and blocks until its output is ready."""
+        return self.submit(item).result(timeout=timeout)
+
+    def _collect(self):
+        # Deferred entries arrived earlier than anything still queued, so they go first.
+        first = self._deferred.popleft() if self._deferred else self._queue.get()
+        if first is None:
+            return None
+        key = self.key_fn(first[0])
+        batch = [first]
+        deferred = deque()
+        while self._deferred and len(batch) < self.max_batch_size:
+            entry = self._deferred.popleft()
+            (batch if self.key_fn(entry[0]) == key else deferred).append(entry)
+        deferred.extend(self._deferred)
+        self._deferred = deferred
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)
+                break
+            if self.key_fn(entry[0]) == key:
+                batch.append(entry)
+            else:
+                self._deferred.append(entry)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                outputs = self.batch_fn([item for item, _, _ in batch])
+                if len(outputs) != len(batch):
+                    raise RuntimeError(f"Batch function returned {len(outputs)} outputs for {len(batch)} inputs.")
+            except Exception as e:
+                logging.error(f"Batch of {len(batch)} failed in scheduler '{self.name}': {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                failed = True
+            else:
+                for (_, future, _), output in zip(batch, outputs):
+                    future.set_result(output)
+                failed = False
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                size = len(batch)
+                self._stats["batches"] += 1
+                self._stats["requests"] += size
+                self._stats["failed_batches"] += int(failed)
+                self._stats["batch_sizes"][size] = self._stats["batch_sizes"].get(size, 0) + 1
+                self._stats["wait_seconds"] += sum(start - queued_at for _, _, queued_at in batch)
+                self._stats["busy_seconds"] += elapsed
+
+    def stats(self) -> dict:
+        """Returns batch size distribution, mean queue wait and throughput."""
+        with self._lock:
+            batches = self._stats["batches"]
+            requests = self._stats["requests"]
+            busy = self._stats["busy_seconds"]
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queued": self._queue.qsize() + len(self._deferred),
+                "batches": batches,
+                "requests": requests,
+                "failed_batches": self._stats["failed_batches"],
+                "batch_sizes": dict(sorted(self._stats["batch_sizes"].items())),
+                "mean_batch_size": round(requests / batches, 2) if batches else 0.0,
+                "mean_wait_ms": round(1000 * self._stats["wait_seconds"] / requests, 2) if requests else 0.0,
+                "requests_per_second": round(requests / busy, 3) if busy else 0.0,
+            }
+
+    def close(self):
+        """Stops the scheduler after the queued requests are processed."""
+        if not self._closed.is_set():
+            self._closed.set()
+            self._queue.put(None)
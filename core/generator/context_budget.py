@@ -0,0 +1,103 @@
+import re
+
+from langchain_core.documents import Document
+
+
+# A sentence ends with ., ! or ? followed by whitespace, or at a blank line
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+def sentence_ends(text: str) -> list:
+    """Returns the offset just after each sentence of `text`."""
+    ends = [match.start() for match in _SENTENCE_END.finditer(text) if text[:match.start()].strip()]
+    end = len(text.rstrip())
+    return sorted(set(ends + [end])) if end else []
+
+
+class ContextBudgeter:
+    def __init__(self, count_tokens, separator: str = "\n\n", min_trim_tokens: int = 32):
+        """
+        Packs retrieved chunks into a token budget for the generation prompt.
+
+        Chunks are taken best first. A chunk that does not fit whole is cut
+        after its last sentence that fits, as long as at least `min_trim_tokens`
+        of budget are left; later, shorter chunks may still fill the rest.
+
+        Args:
+            count_tokens (callable): `(texts) -> list` of token counts, using the
+                generation model's tokenizer.
+            separator (str): Text joining chunks in the prompt, see `build_context`.
+            min_trim_tokens (int): Smallest remaining budget worth filling with part of a chunk.
+        """
+        self.count_tokens = count_tokens
+        self.separator = separator
+        self.min_trim_tokens = min_trim_tokens
+        self._separator_tokens = count_tokens([separator])[0]
+
+    def pack(self, docs: list, budget: int):
+        """
+        Selects and trims chunks so their joined text fits in `budget` tokens.
+
+        Args:
+            docs (list): LangChain Documents, best first.
+            budget (int): Maximum context tokens.
+
+        Returns:
+            tuple: (Documents to put in the prompt, in the given order;
+                info dict with the budget, tokens used and dropped/trimmed counts)
+        """
+        packed, used, trimmed = [], 0, 0
+        for doc, tokens in zip(docs, self.count_tokens([doc.page_content for doc in docs])):
+            separator = self._separator_tokens if packed else 0
+            remaining = budget - used - separator
+            if tokens <= remaining:
+                packed.append(doc)
+                used += separator + tokens
+                continue
+            if remaining < self.min_trim_tokens:
+                continue
+            text, tokens = self._trim(doc.page_content, remaining)
+            if text:
+                packed.append(Document(page_content=text, metadata={**doc.metadata, "trimmed": True}))
+                used += separator + tokens
+                trimmed += 1
+        return packed, {
+            "budget_tokens": budget,
+            "context_tokens": used,
+            "chunks": len(packed),
+            "dropped": len(docs) - len(packed),
+            "trimmed": trimmed,
+        }
+
+    def _trim(self, text: str, budget: int):
+        """Returns the longest run of leading sentences of `text` within `budget` tokens, and its length."""
+        ends = sentence_ends(text)
+        lengths = self.count_tokens([text[start:end] for start, end in zip([0] + ends, ends)])
+        keep, total = 0, 0
+        for length in lengths:
+            if total + length > budget:
+                break
+            total += length
+            keep += 1
+        # Tokens can merge across sentence seams, so check the actual text
+        while keep:
+            candidate = text[:ends[keep - 1]]
+            tokens = self.count_tokens([candidate])[0]
+            if tokens <= budget:
+                return candidate, tokens
+            keep -= 1
+        return "", 0
+
+def context_budget(model, reserved_tokens: int, max_tokens: int) -> int:
+    """
+    Returns the context tokens available for a prompt.
+
+    Args:
+        model: Loaded language model with `context_length` and `max_new_tokens`.
+        reserved_tokens (int): Prompt tokens outside the context (template and question).
+        max_tokens (int): Upper bound on context tokens, to bound prefill time.
+    """
+    window = model.context_length()
+    if not window:
+        return max_tokens
+    return max(0, min(max_tokens, window - model.max_new_tokens() - reserved_tokens))
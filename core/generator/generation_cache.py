@@ -0,0 +1,157 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from core import config
+from core.embeddings.cache import content_hash
+
+
+def generation_key(model_name: str, prompt: str, options: dict) -> str:
+    """
+    Returns the cache key of a completion: the model, the prompt hash and the
+    generation settings in `options`, which must be JSON serializable.
+    """
+    return content_hash(json.dumps([model_name, content_hash(prompt), options], sort_keys=True))
+
+
+class GenerationCache:
+    """
+    Exact-match store of completions. Subclasses implement `_get`, `_put` and `__len__`.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str):
+        """Returns the cached completion for a key, or None."""
+        with self._lock:
+            text = self._get(key)
+            self._stats["hits" if text is not None else "misses"] += 1
+            return text
+
+    def put(self, key: str, text: str):
+        """Stores a completion, evicting the least recently used ones over the limit."""
+        with self._lock:
+            self._stats["evictions"] += self._put(key, text)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": type(self).__name__, "entries": len(self), **self._stats}
+
+
+class InMemoryGenerationCache(GenerationCache):
+    def __init__(self, max_entries: int = 1024):
+        """
+        LRU cache of completions held in process memory.
+
+        Args:
+            max_entries (int): Number of completions kept.
+        """
+        super().__init__(max_entries)
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        text = self._entries.get(key)
+        if text is not None:
+            self._entries.move_to_end(key)
+        return text
+
+    def _put(self, key, text) -> int:
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+
+class SQLiteGenerationCache(GenerationCache):
+    def __init__(self, path: str, max_entries: int = 100000):
+        """
+        LRU cache of completions in a SQLite file, shared across restarts and processes.
+
+        Args:
+            path (str): Path of the SQLite database file.
+            max_entries (int): Number of completions kept on disk.
+        """
+        super().__init__(max_entries)
+        self.path = Path(path)
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS generations ("
+                " key TEXT PRIMARY KEY, text TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS generations_last_used ON generations (last_used)")
+            self._conn = conn
+        return self._conn
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+
+    def _get(self, key):
+        conn = self._connect()
+        row = conn.execute("SELECT text FROM generations WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE generations SET last_used = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        return row[0]
+
+    def _put(self, key, text) -> int:
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO generations (key, text, last_used) VALUES (?, ?, ?)",
+            (key, text, time.time()),
+        )
+        excess = max(0, len(self) - self.max_entries)
+        if excess:
+            conn.execute(
+                "DELETE FROM generations WHERE rowid IN"
+                " (SELECT rowid FROM generations ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        conn.commit()
+        return excess
+
+
+def create_generation_cache(backend: str, path: str = None, max_entries: int = 1024):
+    """
+    Creates the completion cache for a backend name.
+
+    Args:
+        backend (str): "memory", "sqlite", or "none" to disable caching.
+        path (str, optional): Database file of the "sqlite" backend.
+        max_entries (int): Number of completions kept.
+
+    Returns:
+        GenerationCache: The cache, or None when disabled.
+    """
+    if backend == "none" or max_entries <= 0:
+        return None
+    if backend == "memory":
+        return InMemoryGenerationCache(max_entries)
+    if backend == "sqlite":
+        return SQLiteGenerationCache(path, max_entries)
+    raise ValueError(f"Unknown generation cache backend '{backend}'.")
+
+
+generation_cache = create_generation_cache(
+    config.GENERATION_CACHE_BACKEND,
+    config.GENERATION_CACHE_PATH,
+    config.GENERATION_CACHE_MAX_ENTRIES,
+)
@@ -1,14 +1,19 @@
 from transformers import AutoModelForCausalLM, AutoTokenizer,  BitsAndBytesConfig
+import copy
 import os
 from urllib.request import urlretrieve
 import logging
+import threading
 from typing import Literal
-from transformers import pipeline
+import torch
+from transformers import pipeline, set_seed, DynamicCache, TextIteratorStreamer
 from langchain_community.llms import HuggingFacePipeline
 from langchain_huggingface import HuggingFaceEmbeddings
 
 
 class LanguageModel():
+    backend = "transformers"
+
     def __init__(self, 
                  model_name, 
                  generation_config = {}):
@@ -23,6 +28,19 @@ class LanguageModel():
         self.llm = None
         self.tokenizer = None
         self.hg_pipeline = None
+
+        # Prompts starting with one of these prefixes reuse its cached keys and values
+        self.prompt_prefixes = list(self.generation_config.get("prompt_prefixes", []))
+        self._prefix_caches = {}  # prefix -> (token ids, DynamicCache)
+        self._prefix_lock = threading.Lock()
+        self._prefix_stats = {"hits": 0, "tokens_reused": 0}
+
+        # Optional small draft model proposing tokens for this model to verify
+        self.assistant_model_name = self.generation_config.get("assistant_model")
+        self.assistant = None
+        self._assisted = threading.local()  # forward counts of the running assisted generation
+        self._assisted_stats = {"generations": 0, "rounds": 0, "proposed": 0, "accepted": 0, "new_tokens": 0}
+        self._assisted_lock = threading.Lock()
     
     def load_language_model(self,
                             quantization: Literal["8bit", "4bit"]
@@ -35,8 +53,11 @@ class LanguageModel():
         else :
             quantization_config = None
        
-        # Load tokenizer
+        # Load tokenizer, padding on the left so batched prompts end right before generation
         tokenizer = AutoTokenizer.from_pretrained(self.model_name, cache_dir=self.model_path)
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
 
         # Load model with quantization
         model = AutoModelForCausalLM.from_pretrained(
@@ -47,9 +68,33 @@ class LanguageModel():
         )
         self.llm = model
         self.tokenizer = tokenizer
+        if self.assistant_model_name:
+            self.load_assistant_model()
+
+    def load_assistant_model(self):
+        """
+        Loads the draft model used for assisted (speculative) generation.
+
+        The draft model must use the same tokenizer as the main model, e.g. a
+        smaller model of the same family; otherwise it is not used.
+        """
+        name = self.assistant_model_name
+        cache_dir = os.path.join(self.cache_path, name.replace("/", "_"))
+        if AutoTokenizer.from_pretrained(name, cache_dir=cache_dir).get_vocab() != self.tokenizer.get_vocab():
+            logging.warning(f"Draft model '{name}' does not share the tokenizer of '{self.model_name}'; not using it.")
+            return
+        assistant = AutoModelForCausalLM.from_pretrained(name, cache_dir=cache_dir, torch_dtype="auto").to(self.llm.device)
+        if "num_assistant_tokens" in self.generation_config:
+            assistant.generation_config.num_assistant_tokens = self.generation_config["num_assistant_tokens"]
+        # Each main model forward pass verifies one round of draft tokens, and
+        # each draft model forward pass proposes one token
+        self.llm.register_forward_hook(lambda *args: self._count_forward("rounds"))
+        assistant.register_forward_hook(lambda *args: self._count_forward("proposed"))
+        self.assistant = assistant
     
     def load_hg_pipeline(self):
         if self.llm and self.tokenizer:
+            batch_size = self.generation_config.get("batch_size", 1)
             pipe = pipeline(
                 "text-generation",
                 model=self.llm,
@@ -57,13 +102,187 @@ class LanguageModel():
                 max_new_tokens=self.generation_config.get("max_new_tokens", 512),
                 temperature=self.generation_config.get("temperature", 0.8),
                 do_sample=self.generation_config.get("do_sample", True),
-                return_full_text=self.generation_config.get("return_full_text", False)
+                return_full_text=self.generation_config.get("return_full_text", False),
+                batch_size=batch_size,
             )
-            self.hg_pipeline = HuggingFacePipeline(pipeline=pipe)
+            self.hg_pipeline = HuggingFacePipeline(pipeline=pipe, batch_size=batch_size)
         else:
             logging.error("Model and tokenizer not loaded. Cannot create pipeline.")
             return None
     
+    def memory_footprint(self) -> int:
+        """Memory used by the model weights, draft model included, in bytes."""
+        if not self.llm:
+            return 0
+        return self.llm.get_memory_footprint() + (self.assistant.get_memory_footprint() if self.assistant else 0)
+
+    def count_tokens(self, texts: list) -> list:
+        """Counts the tokens of several texts with the model's tokenizer."""
+        if not texts:
+            return []
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def context_length(self):
+        """Maximum prompt plus completion tokens, or None if the model does not say."""
+        return getattr(self.llm.config, "max_position_embeddings", None) if self.llm else None
+
+    def max_new_tokens(self) -> int:
+        return self.generation_config.get("max_new_tokens", 512)
+
+    def decoding_kwargs(self, decoding: Literal["sample", "greedy"] = "sample") -> dict:
+        """
+        Returns the generation arguments for a decoding mode.
+
+        "sample" uses the configured temperature; "greedy" always picks the most
+        likely token, so the same prompt gives the same completion.
+        """
+        kwargs = {"max_new_tokens": self.max_new_tokens()}
+        if decoding == "greedy":
+            # Neutral sampling values keep transformers from warning about unused settings
+            kwargs.update(do_sample=False, temperature=1.0, top_p=1.0)
+        elif decoding == "sample":
+            kwargs.update(
+                do_sample=self.generation_config.get("do_sample", True),
+                temperature=self.generation_config.get("temperature", 0.8),
+            )
+        else:
+            raise ValueError(f"Unknown decoding mode '{decoding}'.")
+        return kwargs
+
+    def _match_prefix(self, prompts):
+        """Returns the configured prefix all prompts start with, or None."""
+        for prefix in self.prompt_prefixes:
+            if all(prompt.startswith(prefix) and len(prompt) > len(prefix) for prompt in prompts):
+                return prefix
+        return None
+
+    def prefix_cache(self, prefix: str):
+        """
+        Returns the token ids and key/value cache of a prompt prefix, computed on first use.
+
+        The last token of the prefix can merge with the text after it (e.g. a
+        trailing blank line), so it is left out of the cache.
+        The returned cache is shared and must not be modified; generation works on a copy.
+        """
+        with self._prefix_lock:
+            if prefix in self._prefix_caches:
+                return self._prefix_caches[prefix]
+        ids = self.tokenizer(prefix, return_tensors="pt").input_ids[:, :-1].to(self.llm.device)
+        with torch.no_grad():
+            cache = self.llm(input_ids=ids, use_cache=True).past_key_values
+        if isinstance(cache, tuple):
+            # Models without cache classes (e.g. GPT-2) return the legacy tuple layout
+            cache = DynamicCache.from_legacy_cache(cache)
+        with self._prefix_lock:
+            return self._prefix_caches.setdefault(prefix, (ids[0].tolist(), cache))
+
+    def _prefixed_inputs(self, prompts, prefix):
+        """
+        Builds `generate` inputs that start from the cached prefix.
+
+        Prompts are tokenized whole, so the model sees the same tokens as without
+        the cache. Shorter prompts are padded between the prefix and their own
+        tokens, so every row of the batch shares the same cached prefix.
+
+        Returns:
+            dict: The inputs, or None if a prompt's tokens do not start with the cached ones.
+        """
+        prefix_ids, cache = self.prefix_cache(prefix)
+        size = len(prefix_ids)
+        encoded = self.tokenizer(prompts).input_ids
+        if any(ids[:size] != prefix_ids or len(ids) == size for ids in encoded):
+            return None
+        suffixes = [ids[size:] for ids in encoded]
+        width = max(len(suffix) for suffix in suffixes)
+        pad = self.tokenizer.pad_token_id
+        input_ids = [prefix_ids + [pad] * (width - len(suffix)) + suffix for suffix in suffixes]
+        attention_mask = [[1] * len(prefix_ids) + [0] * (width - len(suffix)) + [1] * len(suffix) for suffix in suffixes]
+
+        past_key_values = copy.deepcopy(cache)
+        if len(prompts) > 1:
+            past_key_values.batch_repeat_interleave(len(prompts))
+        if not getattr(self.llm, "_supports_cache_class", True):
+            past_key_values = past_key_values.to_legacy_cache()
+        with self._prefix_lock:
+            self._prefix_stats["hits"] += len(prompts)
+            self._prefix_stats["tokens_reused"] += len(prefix_ids) * len(prompts)
+        return {
+            "input_ids": torch.tensor(input_ids, device=self.llm.device),
+            "attention_mask": torch.tensor(attention_mask, device=self.llm.device),
+            "past_key_values": past_key_values,
+        }
+
+    def _use_assistant(self, batch_size: int) -> bool:
+        # transformers only runs assisted generation for a single sequence
+        return self.assistant is not None and batch_size == 1
+
+    def _count_forward(self, key):
+        counts = getattr(self._assisted, "counts", None)
+        if counts is not None:
+            counts[key] += 1
+
+    def _run_generate(self, inputs, decoding="sample", streamer=None):
+        """
+        Runs `generate` on prepared inputs and returns the output ids.
+
+        A single prompt is generated with the draft model when one is loaded;
+        the number of draft tokens it accepted is added to `assisted_stats`.
+        """
+        kwargs = dict(pad_token_id=self.tokenizer.pad_token_id, **self.decoding_kwargs(decoding))
+        if streamer is not None:
+            kwargs["streamer"] = streamer
+        assisted = self._use_assistant(inputs["input_ids"].shape[0])
+        if assisted:
+            kwargs["assistant_model"] = self.assistant
+            self._assisted.counts = {"rounds": 0, "proposed": 0}
+        try:
+            with torch.no_grad():
+                output = self.llm.generate(**inputs, **kwargs)
+        finally:
+            counts, self._assisted.counts = getattr(self._assisted, "counts", None), None
+        if assisted:
+            new_tokens = output.shape[1] - inputs["input_ids"].shape[1]
+            with self._assisted_lock:
+                self._assisted_stats["generations"] += 1
+                self._assisted_stats["rounds"] += counts["rounds"]
+                self._assisted_stats["proposed"] += counts["proposed"]
+                # Every round adds the main model's own next token after the accepted draft tokens
+                self._assisted_stats["accepted"] += max(0, new_tokens - counts["rounds"])
+                self._assisted_stats["new_tokens"] += new_tokens
+        return output
+
+    def _generate(self, prompts, prefix=None, decoding="sample"):
+        """Generates completions with `generate` directly, starting from a cached prefix if given."""
+        inputs = self._prefixed_inputs(prompts, prefix) if prefix else None
+        if inputs is None:
+            inputs = dict(self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.llm.device))
+        output = self._run_generate(inputs, decoding)
+        return self.tokenizer.batch_decode(output[:, inputs["input_ids"].shape[1]:], skip_special_tokens=True)
+
+    def assisted_stats(self) -> dict:
+        """
+        Returns draft model statistics, or None without a draft model.
+
+        `acceptance_rate` is the share of proposed draft tokens the main model
+        kept, and `tokens_per_round` the tokens generated per main model pass;
+        assisted generation pays off when the latter is well above 1.
+        """
+        if self.assistant is None:
+            return None
+        with self._assisted_lock:
+            stats = dict(self._assisted_stats)
+        return {
+            "assistant_model": self.assistant_model_name,
+            **stats,
+            "acceptance_rate": round(stats["accepted"] / stats["proposed"], 3) if stats["proposed"] else None,
+            "tokens_per_round": round(stats["new_tokens"] / stats["rounds"], 2) if stats["rounds"] else None,
+        }
+
+    def prefix_cache_stats(self) -> dict:
+        """Returns the cached prefixes and how many prompts and prefix tokens reused them."""
+        with self._prefix_lock:
+            return {"prefixes": len(self._prefix_caches), **self._prefix_stats}
+
     def inference(self, prompt):
         if self.hg_pipeline:
             response = self.hg_pipeline.invoke(prompt)
@@ -71,8 +290,81 @@ class LanguageModel():
         else:
             logging.info("Model and tokenizer not loaded. Cannot create pipeline.")
             return None
-            
-         
-    
 
+    def batch_inference(self, prompts, decoding: Literal["sample", "greedy"] = "sample", seed: int = None):
+        """
+        Generates completions for several prompts in padded batches.
+
+        When all prompts start with one of `prompt_prefixes`, generation starts
+        from the prefix's cached keys and values and only prefills the rest.
+        With a draft model, single prompts use assisted generation.
 
+        Args:
+            prompts (list): Prompts to complete.
+            decoding (str): "sample" or "greedy", see `decoding_kwargs`.
+            seed (int, optional): Seeds sampling so the same prompt gives the same
+                completion. Seeded prompts are generated one at a time, so a result
+                does not depend on the other prompts it was submitted with.
+
+        Returns:
+            list: One completion per prompt, in order.
+        """
+        if self.hg_pipeline:
+            pipeline_kwargs = self.decoding_kwargs(decoding)
+            prefix = self._match_prefix(prompts)
+            if seed is not None and pipeline_kwargs["do_sample"]:
+                completions = []
+                for prompt in prompts:
+                    set_seed(seed)
+                    if prefix or self.assistant is not None:
+                        completions.extend(self._generate([prompt], prefix, decoding))
+                    else:
+                        completions.append(self.hg_pipeline.invoke(prompt, pipeline_kwargs=pipeline_kwargs))
+                return completions
+            if prefix or self._use_assistant(len(prompts)):
+                return self._generate(prompts, prefix, decoding)
+            return self.hg_pipeline.batch(prompts, pipeline_kwargs=pipeline_kwargs)
+        else:
+            logging.info("Model and tokenizer not loaded. Cannot create pipeline.")
+            return [None] * len(prompts)
+
+    def stream(self, prompt, launch=None, decoding: Literal["sample", "greedy"] = "sample", seed: int = None):
+        """
+        Starts generating a completion and returns an iterator over the new text.
+
+        Args:
+            prompt (str): Prompt to complete.
+            launch (callable, optional): Function `(fn)` that runs the blocking
+                generation call in the background, e.g. a worker pool's submit.
+                Defaults to a new daemon thread.
+            decoding (str): "sample" or "greedy", see `decoding_kwargs`.
+            seed (int, optional): Seeds sampling before generation starts.
+
+        Returns:
+            TextIteratorStreamer: Yields decoded text pieces as tokens are generated.
+        """
+        if not (self.llm and self.tokenizer):
+            raise RuntimeError("Model and tokenizer not loaded. Cannot stream.")
+
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        prefix = self._match_prefix([prompt])
+
+        def run():
+            try:
+                inputs = self._prefixed_inputs([prompt], prefix) if prefix else None
+                if inputs is None:
+                    inputs = dict(self.tokenizer(prompt, return_tensors="pt").to(self.llm.device))
+                if seed is not None:
+                    set_seed(seed)
+                self._run_generate(inputs, decoding, streamer=streamer)
+            except Exception as e:
+                logging.error(f"Streaming generation failed: {e}")
+                # Unblock the consumer, which would otherwise wait forever.
+                streamer.end()
+                raise
+
+        if launch is None:
+            threading.Thread(target=run, daemon=True).start()
+        else:
+            launch(run)
+        return streamer
@@ -0,0 +1,211 @@
+import logging
+import os
+import queue
+import random
+import threading
+from typing import Literal
+
+
+def available_cpus() -> int:
+    """Number of CPUs this process may run on, which respects container CPU pinning."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class TextQueueStreamer:
+    """Iterator over text pieces pushed by a generation running in another thread."""
+
+    _END = object()
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, text: str):
+        self._queue.put(text)
+
+    def end(self):
+        self._queue.put(self._END)
+
+    def __iter__(self):
+        while True:
+            text = self._queue.get()
+            if text is self._END:
+                return
+            yield text
+
+
+class LlamaCppModel():
+    backend = "llama_cpp"
+
+    def __init__(self,
+                 model_name,
+                 model_path: str = None,
+                 repo_id: str = None,
+                 filename: str = None,
+                 n_ctx: int = 4096,
+                 n_threads: int = None,
+                 n_threads_batch: int = None,
+                 n_batch: int = 512,
+                 n_gpu_layers: int = 0,
+                 generation_config = {}):
+        """
+        Runs a GGUF model with llama.cpp, for quantized generation on the CPU.
+
+        It offers the same generation methods as `LanguageModel`. llama.cpp
+        generates one sequence at a time, so batches are generated in turn.
+
+        Args:
+            model_name (str): Name the model is served under.
+            model_path (str, optional): Local GGUF file.
+            repo_id (str, optional): Hugging Face repository to download the GGUF file from.
+            filename (str, optional): GGUF file name or glob in `repo_id`, e.g. "*Q4_K_M.gguf".
+            n_ctx (int): Context length in tokens, prompt included.
+            n_threads (int, optional): Threads generating tokens. Defaults to the available CPUs.
+            n_threads_batch (int, optional): Threads evaluating the prompt. Defaults to `n_threads`.
+            n_batch (int): Prompt tokens evaluated per step.
+            n_gpu_layers (int): Layers offloaded to a GPU, if llama.cpp was built with one.
+            generation_config (dict): max_new_tokens, temperature and do_sample defaults.
+        """
+        if not model_path and not (repo_id and filename):
+            raise ValueError(f"Model '{model_name}' needs a GGUF model_path, or a repo_id and filename.")
+        self.model_name = model_name
+        self.model_path = model_path
+        self.repo_id = repo_id
+        self.filename = filename
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads or available_cpus()
+        self.n_threads_batch = n_threads_batch or self.n_threads
+        self.n_batch = n_batch
+        self.n_gpu_layers = n_gpu_layers
+        self.generation_config = generation_config or {}
+
+        self.cache_path = os.path.join(os.path.dirname(__file__), "../../models")
+        self.llm = None
+        # A llama.cpp context runs one generation at a time
+        self._lock = threading.Lock()
+
+    def load_language_model(self):
+        try:
+            from llama_cpp import Llama
+        except ImportError as e:
+            raise ImportError("The llama_cpp backend needs llama-cpp-python.") from e
+
+        kwargs = dict(
+            n_ctx=self.n_ctx,
+            n_threads=self.n_threads,
+            n_threads_batch=self.n_threads_batch,
+            n_batch=self.n_batch,
+            n_gpu_layers=self.n_gpu_layers,
+            verbose=False,
+        )
+        if self.model_path:
+            self.llm = Llama(model_path=self.model_path, **kwargs)
+        else:
+            self.llm = Llama.from_pretrained(
+                repo_id=self.repo_id, filename=self.filename, cache_dir=self.cache_path, **kwargs
+            )
+            self.model_path = self.llm.model_path
+        logging.info(
+            f"Loaded GGUF model '{self.model_name}' from {self.model_path} "
+            f"({self.n_threads} threads, {self.n_threads_batch} for prompts)."
+        )
+
+    def memory_footprint(self) -> int:
+        """Size of the GGUF weights, which llama.cpp maps into memory."""
+        return os.path.getsize(self.model_path) if self.llm else 0
+
+    def count_tokens(self, texts: list) -> list:
+        """Counts the tokens of several texts with the GGUF model's tokenizer."""
+        return [len(self.llm.tokenize(text.encode("utf-8"), add_bos=False, special=False)) for text in texts]
+
+    def context_length(self):
+        return self.n_ctx
+
+    def max_new_tokens(self) -> int:
+        return self.generation_config.get("max_new_tokens", 512)
+
+    def decoding_kwargs(self, decoding: Literal["sample", "greedy"] = "sample") -> dict:
+        """
+        Returns the completion arguments for a decoding mode; see `LanguageModel.decoding_kwargs`.
+        """
+        kwargs = {"max_tokens": self.max_new_tokens()}
+        if decoding == "greedy":
+            # llama.cpp picks the most likely token when the temperature is 0
+            kwargs.update(temperature=0.0)
+        elif decoding == "sample":
+            do_sample = self.generation_config.get("do_sample", True)
+            kwargs.update(temperature=self.generation_config.get("temperature", 0.8) if do_sample else 0.0)
+        else:
+            raise ValueError(f"Unknown decoding mode '{decoding}'.")
+        return kwargs
+
+    def _completion_kwargs(self, decoding, seed):
+        kwargs = self.decoding_kwargs(decoding)
+        if kwargs["temperature"] > 0:
+            # llama.cpp keeps the last seed it was given, so unseeded requests draw a fresh one
+            kwargs["seed"] = seed if seed is not None else random.getrandbits(31)
+        return kwargs
+
+    def inference(self, prompt):
+        return self.batch_inference([prompt])[0]
+
+    def batch_inference(self, prompts, decoding: Literal["sample", "greedy"] = "sample", seed: int = None):
+        """
+        Generates completions for several prompts, one after the other.
+
+        Args:
+            prompts (list): Prompts to complete.
+            decoding (str): "sample" or "greedy".
+            seed (int, optional): Seeds sampling of each prompt.
+
+        Returns:
+            list: One completion per prompt, in order.
+        """
+        if not self.llm:
+            logging.info("GGUF model not loaded. Cannot generate.")
+            return [None] * len(prompts)
+        completions = []
+        with self._lock:
+            for prompt in prompts:
+                response = self.llm.create_completion(prompt, **self._completion_kwargs(decoding, seed))
+                completions.append(response["choices"][0]["text"])
+        return completions
+
+    def stream(self, prompt, launch=None, decoding: Literal["sample", "greedy"] = "sample", seed: int = None):
+        """
+        Starts generating a completion and returns an iterator over the new text.
+
+        Args:
+            prompt (str): Prompt to complete.
+            launch (callable, optional): Function `(fn)` that runs the blocking
+                generation call in the background. Defaults to a new daemon thread.
+            decoding (str): "sample" or "greedy".
+            seed (int, optional): Seeds sampling.
+
+        Returns:
+            TextQueueStreamer: Yields text pieces as tokens are generated.
+        """
+        if not self.llm:
+            raise RuntimeError("GGUF model not loaded. Cannot stream.")
+
+        streamer = TextQueueStreamer()
+        kwargs = self._completion_kwargs(decoding, seed)
+
+        def run():
+            try:
+                with self._lock:
+                    for chunk in self.llm.create_completion(prompt, stream=True, **kwargs):
+                        streamer.put(chunk["choices"][0]["text"])
+            except Exception as e:
+                logging.error(f"Streaming generation failed: {e}")
+                raise
+            finally:
+                streamer.end()
+
+        if launch is None:
+            threading.Thread(target=run, daemon=True).start()
+        else:
+            launch(run)
+        return streamer
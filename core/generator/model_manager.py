@@ -0,0 +1,264 @@
+import gc
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from core import config
+from core.generator.backends import load_language_model
+
+
+class ModelNotAllowedError(ValueError):
+    """Raised when a client requests a language model that is not in the allowlist."""
+
+
+def estimate_language_model_bytes(model) -> int:
+    """Returns the memory footprint of a loaded language model, or 0 if unknown."""
+    try:
+        return int(model.memory_footprint())
+    except Exception:
+        return 0
+
+
+class ModelManager:
+    def __init__(self,
+                 allowed_models: list,
+                 max_models: int = 1,
+                 memory_budget_bytes: int = None,
+                 loader=load_language_model):
+        """
+        Loads, shares and unloads the language models served by the API.
+
+        Only models in `allowed_models` can be loaded. Loading is single-flight:
+        concurrent first requests for a model wait for one load. Before a model
+        is loaded, and after, the least recently used idle models are unloaded
+        until at most `max_models` remain and their combined footprint fits in
+        `memory_budget_bytes`. Models leased by running requests are never unloaded.
+
+        Args:
+            allowed_models (list): Names of the models that may be loaded; "*" allows any.
+            max_models (int): Maximum number of models kept loaded.
+            memory_budget_bytes (int, optional): Upper bound for the combined model footprint.
+            loader (callable): Function `(model_name) -> model` used to load models.
+        """
+        self.allowed_models = list(allowed_models)
+        self.max_models = max_models
+        self.memory_budget_bytes = memory_budget_bytes
+        self.loader = loader
+
+        self._lock = threading.Lock()
+        self._models = OrderedDict()  # name -> {"model", "size", "leases", "loaded_at"}, in LRU order
+        self._loading = {}  # name -> Future resolved when the load finishes
+        self._sizes = {}  # name -> footprint measured at its last load, to make room before reloading
+        self._states = {}  # name -> "loading", "loaded", "unloaded" or "failed"
+        self._errors = {}  # name -> last load error
+        self._evict_callbacks = []
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "load_errors": 0, "load_seconds": {}}
+
+    def is_allowed(self, model_name: str) -> bool:
+        return "*" in self.allowed_models or model_name in self.allowed_models
+
+    def check_allowed(self, model_name: str):
+        """
+        Raises:
+            ModelNotAllowedError: If the model is not in the allowlist.
+        """
+        if not self.is_allowed(model_name):
+            raise ModelNotAllowedError(
+                f"Model '{model_name}' is not served here. Available models: {', '.join(self.allowed_models)}."
+            )
+
+    def on_evict(self, callback):
+        """Registers `callback(model_name)`, called after a model is unloaded."""
+        self._evict_callbacks.append(callback)
+
+    def get(self, model_name: str):
+        """
+        Returns a loaded model, loading it on first use.
+
+        The model may be unloaded once it is idle; hold a `lease` while using it.
+
+        Raises:
+            ModelNotAllowedError: If the model is not in the allowlist.
+        """
+        return self._get(model_name, lease=False)
+
+    def acquire(self, model_name: str):
+        """Returns a loaded model and leases it until `release` is called."""
+        return self._get(model_name, lease=True)
+
+    def release(self, model_name: str):
+        with self._lock:
+            entry = self._models.get(model_name)
+            if entry is not None and entry["leases"] > 0:
+                entry["leases"] -= 1
+
+    @contextmanager
+    def lease(self, model_name: str):
+        """Context manager keeping a model loaded while it is used."""
+        model = self.acquire(model_name)
+        try:
+            yield model
+        finally:
+            self.release(model_name)
+
+    def _get(self, model_name: str, lease: bool):
+        self.check_allowed(model_name)
+        while True:
+            with self._lock:
+                entry = self._models.get(model_name)
+                if entry is not None:
+                    self._models.move_to_end(model_name)
+                    entry["leases"] += int(lease)
+                    self._stats["hits"] += 1
+                    return entry["model"]
+                future = self._loading.get(model_name)
+                owner = future is None
+                if owner:
+                    self._stats["misses"] += 1
+                    future = Future()
+                    self._loading[model_name] = future
+                    self._states[model_name] = "loading"
+                    # Free memory for the incoming model before loading it.
+                    victims = self._victims(model_name, incoming=True)
+            if not owner:
+                # Waits for the load in progress; it may have been unloaded again since.
+                future.result()
+                continue
+            self._unload(victims)
+            return self._load(model_name, future, lease)
+
+    def _load(self, model_name: str, future: Future, lease: bool):
+        start = time.perf_counter()
+        try:
+            model = self.loader(model_name)
+        except BaseException as e:
+            with self._lock:
+                self._stats["load_errors"] += 1
+                self._states[model_name] = "failed"
+                self._errors[model_name] = str(e)
+                del self._loading[model_name]
+            future.set_exception(e)
+            raise
+        elapsed = time.perf_counter() - start
+        size = estimate_language_model_bytes(model)
+        logging.info(f"Loaded language model '{model_name}' ({size / 2**30:.1f} GiB) in {elapsed:.1f}s.")
+
+        with self._lock:
+            self._models[model_name] = {"model": model, "size": size, "leases": int(lease), "loaded_at": time.time()}
+            self._sizes[model_name] = size
+            self._states[model_name] = "loaded"
+            self._errors.pop(model_name, None)
+            self._stats["load_seconds"][model_name] = round(elapsed, 3)
+            del self._loading[model_name]
+            victims = self._victims(model_name)
+            if self._over_limit() and not victims:
+                logging.warning("Language models exceed the configured limits; every other model is in use.")
+        self._unload(victims)
+        future.set_result(model)
+        return model
+
+    def _over_limit(self, extra_models: int = 0, extra_bytes: int = 0) -> bool:
+        if len(self._models) + extra_models > self.max_models:
+            return True
+        if self.memory_budget_bytes:
+            used = sum(entry["size"] for entry in self._models.values())
+            return used + extra_bytes > self.memory_budget_bytes
+        return False
+
+    def _victims(self, keep: str, incoming: bool = False) -> list:
+        """
+        Removes least recently used idle models until the limits are met, counting
+        `keep` as incoming when it is about to be loaded. Caller holds the lock.
+
+        Returns:
+            list: (name, entry) pairs of the removed models.
+        """
+        extra = (1, self._sizes.get(keep, 0)) if incoming else (0, 0)
+        victims = []
+        while self._over_limit(*extra):
+            idle = [name for name, entry in self._models.items() if name != keep and entry["leases"] == 0]
+            if not idle:
+                break
+            victims.append((idle[0], self._models.pop(idle[0])))
+            self._states[idle[0]] = "unloaded"
+            self._stats["evictions"] += 1
+        return victims
+
+    def _unload(self, victims: list):
+        """Releases the memory of removed models. Called without the lock held."""
+        if not victims:
+            return
+        for name, entry in victims:
+            for callback in self._evict_callbacks:
+                try:
+                    callback(name)
+                except Exception as e:
+                    logging.error(f"Evict callback failed for '{name}': {e}")
+            entry.clear()
+            logging.info(f"Unloaded language model '{name}'.")
+        victims.clear()
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def unload(self, model_name: str) -> bool:
+        """Unloads a model if it is loaded and idle. Returns True if it was unloaded."""
+        with self._lock:
+            entry = self._models.get(model_name)
+            if entry is None or entry["leases"] > 0:
+                return False
+            victims = [(model_name, self._models.pop(model_name))]
+            self._states[model_name] = "unloaded"
+        self._unload(victims)
+        return True
+
+    def preload(self, model_names: list):
+        """Loads the given models ahead of the first request."""
+        for model_name in model_names:
+            try:
+                self.get(model_name)
+            except Exception as e:
+                logging.error(f"Failed to preload language model '{model_name}': {e}")
+
+    def stats(self) -> dict:
+        """Returns the allowlist, limits and per-model load state, size and usage."""
+        with self._lock:
+            models = []
+            for name in dict.fromkeys([*self.allowed_models, *self._states]):
+                if name == "*":
+                    continue
+                entry = self._models.get(name)
+                model = entry["model"] if entry else None
+                models.append({
+                    "model_name": name,
+                    "state": self._states.get(name, "not loaded"),
+                    "backend": getattr(model, "backend", None),
+                    "prefix_cache": model.prefix_cache_stats() if hasattr(model, "prefix_cache_stats") else None,
+                    "assisted": model.assisted_stats() if hasattr(model, "assisted_stats") else None,
+                    "size_mb": round(entry["size"] / 2**20, 1) if entry else None,
+                    "in_use": entry["leases"] if entry else 0,
+                    "load_seconds": self._stats["load_seconds"].get(name),
+                    "error": self._errors.get(name),
+                })
+            return {
+                "models": models,
+                "max_models": self.max_models,
+                "memory_budget_mb": round(self.memory_budget_bytes / 2**20, 1) if self.memory_budget_bytes else None,
+                "used_mb": round(sum(entry["size"] for entry in self._models.values()) / 2**20, 1),
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "evictions": self._stats["evictions"],
+                "load_errors": self._stats["load_errors"],
+            }
+
+
+model_manager = ModelManager(
+    allowed_models=config.GENERATION_MODELS,
+    max_models=config.GENERATION_MAX_MODELS,
+    memory_budget_bytes=int(config.GENERATION_MEMORY_BUDGET_MB * 2**20) or None,
+)
@@ -0,0 +1,27 @@
+import textwrap
+
+
+# Expand query with synonyms or additional keywords
+def expand_query(query: str) -> str:
+    """Modify query for better retrieval."""
+    if "Rubin" in query:
+        query += " LSST Large Synoptic Survey Telescope"
+    return query
+
+# Fixed start of every generation prompt. Language models cache its keys and
+# values once (see `LanguageModel.prefix_cache`), so only the rest is prefilled.
+PROMPT_PREFIX = textwrap.dedent("""
+    You are an astrophysics expert with a focus on the Rubin telescope project 
+    (formerly known as Large Synoptic Survey Telescope - LSST). Please answer the 
+    question on astrophysics based on the following context:
+
+    """)
+
+# Prompt template for generation
+def format_prompt(context: str, question: str) -> str:
+    """Format the retrieval context into the final prompt, starting with `PROMPT_PREFIX`."""
+    return f"{PROMPT_PREFIX}{context}\n\nQuestion: {question}\n"
+
+def build_context(docs: list) -> str:
+    """Join retrieved documents into the context passed to `format_prompt`."""
+    return "\n\n".join(doc.page_content for doc in docs)
@@ -0,0 +1,77 @@
+"""
+Build or incrementally update a Qdrant collection from a folder of PDFs.
+
+Re-running the command only embeds new or changed files and removes the
+vectors of deleted ones.
+
+Example:
+    python -m core.ingestion data/raw/Rubin --qdrant-path data/vector_stores/rubin_qdrant \
+        --collection rubin_telescope --embedding-model sentence-transformers/all-MiniLM-L12-v2
+"""
+import argparse
+import logging
+
+from core import config
+from core.ingestion.pipeline import IngestionPipeline
+from core.retriever.collection_options import QUANTIZATION_TYPES, CollectionOptions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.ingestion", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf_folder", help="Folder searched recursively for PDF files.")
+    parser.add_argument("--collection", required=True, help="Name of the Qdrant collection.")
+    parser.add_argument("--qdrant-path", help="Embedded Qdrant storage path.")
+    parser.add_argument("--qdrant-url", default=config.QDRANT_URL, help="Qdrant server URL (overrides --qdrant-path).")
+    parser.add_argument("--embedding-model", default=config.EMBEDDING_MODEL_NAME, help="Embedding model name.")
+    parser.add_argument("--chunk-size", type=int, help="Chunk length in tokens, 0 for whole pages (default: CHUNK_SIZE_TOKENS).")
+    parser.add_argument("--chunk-overlap", type=int, help="Token overlap between chunks (default: CHUNK_OVERLAP_TOKENS).")
+    parser.add_argument("--workers", type=int, help="PDF parsing processes (default: CPU count).")
+    parser.add_argument("--embed-batch-size", type=int, default=64, help="Pages encoded per embedding call.")
+    parser.add_argument("--upsert-batch-size", type=int, default=256, help="Pages buffered per write.")
+    parser.add_argument("--manifest", help="Fingerprint manifest path (default: next to the storage).")
+    parser.add_argument("--full", action="store_true", help="Drop the collection and re-index everything.")
+    storage = parser.add_argument_group("collection storage (Qdrant server only)")
+    # Settings that are not given keep their current value on an existing collection
+    storage.add_argument("--quantization", choices=QUANTIZATION_TYPES,
+                         help="Quantize vectors kept in RAM; 'none' turns quantization off.")
+    storage.add_argument("--on-disk-vectors", action=argparse.BooleanOptionalAction, default=None,
+                         help="Keep original vectors on disk (or in RAM with --no-on-disk-vectors).")
+    storage.add_argument("--on-disk-payload", action=argparse.BooleanOptionalAction, default=None,
+                         help="Keep payloads on disk (or in RAM with --no-on-disk-payload).")
+    storage.add_argument("--hnsw-m", type=int, help="Edges per HNSW node (server default: 16).")
+    storage.add_argument("--hnsw-ef-construct", type=int, help="HNSW build candidate list size (server default: 100).")
+    args = parser.parse_args(argv)
+
+    if not (args.qdrant_path or args.qdrant_url):
+        parser.error("one of --qdrant-path or --qdrant-url is required")
+
+    collection_options = None
+    storage_args = [args.quantization, args.on_disk_vectors, args.on_disk_payload, args.hnsw_m, args.hnsw_ef_construct]
+    if any(arg is not None for arg in storage_args):
+        collection_options = CollectionOptions(
+            quantization=args.quantization,
+            on_disk_vectors=args.on_disk_vectors,
+            on_disk_payload=args.on_disk_payload,
+            hnsw_m=args.hnsw_m,
+            hnsw_ef_construct=args.hnsw_ef_construct,
+        )
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    pipeline = IngestionPipeline(
+        collection_name=args.collection,
+        embedding_model=args.embedding_model,
+        qdrant_path=args.qdrant_path,
+        qdrant_url=args.qdrant_url,
+        manifest_path=args.manifest,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        workers=args.workers,
+        embed_batch_size=args.embed_batch_size,
+        upsert_batch_size=args.upsert_batch_size,
+        collection_options=collection_options,
+    )
+    pipeline.run(args.pdf_folder, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
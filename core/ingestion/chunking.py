@@ -0,0 +1,85 @@
+from langchain_core.documents import Document
+
+from core import config
+
+
+class TokenChunker:
+    def __init__(self, tokenizer, chunk_size: int = 256, chunk_overlap: int = 32):
+        """
+        Splits pages into overlapping chunks measured in tokens of the embedding model.
+
+        Splitting is recursive: paragraphs first, then lines, sentences and words,
+        so chunks end on natural boundaries where possible.
+
+        Args:
+            tokenizer: Hugging Face tokenizer of the embedding model.
+            chunk_size (int): Maximum chunk length in tokens.
+            chunk_overlap (int): Tokens shared by consecutive chunks of a page.
+        """
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        self.tokenizer = tokenizer
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.splitter = RecursiveCharacterTextSplitter(
+            length_function=lambda text: len(tokenizer.encode(text, add_special_tokens=False)),
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=["\n\n", "\n", ". ", " ", ""],
+        )
+
+    def token_lengths(self, texts: list) -> list:
+        """Counts the tokens of many texts in a single batched tokenizer call."""
+        if not texts:
+            return []
+        encoded = self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+    def split_documents(self, pages: list) -> list:
+        """
+        Splits pages into chunks, keeping the page metadata on every chunk.
+
+        Pages are tokenized together first; the ones that already fit in a
+        chunk are kept whole and only longer pages go through the splitter.
+
+        Args:
+            pages (list): LangChain Document objects.
+
+        Returns:
+            list: Chunk Documents with a `chunk` index added to the metadata.
+        """
+        chunks = []
+        for page, length in zip(pages, self.token_lengths([page.page_content for page in pages])):
+            if not page.page_content.strip():
+                continue
+            pieces = [page.page_content] if length <= self.chunk_size else self.splitter.split_text(page.page_content)
+            for index, text in enumerate(piece for piece in pieces if piece.strip()):
+                chunks.append(Document(page_content=text, metadata={**page.metadata, "chunk": index}))
+        return chunks
+
+
+def get_chunker(embedding, chunk_size: int = None, chunk_overlap: int = None):
+    """
+    Returns a chunker using the tokenizer of a loaded embedding model.
+
+    Args:
+        embedding (HuggingFaceEmbeddings): Loaded embedding model.
+        chunk_size (int, optional): Maximum chunk length in tokens. Defaults to
+            `CHUNK_SIZE_TOKENS`, and is capped at the model's max sequence length.
+        chunk_overlap (int, optional): Overlap in tokens. Defaults to `CHUNK_OVERLAP_TOKENS`.
+
+    Returns:
+        TokenChunker: The chunker, or None when chunking is disabled or the model
+            exposes no tokenizer.
+    """
+    chunk_size = config.CHUNK_SIZE_TOKENS if chunk_size is None else chunk_size
+    chunk_overlap = config.CHUNK_OVERLAP_TOKENS if chunk_overlap is None else chunk_overlap
+    model = getattr(embedding, "client", None)
+    tokenizer = getattr(model, "tokenizer", None)
+    if chunk_size <= 0 or tokenizer is None:
+        return None
+    # Leave room for the special tokens the model adds around every input.
+    max_seq_length = getattr(model, "max_seq_length", None)
+    if max_seq_length:
+        chunk_size = min(chunk_size, max_seq_length - 2)
+    return TokenChunker(tokenizer, chunk_size=chunk_size, chunk_overlap=min(chunk_overlap, chunk_size // 2))
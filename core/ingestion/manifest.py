@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+
+def sidecar_path(qdrant_path: str, collection_name: str, suffix: str) -> Path:
+    """
+    Returns the path of a file stored alongside a collection, e.g. its manifest.
+
+    Sidecars live in the embedded storage directory, or in `data/vector_stores`
+    for collections on a Qdrant server.
+    """
+    directory = Path(qdrant_path) if qdrant_path and qdrant_path != ":memory:" else Path("data/vector_stores")
+    return directory / f"{collection_name}{suffix}"
+
+
+def collection_version(qdrant_path: str, collection_name: str):
+    """
+    Returns a value that changes whenever ingestion updates a collection, namely
+    the modification time of its manifest, or None for collections without one.
+    """
+    try:
+        return os.path.getmtime(sidecar_path(qdrant_path, collection_name, ".manifest.json"))
+    except OSError:
+        return None
+
+
+def file_fingerprint(path: str, block_size: int = 1 << 20) -> str:
+    """Returns the SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, path: Path):
+        """
+        Sidecar record of what a collection was built from.
+
+        For every source file it stores the file fingerprint (size, mtime and
+        SHA-256) and the fingerprint and point id of each chunk written from it.
+        A file's entry is only updated after its chunks are in the collection,
+        so the manifest doubles as the checkpoint of an interrupted run.
+
+        Args:
+            path (Path): JSON file holding the manifest.
+        """
+        self.path = Path(path)
+        self.embedding_model = None
+        self.chunking = None  # [chunk size, chunk overlap] in tokens, or None for whole pages
+        self.lexical_index_synced = False  # False while a run has unsaved BM25 index changes
+        self.updated_at = None
+        self.files = {}  # source -> {"sha256", "size", "mtime", "chunks": [[chunk hash, point id], ...]}
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            self.embedding_model = data.get("embedding_model")
+            self.chunking = data.get("chunking")
+            self.lexical_index_synced = data.get("lexical_index_synced", False)
+            self.updated_at = data.get("updated_at")
+            self.files = data.get("files", {})
+
+    def is_unchanged(self, source: str, path: str = None) -> bool:
+        """
+        Checks whether a file still matches its recorded fingerprint.
+
+        Size and modification time are compared first; the file is only
+        hashed when they differ, e.g. after a copy that touched the mtime.
+
+        Args:
+            source (str): Key of the file in the manifest.
+            path (str, optional): Location of the file. Defaults to `source`.
+        """
+        path = path or source
+        record = self.files.get(source)
+        if record is None:
+            return False
+        stat = os.stat(path)
+        if record["size"] == stat.st_size and record["mtime"] == stat.st_mtime:
+            return True
+        if record["size"] == stat.st_size and record["sha256"] == file_fingerprint(path):
+            record["mtime"] = stat.st_mtime
+            return True
+        return False
+
+    @staticmethod
+    def describe(source: str, chunks: list) -> dict:
+        """Builds the manifest entry for a file and its (chunk hash, point id) pairs."""
+        stat = os.stat(source)
+        return {
+            "sha256": file_fingerprint(source),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunks": [list(chunk) for chunk in chunks],
+        }
+
+    def point_ids(self, source: str) -> list:
+        """Returns the point ids recorded for a file."""
+        return [point for _, point in self.files.get(source, {}).get("chunks", [])]
+
+    def save(self):
+        self.updated_at = time.time()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "embedding_model": self.embedding_model,
+            "chunking": self.chunking,
+            "lexical_index_synced": self.lexical_index_synced,
+            "updated_at": self.updated_at,
+            "files": self.files,
+        }))
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self.embedding_model = None
+        self.chunking = None
+        self.lexical_index_synced = False
+        self.files = {}
+        self.updated_at = None
+        self.path.unlink(missing_ok=True)
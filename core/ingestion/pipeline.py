@@ -0,0 +1,301 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+from tqdm import tqdm
+
+from core.embeddings.cache import content_hash
+from core.embeddings.registry import embedding_registry
+from core.ingestion.chunking import get_chunker
+from core.ingestion.manifest import Manifest, sidecar_path
+from core.retriever.bm25 import BM25Index
+from core.retriever.collection_options import CollectionOptions
+from core.retriever.payload import point_id, to_points
+from core.retriever.store_manager import store_manager
+
+
+def parse_pdf(path: str) -> list:
+    """
+    Extracts the pages of a PDF. Runs in a worker process.
+
+    Args:
+        path (str): Path of the PDF file.
+
+    Returns:
+        list: One LangChain Document per page.
+    """
+    from langchain_community.document_loaders import PyMuPDFLoader
+    return PyMuPDFLoader(path).load()
+
+
+def iter_parsed(paths: list, workers: int = None, max_pending: int = None):
+    """
+    Parses PDFs in a process pool and yields them as they finish.
+
+    At most `max_pending` files are parsed or waiting to be consumed at once,
+    so memory stays bounded no matter how many files there are.
+
+    Yields:
+        tuple: (path, list of page Documents)
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for path in paths:
+            pending[executor.submit(parse_pdf, str(path))] = path
+            if len(pending) >= max_pending:
+                break
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                next_path = next(paths, None)
+                if next_path is not None:
+                    pending[executor.submit(parse_pdf, str(next_path))] = next_path
+                try:
+                    yield path, future.result()
+                except Exception as e:
+                    logging.error(f"Failed to parse {path}: {e}")
+
+
+class IngestionPipeline:
+    def __init__(self,
+                 collection_name: str,
+                 embedding_model: str,
+                 qdrant_path: str = None,
+                 qdrant_url: str = None,
+                 manifest_path: str = None,
+                 chunk_size: int = None,
+                 chunk_overlap: int = None,
+                 workers: int = None,
+                 embed_batch_size: int = 64,
+                 upsert_batch_size: int = 256,
+                 collection_options: CollectionOptions = None):
+        """
+        Streams PDFs into a Qdrant collection: parse in parallel, embed in batches, bulk upsert.
+
+        Runs are incremental. Only new or changed files are parsed, only chunks
+        whose content changed are embedded, and vectors of removed files or
+        chunks are deleted.
+
+        Args:
+            collection_name (str): Target collection, created if missing.
+            embedding_model (str): Embedding model name.
+            qdrant_path (str, optional): Embedded Qdrant storage path.
+            qdrant_url (str, optional): Qdrant server URL, used instead of `qdrant_path`.
+            manifest_path (str, optional): Fingerprint manifest file. Defaults to
+                `<collection>.manifest.json` next to the storage.
+            chunk_size (int, optional): Maximum chunk length in tokens, 0 to embed whole
+                pages. Defaults to `CHUNK_SIZE_TOKENS`.
+            chunk_overlap (int, optional): Token overlap between chunks. Defaults to
+                `CHUNK_OVERLAP_TOKENS`.
+            workers (int, optional): Number of PDF parsing processes. Defaults to the CPU count.
+            embed_batch_size (int): Chunks encoded per embedding call.
+            upsert_batch_size (int): Chunks buffered before they are embedded and written.
+            collection_options (CollectionOptions, optional): Quantization, on-disk storage
+                and HNSW settings. Used when the collection is created, and applied to an
+                existing collection on a Qdrant server.
+        """
+        self.collection_name = collection_name
+        self.embedding_model = embedding_model
+        self.qdrant_path = qdrant_path
+        self.qdrant_url = qdrant_url
+        self.workers = workers
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.collection_options = collection_options
+
+        self.embedding = embedding_registry.get(embedding_model)
+        self.handle = store_manager.get_handle(qdrant_path, qdrant_url)
+        self.chunker = get_chunker(self.embedding, chunk_size, chunk_overlap)
+
+        self.manifest = Manifest(manifest_path or sidecar_path(qdrant_path, collection_name, ".manifest.json"))
+        # BM25 index over the same chunks, used by hybrid retrieval
+        self.lexical_index_path = sidecar_path(qdrant_path, collection_name, ".bm25.json.gz")
+        self.lexical_index = None
+
+    def ensure_collection(self):
+        client = self.handle.client
+        options = self.collection_options or CollectionOptions()
+        if self.collection_options is not None and self.handle.local:
+            logging.warning("Embedded Qdrant storage ignores quantization, on-disk and HNSW settings; "
+                            "use --qdrant-url to apply them.")
+        if not client.collection_exists(self.collection_name):
+            size = len(self.embedding.embed_query("dimension probe"))
+            client.create_collection(collection_name=self.collection_name, **options.create_kwargs(size))
+        elif self.collection_options is not None and not self.handle.local:
+            print(f"Applying {options} to existing collection '{self.collection_name}'.")
+            client.update_collection(collection_name=self.collection_name, **options.update_kwargs())
+
+    def split(self, pages: list) -> list:
+        """Turns the pages of one file into the chunks that get embedded."""
+        if self.chunker is None:
+            return [page for page in pages if page.page_content.strip()]
+        return self.chunker.split_documents(pages)
+
+    def load_lexical_index(self) -> BM25Index:
+        """
+        Loads the BM25 sidecar, or rebuilds it from the collection if it is
+        missing or an earlier run stopped before saving it.
+        """
+        if self.lexical_index_path.exists() and self.manifest.lexical_index_synced:
+            return BM25Index.load(self.lexical_index_path)
+        return BM25Index.from_collection(self.handle.client, self.collection_name)
+
+    def write(self, documents: list, ids: list):
+        """Embeds documents in batches and upserts them with the given point ids."""
+        for doc, id_ in zip(documents, ids):
+            self.lexical_index.add(id_, doc.page_content)
+        for i in range(0, len(documents), self.embed_batch_size):
+            batch = documents[i:i + self.embed_batch_size]
+            vectors = self.embedding.embed_documents([doc.page_content for doc in batch])
+            self.handle.client.upsert(
+                collection_name=self.collection_name,
+                points=to_points(batch, vectors, ids[i:i + self.embed_batch_size]),
+                wait=True,
+            )
+
+    def delete(self, ids: list):
+        """Deletes points by id."""
+        from qdrant_client.http import models
+
+        for id_ in ids:
+            self.lexical_index.remove(id_)
+        if ids:
+            self.handle.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.PointIdsList(points=ids),
+                wait=True,
+            )
+
+    def plan(self, source: str, documents: list, path: str = None):
+        """
+        Fingerprints the chunks of a file and compares them with the manifest.
+
+        Point ids are derived from the source and chunk content, so a chunk
+        that did not change keeps its id and does not need to be re-embedded.
+
+        Args:
+            source (str): Key of the file in the manifest.
+            documents (list): Chunks of the file.
+            path (str, optional): Location of the file. Defaults to `source`.
+
+        Returns:
+            tuple: (manifest entry, new documents, their point ids, stale point ids)
+        """
+        previous = set(self.manifest.point_ids(source))
+        chunks, new_docs, new_ids = [], [], []
+        seen = {}
+        for doc in documents:
+            digest = content_hash(doc.page_content)
+            # Identical chunks in one file (e.g. blank pages) still get distinct ids.
+            occurrence = seen.get(digest, 0)
+            seen[digest] = occurrence + 1
+            id_ = point_id(f"{source}:{digest}:{occurrence}")
+            chunks.append((digest, id_))
+            if id_ not in previous:
+                new_docs.append(doc)
+                new_ids.append(id_)
+        current = {id_ for _, id_ in chunks}
+        stale = [id_ for id_ in previous if id_ not in current]
+        return Manifest.describe(path or source, chunks), new_docs, new_ids, stale
+
+    def _adopt_path_keys(self, root: Path, files: dict):
+        """Re-keys entries of manifests that recorded files by path instead of relative to the folder."""
+        for source in [source for source in self.manifest.files if source not in files]:
+            try:
+                key = Path(source).resolve().relative_to(root.resolve()).as_posix()
+            except ValueError:
+                continue
+            if key in files and key not in self.manifest.files:
+                self.manifest.files[key] = self.manifest.files.pop(source)
+
+    def run(self, pdf_folder: str, full: bool = False) -> dict:
+        """
+        Brings the collection in line with the PDFs under a folder.
+
+        Args:
+            pdf_folder (str): Folder searched recursively for PDF files.
+            full (bool): Drop the collection and manifest and re-index everything.
+
+        Returns:
+            dict: Counts of processed, removed and unchanged files and written chunks.
+        """
+        client = self.handle.client
+        if full:
+            if client.collection_exists(self.collection_name):
+                client.delete_collection(self.collection_name)
+            self.manifest.clear()
+            self.lexical_index_path.unlink(missing_ok=True)
+        chunking = [self.chunker.chunk_size, self.chunker.chunk_overlap] if self.chunker else None
+        if self.manifest.files and (self.manifest.embedding_model, self.manifest.chunking) != (self.embedding_model, chunking):
+            raise ValueError(
+                f"Collection '{self.collection_name}' was built with '{self.manifest.embedding_model}' "
+                f"and chunking {self.manifest.chunking}; re-index it fully to switch to "
+                f"'{self.embedding_model}' and chunking {chunking}."
+            )
+        self.manifest.embedding_model = self.embedding_model
+        self.manifest.chunking = chunking
+        self.ensure_collection()
+        self.lexical_index = self.load_lexical_index()
+        # The BM25 index is only written at the end of the run; until then a
+        # crash leaves it marked stale so the next run rebuilds it.
+        self.manifest.lexical_index_synced = False
+
+        # Files are keyed relative to the folder, so runs that spell it differently
+        # (./pdfs, /data/pdfs, another working directory) still match the manifest
+        root = Path(pdf_folder)
+        files = {path.relative_to(root).as_posix(): str(path) for path in sorted(root.glob("**/*.pdf"))}
+        self._adopt_path_keys(root, files)
+        removed = [source for source in self.manifest.files if source not in files]
+        todo = [source for source, path in files.items() if not self.manifest.is_unchanged(source, path)]
+        print(f"Indexing {len(todo)} new or changed of {len(files)} PDFs into '{self.collection_name}', "
+              f"removing {len(removed)}, using '{self.embedding_model}'.")
+
+        stats = {"files": len(todo), "removed": len(removed), "unchanged": len(files) - len(todo),
+                 "chunks_written": 0, "chunks_deleted": 0}
+        for source in removed:
+            ids = self.manifest.point_ids(source)
+            self.delete(ids)
+            stats["chunks_deleted"] += len(ids)
+            del self.manifest.files[source]
+        self.manifest.save()
+
+        pending = []  # (source, manifest entry, new documents, new ids, stale ids)
+        progress = tqdm(total=len(todo), unit="file")
+
+        def flush():
+            docs = [doc for entry in pending for doc in entry[2]]
+            ids = [id_ for entry in pending for id_ in entry[3]]
+            stale = [id_ for entry in pending for id_ in entry[4]]
+            self.write(docs, ids)
+            self.delete(stale)
+            # Files are only recorded once all of their chunks are written.
+            for source, record, *_ in pending:
+                self.manifest.files[source] = record
+            self.manifest.save()
+            stats["chunks_written"] += len(docs)
+            stats["chunks_deleted"] += len(stale)
+            progress.update(len(pending))
+            pending.clear()
+
+        sources = {files[source]: source for source in todo}
+        for path, pages in iter_parsed([files[source] for source in todo], self.workers):
+            pending.append((sources[path], *self.plan(sources[path], self.split(pages), path)))
+            if sum(len(entry[2]) for entry in pending) >= self.upsert_batch_size:
+                flush()
+        if pending:
+            flush()
+        progress.close()
+
+        self.lexical_index.save(self.lexical_index_path)
+        self.manifest.lexical_index_synced = True
+        self.manifest.save()
+
+        stats["vectors"] = client.count(collection_name=self.collection_name).count
+        print(f"Wrote {stats['chunks_written']} and deleted {stats['chunks_deleted']} chunks. "
+              f"Collection '{self.collection_name}' holds {stats['vectors']} vectors.")
+        return stats
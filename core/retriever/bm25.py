@@ -0,0 +1,205 @@
+import gzip
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+from core.retriever.payload import CONTENT_KEY
+
+# Words kept together with inner dots, dashes and underscores, so identifiers
+# such as "DP0.2" or "ts_8" stay searchable as a whole.
+TOKEN_PATTERN = re.compile(r"\w+(?:[.\-_]\w+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were which with".split()
+)
+
+
+def tokenize(text: str) -> list:
+    """
+    Lower-cases and splits text into terms for lexical matching.
+
+    Compound identifiers are indexed both whole and by their parts,
+    e.g. "dp0.2" also yields "dp0" and "2".
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in re.split(r"[.\-_]", token) if part and part not in STOPWORDS)
+    return terms
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        In-memory Okapi BM25 index over documents identified by Qdrant point ids.
+
+        Args:
+            k1 (float): Term frequency saturation.
+            b (float): Document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> {doc id: term frequency}
+        self.doc_lengths = {}  # doc id -> number of terms
+        self.doc_terms = {}  # doc id -> distinct terms, to remove documents without scanning
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id, text: str):
+        """Indexes a document, replacing an earlier version with the same id."""
+        doc_id = str(doc_id)
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.doc_terms[doc_id] = list(terms)
+        self.total_length += length
+
+    def remove(self, doc_id):
+        """Removes a document from the index if present."""
+        doc_id = str(doc_id)
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(doc_id, []):
+            docs = self.postings.get(term, {})
+            docs.pop(doc_id, None)
+            if not docs:
+                self.postings.pop(term, None)
+
+    def search(self, query: str, k: int = 10) -> list:
+        """
+        Scores documents against a query.
+
+        Returns:
+            list: Up to `k` (doc id, score) pairs, best first.
+        """
+        n = len(self.doc_lengths)
+        if n == 0:
+            return []
+        average_length = self.total_length / n or 1
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def save(self, path):
+        """Writes the index to a gzipped JSON file, atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "postings": self.postings, "doc_lengths": self.doc_lengths}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.postings = data["postings"]
+        index.doc_lengths = data["doc_lengths"]
+        index.total_length = sum(index.doc_lengths.values())
+        for term, docs in index.postings.items():
+            for doc_id in docs:
+                index.doc_terms.setdefault(doc_id, []).append(term)
+        return index
+
+    @classmethod
+    def from_collection(cls, client, collection_name: str, batch_size: int = 1000):
+        """Builds an index from the page contents stored in a Qdrant collection."""
+        index = cls()
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=[CONTENT_KEY],
+                with_vectors=False,
+            )
+            for point in points:
+                index.add(point.id, (point.payload or {}).get(CONTENT_KEY, ""))
+            if offset is None:
+                return index
+
+
+class LexicalIndexRegistry:
+    def __init__(self, max_indexes: int = 32):
+        """
+        Process-wide cache of BM25 indexes keyed by storage location and collection.
+
+        Indexes are loaded from the sidecar file written at ingestion time, and
+        reloaded when that file changes. Collections without a sidecar (e.g.
+        session collections) are indexed from their stored payloads on first use.
+
+        Args:
+            max_indexes (int): Number of indexes kept in memory.
+        """
+        self.max_indexes = max_indexes
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()  # key -> (sidecar mtime, BM25Index)
+        self._building = {}  # key -> lock held while the index is loaded
+
+    def get(self, client, location: str, collection_name: str, sidecar: Path = None) -> BM25Index:
+        key = (location, collection_name)
+        mtime = os.path.getmtime(sidecar) if sidecar is not None and os.path.exists(sidecar) else None
+        with self._lock:
+            cached = self._indexes.get(key)
+            if cached is not None and cached[0] == mtime:
+                self._indexes.move_to_end(key)
+                return cached[1]
+            build_lock = self._building.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                cached = self._indexes.get(key)
+                if cached is not None and cached[0] == mtime:
+                    return cached[1]
+            try:
+                if mtime is not None:
+                    index = BM25Index.load(sidecar)
+                else:
+                    logging.info(f"Building BM25 index for collection '{collection_name}' from its payloads.")
+                    index = BM25Index.from_collection(client, collection_name)
+                with self._lock:
+                    self._indexes[key] = (mtime, index)
+                    self._indexes.move_to_end(key)
+                    while len(self._indexes) > self.max_indexes:
+                        self._indexes.popitem(last=False)
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+            return index
+
+    def invalidate(self, location: str, collection_name: str):
+        """
+        Drops the cached index of a collection, e.g. when it is deleted or rebuilt.
+
+        Needed for collections without a sidecar, whose index is never reloaded otherwise.
+        """
+        with self._lock:
+            self._indexes.pop((location, collection_name), None)
+
+
+lexical_indexes = LexicalIndexRegistry()
@@ -0,0 +1,144 @@
+# qdrant_client is imported inside the methods that build its models, so the
+# API starts without loading it.
+
+QUANTIZATION_TYPES = ("none", "scalar", "binary")
+
+
+class CollectionOptions:
+    def __init__(self,
+                 quantization: str = None,
+                 quantization_always_ram: bool = True,
+                 on_disk_vectors: bool = None,
+                 on_disk_payload: bool = None,
+                 hnsw_m: int = None,
+                 hnsw_ef_construct: int = None):
+        """
+        Storage and index settings applied when a collection is created.
+
+        The usual setup for a large collection keeps the original float32
+        vectors on disk and only the quantized copy in RAM, then rescores the
+        best quantized hits against the originals at search time.
+
+        These settings take effect on a Qdrant server. Embedded (local) storage
+        keeps every vector in memory and searches exhaustively, so it ignores them.
+
+        Settings left at None keep the server default for a new collection and
+        the current value of an existing one.
+
+        Args:
+            quantization (str, optional): "none", "scalar" (int8, 4x smaller) or "binary"
+                (1 bit per dimension, 32x smaller; best with 512+ dimensions).
+            quantization_always_ram (bool): Keep quantized vectors in RAM even
+                when the originals are on disk.
+            on_disk_vectors (bool, optional): Store the original vectors on disk (memory-mapped).
+            on_disk_payload (bool, optional): Store payloads on disk instead of in RAM.
+            hnsw_m (int, optional): Edges per HNSW node; lower uses less memory, higher
+                improves recall. Server default is 16.
+            hnsw_ef_construct (int, optional): Candidate list size while building the
+                HNSW graph. Server default is 100.
+        """
+        if quantization is not None and quantization not in QUANTIZATION_TYPES:
+            raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATION_TYPES}.")
+        self.quantization = quantization
+        self.quantization_always_ram = quantization_always_ram
+        self.on_disk_vectors = on_disk_vectors
+        self.on_disk_payload = on_disk_payload
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+
+    def __repr__(self):
+        return f"CollectionOptions({self.as_dict()})"
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+    def quantization_config(self):
+        from qdrant_client.http import models
+
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        return None
+
+    def hnsw_config(self):
+        if self.hnsw_m is None and self.hnsw_ef_construct is None:
+            return None
+        from qdrant_client.http import models
+
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def create_kwargs(self, size: int) -> dict:
+        """
+        Returns the arguments of `QdrantClient.create_collection` for vectors of a given size.
+        """
+        from qdrant_client.http import models
+
+        return {
+            "vectors_config": models.VectorParams(
+                size=size,
+                distance=models.Distance.COSINE,
+                on_disk=self.on_disk_vectors or None,
+            ),
+            "on_disk_payload": self.on_disk_payload or None,
+            "hnsw_config": self.hnsw_config(),
+            "quantization_config": self.quantization_config(),
+        }
+
+    def update_kwargs(self) -> dict:
+        """
+        Returns the arguments of `QdrantClient.update_collection` that apply the
+        settings given explicitly to an existing collection, leaving the others
+        as they are. The server re-optimizes it in the background.
+        """
+        from qdrant_client.http import models
+
+        kwargs = {}
+        if self.on_disk_vectors is not None:
+            kwargs["vectors_config"] = {"": models.VectorParamsDiff(on_disk=self.on_disk_vectors)}
+        if self.hnsw_config() is not None:
+            kwargs["hnsw_config"] = self.hnsw_config()
+        if self.quantization == "none":
+            kwargs["quantization_config"] = models.Disabled.DISABLED
+        elif self.quantization is not None:
+            kwargs["quantization_config"] = self.quantization_config()
+        if self.on_disk_payload is not None:
+            kwargs["collection_params"] = models.CollectionParamsDiff(on_disk_payload=self.on_disk_payload)
+        return kwargs
+
+
+def search_params(hnsw_ef: int = None,
+                  exact: bool = False,
+                  rescore: bool = None,
+                  oversampling: float = None):
+    """
+    Builds the search-time parameters for `QdrantClient.search`.
+
+    Args:
+        hnsw_ef (int, optional): Candidate list size during HNSW search; higher
+            improves recall at the cost of latency. Defaults to the collection's `ef_construct`.
+        exact (bool): Skip the index and compare the query with every vector.
+        rescore (bool, optional): Re-score quantized hits with the original vectors.
+            The server enables it by default for quantized collections.
+        oversampling (float, optional): Fetch `oversampling * limit` quantized hits
+            before rescoring, to make up for quantization error.
+
+    Returns:
+        SearchParams: The parameters, or None when all are left at their defaults.
+    """
+    from qdrant_client.http import models
+
+    quantization = None
+    if rescore is not None or oversampling is not None:
+        quantization = models.QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+    if hnsw_ef is None and not exact and quantization is None:
+        return None
+    return models.SearchParams(hnsw_ef=hnsw_ef, exact=exact, quantization=quantization)
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def maximal_marginal_relevance(query_vector, candidate_vectors, k: int = 4, lambda_mult: float = 0.5) -> list:
+    """
+    Selects `k` candidates balancing relevance to the query against redundancy.
+
+    All cosine similarities are computed up front as one matrix product, and the
+    similarity of every candidate to the selected set is kept as a running
+    maximum, so each selection step is a single vectorized update.
+
+    Args:
+        query_vector (array-like): Query embedding of shape (d,).
+        candidate_vectors (array-like): Candidate embeddings of shape (n, d).
+        k (int): Number of candidates to select.
+        lambda_mult (float): 1 ranks by relevance only, 0 by diversity only.
+
+    Returns:
+        list: Indices of the selected candidates, in selection order.
+    """
+    candidates = _normalize(np.asarray(candidate_vectors, dtype=np.float32))
+    if candidates.ndim != 2 or len(candidates) == 0 or k <= 0:
+        return []
+    query = _normalize(np.asarray(query_vector, dtype=np.float32))
+
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+    k = min(k, len(candidates))
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = pairwise[selected[0]].copy()
+    chosen = np.zeros(len(candidates), dtype=bool)
+    chosen[selected[0]] = True
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[chosen] = -np.inf
+        index = int(np.argmax(scores))
+        selected.append(index)
+        chosen[index] = True
+        np.maximum(redundancy, pairwise[index], out=redundancy)
+    return selected
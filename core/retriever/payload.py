@@ -0,0 +1,55 @@
+import uuid
+
+from langchain_core.documents import Document
+
+# Namespace for deterministic point ids derived from document content.
+POINT_ID_NAMESPACE = uuid.UUID("4f5e0a52-3b8c-4f7e-9d6a-2c1e8b7a9f10")
+
+# Payload keys of LangChain's Qdrant store (`Qdrant.CONTENT_KEY` and `Qdrant.METADATA_KEY`).
+CONTENT_KEY = "page_content"
+METADATA_KEY = "metadata"
+
+
+def point_id(key: str) -> str:
+    """Returns a stable Qdrant point id (UUID) for a string key."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, key))
+
+
+def to_points(documents: list, vectors: list, ids: list = None) -> list:
+    """
+    Builds Qdrant points using the payload layout of LangChain's Qdrant store.
+
+    Args:
+        documents (list): LangChain Document objects.
+        vectors (list): One embedding vector per document.
+        ids (list, optional): Point ids. Random UUIDs are used when omitted.
+
+    Returns:
+        list: `PointStruct` objects ready to upsert.
+    """
+    from qdrant_client.http import models
+
+    ids = ids or [str(uuid.uuid4()) for _ in documents]
+    return [
+        models.PointStruct(
+            id=id_,
+            vector=list(vector),
+            payload={CONTENT_KEY: doc.page_content, METADATA_KEY: doc.metadata},
+        )
+        for id_, doc, vector in zip(ids, documents, vectors)
+    ]
+
+
+def to_document(payload: dict, point_id=None, collection_name: str = None) -> Document:
+    """
+    Converts a point payload back into a LangChain Document.
+
+    Like LangChain's Qdrant store, the point id and collection name are added
+    to the metadata as `_id` and `_collection_name` when given.
+    """
+    metadata = dict(payload.get(METADATA_KEY) or {})
+    if point_id is not None:
+        metadata["_id"] = point_id
+    if collection_name is not None:
+        metadata["_collection_name"] = collection_name
+    return Document(page_content=payload.get(CONTENT_KEY, ""), metadata=metadata)
@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from core import config
+
+
+class CrossEncoderReranker:
+    def __init__(self, model_name: str, device: str = None, max_length: int = 512, seconds_per_pair: float = None):
+        """
+        Re-scores (query, document) pairs with a cross-encoder.
+
+        The reranker keeps a running estimate of its cost per pair, so callers
+        can give it a latency budget: it then scores only as many candidates as
+        fit in the budget, or skips re-ranking when even `k` would not fit.
+        The estimate starts from `seconds_per_pair`, or from a calibration run
+        at load time, so the budget applies from the first request.
+
+        Args:
+            model_name (str): Cross-encoder model name.
+            device (str, optional): Torch device, e.g. "cpu".
+            max_length (int): Maximum tokens per (query, document) pair.
+            seconds_per_pair (float, optional): Initial cost estimate per pair.
+        """
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, device=device, max_length=max_length)
+        self._lock = threading.Lock()
+        self._seconds_per_pair = seconds_per_pair or self.calibrate()
+
+    def calibrate(self, num_pairs: int = 8, passage_words: int = None) -> float:
+        """
+        Measures the cost per pair on chunk-sized dummy passages.
+
+        The first forward pass pays one-off setup costs, so it is not timed.
+
+        Returns:
+            float: Seconds per (query, passage) pair.
+        """
+        passage = " ".join(["passage"] * (passage_words or config.CHUNK_SIZE_TOKENS or 256))
+        pairs = [("calibration query", passage)] * num_pairs
+        self.model.predict(pairs[:1], show_progress_bar=False)
+        start = time.perf_counter()
+        self.model.predict(pairs, batch_size=num_pairs, show_progress_bar=False)
+        return (time.perf_counter() - start) / num_pairs
+
+    def estimate_ms(self, num_pairs: int):
+        """Predicted time to score `num_pairs` pairs, or None without an estimate."""
+        if self._seconds_per_pair is None:
+            return None
+        return 1000 * self._seconds_per_pair * num_pairs
+
+    def rerank(self, query: str, candidates: list, k: int, budget_ms: float = None):
+        """
+        Orders candidates by cross-encoder relevance in a single batched forward pass.
+
+        Args:
+            query (str): The search query.
+            candidates (list): (Document, score) pairs from first-stage retrieval, best first.
+            k (int): Number of documents to return.
+            budget_ms (float, optional): Time allowed for scoring.
+
+        Returns:
+            tuple: ((Document, score) pairs, dict with `reranked`, `candidates` and `skipped_reason`)
+        """
+        info = {"reranked": False, "candidates": len(candidates), "skipped_reason": None}
+        if len(candidates) <= 1:
+            info["skipped_reason"] = "too few candidates"
+            return candidates[:k], info
+
+        if budget_ms is not None and self._seconds_per_pair:
+            affordable = int(budget_ms / (1000 * self._seconds_per_pair))
+            if affordable < min(k, len(candidates)):
+                info["skipped_reason"] = "latency budget"
+                return candidates[:k], info
+            candidates = candidates[:affordable]
+            info["candidates"] = len(candidates)
+
+        start = time.perf_counter()
+        scores = self.model.predict(
+            [(query, doc.page_content) for doc, _ in candidates],
+            batch_size=len(candidates),
+            show_progress_bar=False,
+        )
+        per_pair = (time.perf_counter() - start) / len(candidates)
+        with self._lock:
+            # Exponential moving average smooths out warm-up and load spikes.
+            self._seconds_per_pair = per_pair if self._seconds_per_pair is None else (
+                0.8 * self._seconds_per_pair + 0.2 * per_pair
+            )
+
+        ranked = sorted(zip((doc for doc, _ in candidates), (float(score) for score in scores)),
+                        key=lambda item: item[1], reverse=True)
+        info["reranked"] = True
+        return ranked[:k], info
+
+
+class RerankModelNotAllowedError(ValueError):
+    """Raised when a client requests a cross-encoder that is not in the allowlist."""
+
+
+def load_reranker(model_name: str) -> CrossEncoderReranker:
+    return CrossEncoderReranker(model_name, device=config.RERANK_DEVICE, seconds_per_pair=config.RERANK_SECONDS_PER_PAIR)
+
+
+class RerankerRegistry:
+    def __init__(self, allowed_models: list, max_models: int = 2, loader=load_reranker):
+        """
+        Loads and shares the cross-encoders used for re-ranking.
+
+        Only models in `allowed_models` can be loaded, each at most once at a
+        time: concurrent first requests for a model wait for one load, while
+        requests for other models go ahead. At most `max_models` stay loaded;
+        the least recently used one is dropped first.
+
+        Args:
+            allowed_models (list): Names of the models that may be loaded.
+            max_models (int): Maximum number of models kept loaded.
+            loader (callable): Function `(model_name) -> reranker` used to load models.
+        """
+        self.allowed_models = list(allowed_models)
+        self.max_models = max_models
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._models = OrderedDict()  # name -> reranker, in LRU order
+        self._loading = {}  # name -> Future resolved when the load finishes
+
+    def get(self, model_name: str = None) -> CrossEncoderReranker:
+        """
+        Returns the shared reranker for a model, loading it on first use.
+
+        Raises:
+            RerankModelNotAllowedError: If the model is not in the allowlist.
+        """
+        model_name = model_name or config.RERANK_MODEL_NAME
+        if model_name not in self.allowed_models:
+            raise RerankModelNotAllowedError(
+                f"Rerank model '{model_name}' is not served here. Available models: {', '.join(self.allowed_models)}."
+            )
+        while True:
+            with self._lock:
+                if model_name in self._models:
+                    self._models.move_to_end(model_name)
+                    return self._models[model_name]
+                future = self._loading.get(model_name)
+                owner = future is None
+                if owner:
+                    future = self._loading[model_name] = Future()
+            if not owner:
+                future.result()
+                continue
+            break
+
+        start = time.perf_counter()
+        try:
+            reranker = self.loader(model_name)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[model_name]
+            future.set_exception(e)
+            raise
+        logging.info(f"Loaded reranker '{model_name}' in {time.perf_counter() - start:.2f}s.")
+        with self._lock:
+            self._models[model_name] = reranker
+            # Requests already holding an evicted reranker keep using it until they finish
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+            del self._loading[model_name]
+        future.set_result(reranker)
+        return reranker
+
+
+rerankers = RerankerRegistry(config.RERANK_MODELS, max_models=config.RERANK_MAX_MODELS)
+
+
+def get_reranker(model_name: str = None) -> CrossEncoderReranker:
+    """Returns the shared reranker for a model, loading it on first use."""
+    return rerankers.get(model_name)
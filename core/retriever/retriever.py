@@ -1,8 +1,19 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from langchain_qdrant import Qdrant
-from qdrant_client import QdrantClient
-from core.embeddings.embedding_model import get_embedding_model
-import shutil
+from core import config
+from core.embeddings.registry import embedding_registry
+from core.ingestion.manifest import sidecar_path
+from core.retriever.bm25 import lexical_indexes
+from core.retriever.collection_options import search_params
+from core.retriever.mmr import maximal_marginal_relevance
+from core.retriever.payload import to_document
+from core.retriever.reranker import get_reranker
+from core.retriever.session_store import session_collections
+from core.retriever.store_manager import store_manager
+
+# Runs the dense and lexical halves of a hybrid search side by side.
+_search_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid-search")
 
 class Retriever:
     def __init__(self, model_name: str = None, qdrant_path: str = None, collection_name: str = None):
@@ -16,56 +27,58 @@ class Retriever:
             db (Qdrant, optional): Qdrant instance.
         """
         self.model_name = model_name
-        self.embedding = get_embedding_model(self.model_name)
+        self.embedding = embedding_registry.get(self.model_name)
         self.qdrant_path = None
+        self.qdrant_url = None
         self.collection_name = None
         self.db = None
 
-    def create_vector_store(self, documents: list, collection_name: str = 'temp_collection'):    
+    def create_vector_store(self, documents: list):
         """
-        Creates a Qdrant vector store from a list of documents.
+        Returns a Qdrant vector store over a list of documents.
+
+        Each distinct document set gets its own session collection, which is
+        built once and reused by follow-up queries until it expires.
 
         Args:
-            documents (list): List of dictionaries with "content" and optional "filename".
+            documents (list): List of LangChain Document objects.
 
         Returns:
             Qdrant: Initialized vector store instance.
         """
-        if not documents:
-            raise ValueError("No documents provided for vector store creation.")
-
-        # Delete temp_collection before recreating
-        if collection_name == "temp_collection":
-            try:
-                client = QdrantClient(path="data/vector_stores") 
-                client.delete_collection(collection_name)
-                shutil.rmtree(Path("data/vector_stores") / collection_name, ignore_errors=True)
-                print(f"Deleted existing collection '{collection_name}'.")
-
-            except Exception as e:
-                print(f"Warning: Could not delete collection '{collection_name}'. Error: {str(e)}")
+        model_name = self.model_name or config.EMBEDDING_MODEL_NAME
+        self.db = session_collections.get_or_create(documents, self.embedding, model_name)
+        self.collection_name = self.db.collection_name
+        self.qdrant_path = Path(session_collections.qdrant_path)
+        return self.db
 
-        print(f"Creating new Qdrant collection '{collection_name}' with {len(documents)} documents using '{self.model_name}'.")
+    def get_session_store(self, collection_id: str):
+        """
+        Loads a session collection created earlier from uploaded documents.
 
-        self.collection_name = collection_name
-        self.qdrant_path = Path("data/vector_stores") / collection_name
-        self.qdrant_path.mkdir(parents=True, exist_ok=True)
+        Args:
+            collection_id (str): Id returned when the documents were ingested.
+                The same embedding model must be used for ingestion and retrieval.
 
-        self.db = Qdrant.from_documents(
-            documents=documents,
-            embedding=self.embedding,
-            path=str(self.qdrant_path),
-            collection_name=self.collection_name,
-        )
+        Returns:
+            Qdrant: Loaded vector store instance.
+        """
+        self.db = session_collections.get(collection_id, self.embedding)
+        self.collection_name = collection_id
+        self.qdrant_path = Path(session_collections.qdrant_path)
         return self.db
 
-    def get_vector_store(self, qdrant_path: str = None, collection_name: str = None):
+    def get_vector_store(self, qdrant_path: str = None, collection_name: str = None, qdrant_url: str = None):
         """
         Loads an existing Qdrant vector store.
 
+        The underlying client is shared through `store_manager`, so each storage
+        location is opened only once per process.
+
         Args:
             qdrant_path (str, optional): Path to the existing Qdrant vector store.
             qdrant_collection (str, optional): Name of the collection in Qdrant.
+            qdrant_url (str, optional): URL of a Qdrant server holding the collection.
 
         Returns:
             Qdrant: Loaded vector store instance.
@@ -74,27 +87,200 @@ class Retriever:
             self.qdrant_path = Path(qdrant_path) 
         if collection_name:    
             self.collection_name = collection_name
+        self.qdrant_url = qdrant_url
 
-        client = QdrantClient(path=str(self.qdrant_path))
-        self.db = Qdrant(client=client, collection_name=self.collection_name, embeddings=self.embedding)
+        self.db = store_manager.get_store(
+            self.embedding,
+            self.collection_name,
+            qdrant_path=str(self.qdrant_path) if self.qdrant_path else None,
+            url=qdrant_url,
+        )
         return self.db
 
-    def retrieve_docs(self, query: str):
+    def search(self,
+               query: str,
+               search_type: str = "mmr",
+               k: int = 2,
+               fetch_k: int = 20,
+               lambda_mult: float = 0.5,
+               score_threshold: float = None,
+               hnsw_ef: int = None,
+               rescore: bool = None,
+               oversampling: float = None):
+        """
+        Searches the vector store and returns documents with their similarity scores.
+
+        Args:
+            query (str): The search query.
+            search_type (str): "similarity" for plain nearest-neighbour search,
+                "mmr" to re-rank `fetch_k` candidates for diversity, or "hybrid" to
+                fuse dense and BM25 results with reciprocal rank fusion.
+            k (int): Number of documents to return.
+            fetch_k (int): Number of candidates re-ranked by MMR or fused by hybrid search.
+            lambda_mult (float): MMR trade-off, 1 for relevance only, 0 for diversity only.
+            score_threshold (float, optional): Minimum cosine similarity of returned documents.
+            hnsw_ef (int, optional): HNSW candidate list size for this query.
+            rescore (bool, optional): Re-score quantized hits with the original vectors.
+            oversampling (float, optional): Quantized hits fetched per result before rescoring.
+
+        Returns:
+            list: (Document, score) pairs, best first.
+        """
+        if self.db is None:
+            raise ValueError("Vector store is not initialized. Call create_vector_store() or get_vector_store() first.")
+        if search_type not in ("mmr", "similarity", "hybrid"):
+            raise ValueError(f"Unknown search type '{search_type}'.")
+        params = search_params(hnsw_ef=hnsw_ef, rescore=rescore, oversampling=oversampling)
+        if search_type == "hybrid":
+            return self._hybrid_search(query, k, max(fetch_k, k), score_threshold, params)
+
+        query_vector = self.embedding.embed_query(query)
+        mmr = search_type == "mmr" and k > 1
+        points = self.db.client.search(
+            collection_name=self.db.collection_name,
+            query_vector=query_vector,
+            limit=max(fetch_k, k) if mmr else k,
+            score_threshold=score_threshold,
+            search_params=params,
+            with_payload=True,
+            with_vectors=mmr,
+        )
+        if mmr and len(points) > k:
+            selected = maximal_marginal_relevance(query_vector, [point.vector for point in points], k, lambda_mult)
+            points = [points[i] for i in selected]
+        return [
+            (to_document(point.payload, point.id, self.db.collection_name), point.score)
+            for point in points[:k]
+        ]
+
+    def lexical_index(self):
+        """Returns the BM25 index of the current collection."""
+        qdrant_path = str(self.qdrant_path) if self.qdrant_path else None
+        handle = store_manager.get_handle(qdrant_path, self.qdrant_url)
+        sidecar = sidecar_path(qdrant_path, self.collection_name, ".bm25.json.gz")
+        return lexical_indexes.get(handle.client, handle.location, self.collection_name, sidecar)
+
+    def _hybrid_search(self, query: str, k: int, fetch_k: int, score_threshold: float = None, params=None, rrf_k: int = 60):
+        """
+        Runs dense and BM25 search concurrently and fuses them with reciprocal rank fusion.
+
+        Each document scores sum(1 / (rrf_k + rank)) over the result lists it appears in.
+        """
+        client, collection_name = self.db.client, self.db.collection_name
+        dense = _search_pool.submit(
+            lambda: client.search(
+                collection_name=collection_name,
+                query_vector=self.embedding.embed_query(query),
+                limit=fetch_k,
+                score_threshold=score_threshold,
+                search_params=params,
+                with_payload=True,
+            )
+        )
+        lexical = _search_pool.submit(lambda: self.lexical_index().search(query, fetch_k))
+        dense_points, lexical_hits = dense.result(), lexical.result()
+
+        fused, payloads = {}, {}
+        for rank, point in enumerate(dense_points, start=1):
+            fused[str(point.id)] = fused.get(str(point.id), 0.0) + 1 / (rrf_k + rank)
+            payloads[str(point.id)] = point.payload
+        for rank, (doc_id, _) in enumerate(lexical_hits, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1 / (rrf_k + rank)
+        top = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+
+        # Documents found only by BM25 still need their payloads.
+        missing = [doc_id for doc_id, _ in top if doc_id not in payloads]
+        if missing:
+            for point in client.retrieve(collection_name=collection_name, ids=missing, with_payload=True):
+                payloads[str(point.id)] = point.payload
+        return [
+            (to_document(payloads[doc_id], doc_id, collection_name), score)
+            for doc_id, score in top
+            if doc_id in payloads
+        ]
+
+    def search_reranked(self,
+                        query: str,
+                        k: int = 2,
+                        rerank_top_n: int = 20,
+                        rerank_budget_ms: float = None,
+                        rerank_model: str = None,
+                        **search_kwargs):
+        """
+        Retrieves `rerank_top_n` candidates with `search()` and re-orders them with a cross-encoder.
+
+        Args:
+            query (str): The search query.
+            k (int): Number of documents to return.
+            rerank_top_n (int): Number of first-stage candidates scored by the cross-encoder.
+            rerank_budget_ms (float, optional): Time allowed for re-ranking. Fewer candidates
+                are scored when the full set would not fit, and re-ranking is skipped
+                when even `k` would not.
+            rerank_model (str, optional): Cross-encoder model. Defaults to `RERANK_MODEL_NAME`.
+            **search_kwargs: Other options accepted by `search()`.
+
+        Returns:
+            tuple: ((Document, score) pairs, dict of timings in milliseconds and re-rank details)
+        """
+        top_n = max(rerank_top_n, k)
+        search_kwargs["fetch_k"] = max(search_kwargs.get("fetch_k", 20), top_n)
+        # Loaded before timing, so `rerank_ms` measures scoring only
+        reranker = get_reranker(rerank_model)
+        start = time.perf_counter()
+        candidates = self.search(query, k=top_n, **search_kwargs)
+        retrieved = time.perf_counter()
+        results, info = reranker.rerank(query, candidates, k, budget_ms=rerank_budget_ms)
+        timings = {
+            "retrieve_ms": round(1000 * (retrieved - start), 2),
+            "rerank_ms": round(1000 * (time.perf_counter() - retrieved), 2),
+            **info,
+        }
+        return results, timings
+
+    def retrieve_docs(self, query: str, **search_kwargs):
         """
         Retrieves relevant documents based on the query.
 
         Args:
             query (str): The search query.
+            **search_kwargs: Search options accepted by `search()`, by default
+                MMR with k=2.
 
         Returns:
             list: List of retrieved document objects.
         """
+        return [doc for doc, _ in self.search(query, **search_kwargs)]
+
+    def retrieve_docs_batch(self, queries: list, k: int = 2, score_threshold: float = None, hnsw_ef: int = None):
+        """
+        Retrieves relevant documents for many queries at once.
+
+        All queries are encoded in one batched embedding call and searched with
+        a single Qdrant batch request. Results are plain similarity search hits.
+
+        Args:
+            queries (list): The search queries.
+            k (int): Number of documents to return per query.
+            score_threshold (float, optional): Minimum cosine similarity of returned documents.
+            hnsw_ef (int, optional): HNSW candidate list size for these queries.
+
+        Returns:
+            list: One list of retrieved document objects per query, in order.
+        """
         if self.db is None:
             raise ValueError("Vector store is not initialized. Call create_vector_store() or get_vector_store() first.")
+        if not queries:
+            return []
 
-        retriever = self.db.as_retriever(
-            search_type="mmr",
-            search_kwargs={"k": 2},
-        )
-        return retriever.invoke(query)
+        from qdrant_client.http import models
 
+        vectors = self.embedding.embed_documents(list(queries))
+        params = search_params(hnsw_ef=hnsw_ef)
+        results = self.db.client.search_batch(
+            collection_name=self.db.collection_name,
+            requests=[models.SearchRequest(vector=list(vector), limit=k, score_threshold=score_threshold, params=params, with_payload=True) for vector in vectors],
+        )
+        return [
+            [to_document(point.payload, point.id, self.db.collection_name) for point in points]
+            for points in results
+        ]
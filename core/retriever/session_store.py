@@ -0,0 +1,240 @@
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from core import config
+from core.embeddings.cache import content_hash, with_embedding_cache
+from core.ingestion.chunking import get_chunker
+from core.retriever.bm25 import lexical_indexes
+from core.retriever.payload import point_id, to_points
+from core.retriever.store_manager import store_manager
+
+if TYPE_CHECKING:
+    from langchain_qdrant import Qdrant
+
+# Prefix of collections managed here; other collections at the same location are left alone.
+SESSION_PREFIX = "docs_"
+
+
+class CollectionNotFoundError(LookupError):
+    """Raised when a session collection id is unknown or has expired."""
+
+
+def document_set_id(documents: list, model_name: str) -> str:
+    """
+    Returns a collection name identifying a set of documents embedded with a model.
+
+    The name only depends on the page contents and metadata, not on their order,
+    so re-sending the same upload maps to the same collection.
+    """
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for page_hash in sorted(content_hash(doc.page_content + repr(sorted(doc.metadata.items()))) for doc in documents):
+        digest.update(page_hash.encode("ascii"))
+    return SESSION_PREFIX + digest.hexdigest()[:32]
+
+
+class SessionCollectionManager:
+    def __init__(self, qdrant_path: str, ttl_seconds: float = 3600, upsert_batch_size: int = 256):
+        """
+        Manages short-lived collections built from uploaded documents.
+
+        Each document set gets its own collection, created on first use and
+        reused by later queries. Pages are split into token-sized chunks before
+        they are embedded. Collections not used for `ttl_seconds` are
+        deleted by `collect_garbage`, unless a search holds them with `using`.
+
+        Args:
+            qdrant_path (str): Embedded storage path holding the collections, or ":memory:".
+            ttl_seconds (float): Idle time after which a collection is deleted.
+            upsert_batch_size (int): Number of points written per upsert call.
+        """
+        self.qdrant_path = qdrant_path
+        self.ttl_seconds = ttl_seconds
+        self.upsert_batch_size = upsert_batch_size
+
+        self._lock = threading.Lock()
+        self._last_used = None  # collection name -> timestamp, loaded on first use
+        self._creating = {}  # collection name -> lock held while it is being built
+        self._active = {}  # collection name -> number of searches using it
+        self._gc_stop = threading.Event()
+        self._gc_thread = None
+
+    @property
+    def handle(self):
+        return store_manager.get_handle(self.qdrant_path)
+
+    def _tracked(self) -> dict:
+        """Returns the last-used table, adopting collections left over from a previous run."""
+        if self._last_used is None:
+            now = time.time()
+            existing = self.handle.client.get_collections().collections
+            self._last_used = {c.name: now for c in existing if c.name.startswith(SESSION_PREFIX)}
+        return self._last_used
+
+    def get(self, collection_name: str, embedding) -> "Qdrant":
+        """
+        Returns an existing session collection and marks it as used.
+
+        Raises:
+            CollectionNotFoundError: If the collection does not exist or has expired.
+        """
+        with self._lock:
+            if collection_name not in self._tracked():
+                raise CollectionNotFoundError(f"Unknown or expired document collection '{collection_name}'.")
+            self._last_used[collection_name] = time.time()
+        return self._store(collection_name, embedding)
+
+    def _store(self, collection_name: str, embedding) -> "Qdrant":
+        from langchain_qdrant import Qdrant
+
+        return Qdrant(client=self.handle.client, collection_name=collection_name, embeddings=embedding)
+
+    @contextmanager
+    def using(self, collection_name: str):
+        """
+        Keeps a collection from being deleted while a search runs on it.
+
+        Raises:
+            CollectionNotFoundError: If the collection does not exist or has expired.
+        """
+        with self._lock:
+            if collection_name not in self._tracked():
+                raise CollectionNotFoundError(f"Unknown or expired document collection '{collection_name}'.")
+            self._active[collection_name] = self._active.get(collection_name, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active[collection_name] -= 1
+                if not self._active[collection_name]:
+                    del self._active[collection_name]
+                # The idle time starts when the last search finishes
+                if collection_name in self._last_used:
+                    self._last_used[collection_name] = time.time()
+
+    def get_or_create(self, documents: list, embedding, model_name: str) -> "Qdrant":
+        """
+        Returns the collection for a document set, building it only the first time.
+
+        Args:
+            documents (list): LangChain Document objects.
+            embedding (Embeddings): Embedding model for the documents and queries.
+            model_name (str): Name of the embedding model.
+
+        Returns:
+            Qdrant: Vector store over the document set.
+        """
+        if not documents:
+            raise ValueError("No documents provided for vector store creation.")
+        chunker = get_chunker(embedding)
+        chunking = f"{chunker.chunk_size}:{chunker.chunk_overlap}" if chunker else "pages"
+        name = document_set_id(documents, f"{model_name}:{chunking}")
+
+        with self._lock:
+            build_lock = self._creating.setdefault(name, threading.Lock())
+        try:
+            # Concurrent requests for the same documents wait for a single build.
+            with build_lock:
+                try:
+                    return self.get(name, embedding)
+                except CollectionNotFoundError:
+                    pass
+                chunks = chunker.split_documents(documents) if chunker else documents
+                self._build(name, chunks, embedding, model_name)
+                with self._lock:
+                    self._tracked()[name] = time.time()
+        finally:
+            with self._lock:
+                if self._creating.get(name) is build_lock:
+                    del self._creating[name]
+        return self._store(name, embedding)
+
+    def _build(self, name: str, documents: list, embedding, model_name: str):
+        from qdrant_client.http import models
+
+        if not documents:
+            raise ValueError("The provided documents contain no text.")
+        print(f"Creating new Qdrant collection '{name}' with {len(documents)} chunks using '{model_name}'.")
+        vectors = with_embedding_cache(embedding, model_name).embed_documents([doc.page_content for doc in documents])
+        # Ids depend only on the chunks, so a rebuilt collection has the same ids as before
+        ids = [point_id(f"{name}:{i}:{content_hash(doc.page_content)}") for i, doc in enumerate(documents)]
+        handle = self.handle
+        with handle.write_lock:
+            if handle.client.collection_exists(name):
+                handle.client.delete_collection(name)
+            lexical_indexes.invalidate(handle.location, name)
+            handle.client.create_collection(
+                collection_name=name,
+                vectors_config=models.VectorParams(size=len(vectors[0]), distance=models.Distance.COSINE),
+            )
+            for i in range(0, len(documents), self.upsert_batch_size):
+                handle.client.upsert(
+                    collection_name=name,
+                    points=to_points(
+                        documents[i:i + self.upsert_batch_size],
+                        vectors[i:i + self.upsert_batch_size],
+                        ids[i:i + self.upsert_batch_size],
+                    ),
+                )
+
+    def collect_garbage(self) -> list:
+        """
+        Deletes collections that have been idle for longer than the TTL.
+
+        Collections in use by a search are kept until a later run.
+
+        Returns:
+            list: Names of the deleted collections.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                name for name, last_used in self._tracked().items()
+                if last_used < cutoff and name not in self._active
+            ]
+            for name in expired:
+                del self._last_used[name]
+        handle = self.handle
+        for name in expired:
+            try:
+                with handle.write_lock:
+                    handle.client.delete_collection(name)
+                lexical_indexes.invalidate(handle.location, name)
+                logging.info(f"Deleted expired document collection '{name}'.")
+            except Exception as e:
+                logging.warning(f"Could not delete expired collection '{name}': {e}")
+        return expired
+
+    def start_gc(self, interval_seconds: float = 60):
+        """Starts a background thread running `collect_garbage` periodically."""
+        if self._gc_thread is not None:
+            return
+        self._gc_stop.clear()
+
+        def loop():
+            while not self._gc_stop.wait(interval_seconds):
+                try:
+                    self.collect_garbage()
+                except Exception as e:
+                    logging.error(f"Session collection cleanup failed: {e}")
+
+        self._gc_thread = threading.Thread(target=loop, name="session-gc", daemon=True)
+        self._gc_thread.start()
+
+    def stop_gc(self):
+        """Stops the background cleanup thread."""
+        self._gc_stop.set()
+        self._gc_thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"collections": len(self._last_used or {}), "ttl_seconds": self.ttl_seconds}
+
+
+session_collections = SessionCollectionManager(
+    qdrant_path=config.SESSION_QDRANT_PATH,
+    ttl_seconds=config.SESSION_TTL_SECONDS,
+)
@@ -0,0 +1,293 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from core import config
+
+if TYPE_CHECKING:
+    from langchain_qdrant import Qdrant
+    from qdrant_client import QdrantClient
+
+
+class QdrantLocationNotAllowedError(ValueError):
+    """Raised when a request names a Qdrant server or storage path that is not allowed."""
+
+
+class StoreHandle:
+    def __init__(self, client: "QdrantClient", location: str, local: bool):
+        """
+        A Qdrant client shared by every collection at one location.
+
+        Args:
+            client (QdrantClient): The open client.
+            location (str): Storage path or server URL the client points at.
+            local (bool): True for embedded storage, which is not safe for concurrent writes.
+        """
+        self.client = client
+        self.location = location
+        self.local = local
+        # Embedded Qdrant mutates plain Python structures, so writes are serialized.
+        self.write_lock = threading.RLock()
+
+
+class VectorStoreManager:
+    def __init__(self,
+                 url: str = None,
+                 api_key: str = None,
+                 prefer_grpc: bool = False,
+                 grpc_port: int = 6334,
+                 pool_size: int = 16,
+                 timeout: int = 30,
+                 allowed_urls: list = None,
+                 allowed_paths: list = None,
+                 pinned_paths: list = None,
+                 max_handles: int = 16):
+        """
+        Opens each Qdrant location once per process and shares it across requests.
+
+        Embedded storage paths take a file lock and load their collections into
+        memory when opened, so they must only be opened once. Server endpoints
+        get a single client with a pooled HTTP (or gRPC) connection.
+
+        At most `max_handles` locations stay open; opening another one closes
+        the least recently used idle location. Locations held with `using`, the
+        default server, `pinned_paths` and in-memory storage are never closed.
+        Each location is opened once, outside the manager lock, so a slow
+        server or a large local store does not hold up other locations.
+
+        Args:
+            url (str, optional): Default Qdrant server URL used instead of local paths.
+            api_key (str, optional): API key for the Qdrant server.
+            prefer_grpc (bool): Use the gRPC interface of the server when available.
+            grpc_port (int): gRPC port of the server.
+            pool_size (int): Maximum number of pooled HTTP connections per server.
+            timeout (int): Request timeout in seconds for server clients.
+            allowed_urls (list, optional): Qdrant servers requests may name, see
+                `check_location`. Defaults to `url` alone.
+            allowed_paths (list, optional): Directories holding the embedded
+                storages requests may name.
+            pinned_paths (list, optional): Storage paths that stay open, e.g. session storage.
+            max_handles (int): Maximum number of open storage locations.
+        """
+        self.url = url
+        self.api_key = api_key
+        self.prefer_grpc = prefer_grpc
+        self.grpc_port = grpc_port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        if allowed_urls is None:
+            allowed_urls = [url] if url else []
+        self.allowed_urls = [allowed.rstrip("/") for allowed in allowed_urls]
+        self.allowed_paths = [Path(allowed).resolve() for allowed in allowed_paths or []]
+        self.max_handles = max_handles
+
+        self._lock = threading.Lock()
+        self._handles = OrderedDict()  # location key -> StoreHandle, in LRU order
+        self._opening = {}  # location key -> Future resolved when the location is open
+        self._active = {}  # location key -> number of requests using it
+        self._stores = {}  # (location key, collection, model name) -> Qdrant
+        self._pinned = {self._location_key(path) for path in pinned_paths or []}
+        if url:
+            self._pinned.add(("url", url))
+
+    def check_location(self, qdrant_path: str = None, url: str = None):
+        """
+        Checks that a Qdrant server URL or storage path sent by a client is allowed.
+
+        URLs must be in the allowlist. Paths, which are only used without a
+        server URL, must be existing embedded storages inside an allowed directory.
+
+        Raises:
+            QdrantLocationNotAllowedError: If the URL or path is not allowed.
+        """
+        if url:
+            if url.rstrip("/") not in self.allowed_urls:
+                raise QdrantLocationNotAllowedError(f"Qdrant server '{url}' is not allowed.")
+        elif qdrant_path and not self.url:
+            path = Path(qdrant_path).resolve()
+            inside = any(path.is_relative_to(allowed) for allowed in self.allowed_paths)
+            # Opening a path that holds no storage would create one
+            if not inside or not (path / "meta.json").is_file():
+                raise QdrantLocationNotAllowedError(f"Qdrant storage '{qdrant_path}' is not allowed.")
+
+    def _location_key(self, qdrant_path: str = None, url: str = None):
+        if qdrant_path == ":memory:" and not url:
+            return ("memory", qdrant_path)
+        url = url or self.url
+        if url:
+            return ("url", url)
+        if not qdrant_path:
+            raise ValueError("Either a Qdrant path or a Qdrant URL is required.")
+        return ("path", str(Path(qdrant_path).resolve()))
+
+    def _open(self, kind: str, location: str) -> StoreHandle:
+        # Imported here so the API starts without loading qdrant-client, httpx and grpc
+        import httpx
+        from qdrant_client import QdrantClient
+
+        if kind == "url":
+            logging.info(f"Connecting to Qdrant server at {location}.")
+            client = QdrantClient(
+                url=location,
+                api_key=self.api_key,
+                prefer_grpc=self.prefer_grpc,
+                grpc_port=self.grpc_port,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size,
+                                    max_keepalive_connections=self.pool_size),
+            )
+            return StoreHandle(client, location, local=False)
+        if kind == "memory":
+            return StoreHandle(QdrantClient(location=":memory:"), location, local=True)
+        logging.info(f"Opening embedded Qdrant storage at {location}.")
+        return StoreHandle(QdrantClient(path=location), location, local=True)
+
+    def get_handle(self, qdrant_path: str = None, url: str = None) -> StoreHandle:
+        """
+        Returns the shared handle for a storage location, opening it on first use.
+
+        Args:
+            qdrant_path (str, optional): Path of embedded Qdrant storage, or ":memory:".
+            url (str, optional): Qdrant server URL. Takes precedence over `qdrant_path`.
+
+        Returns:
+            StoreHandle: The shared client handle.
+        """
+        return self._get(self._location_key(qdrant_path, url), lease=False)
+
+    @contextmanager
+    def using(self, qdrant_path: str = None, url: str = None):
+        """
+        Holds a storage location open while a request uses it.
+
+        Yields:
+            StoreHandle: The shared client handle.
+        """
+        key = self._location_key(qdrant_path, url)
+        handle = self._get(key, lease=True)
+        try:
+            yield handle
+        finally:
+            with self._lock:
+                self._active[key] -= 1
+                if not self._active[key]:
+                    del self._active[key]
+                evicted = self._evict()
+            for old in evicted:
+                self._close(old)
+
+    def _get(self, key, lease: bool) -> StoreHandle:
+        while True:
+            with self._lock:
+                handle = self._handles.get(key)
+                if handle is not None:
+                    self._handles.move_to_end(key)
+                    if lease:
+                        self._active[key] = self._active.get(key, 0) + 1
+                    return handle
+                future = self._opening.get(key)
+                owner = future is None
+                if owner:
+                    future = self._opening[key] = Future()
+            if not owner:
+                future.result()
+                continue
+            break
+
+        try:
+            handle = self._open(*key)
+        except BaseException as e:
+            with self._lock:
+                del self._opening[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._handles[key] = handle
+            del self._opening[key]
+            if lease:
+                self._active[key] = self._active.get(key, 0) + 1
+            evicted = self._evict(keep=key)
+        future.set_result(handle)
+        for old in evicted:
+            self._close(old)
+        return handle
+
+    def _evict(self, keep=None) -> list:
+        """
+        Drops the least recently used idle handles over `max_handles`, except `keep`.
+        Call with the lock held.
+        """
+        evicted = []
+        for key in list(self._handles):
+            if len(self._handles) <= self.max_handles:
+                break
+            if key == keep or key[0] == "memory" or key in self._pinned or key in self._active:
+                continue
+            evicted.append(self._handles.pop(key))
+            for store_key in [k for k in self._stores if k[0] == key]:
+                del self._stores[store_key]
+        return evicted
+
+    def _close(self, handle: StoreHandle):
+        # Only idle handles are closed; the write lock covers writers that did not use `using`
+        with handle.write_lock:
+            try:
+                handle.client.close()
+            except Exception as e:
+                logging.warning(f"Could not close Qdrant client for {handle.location}: {e}")
+
+    def get_store(self, embedding, collection_name: str, qdrant_path: str = None, url: str = None) -> "Qdrant":
+        """
+        Returns a LangChain Qdrant store for an existing collection.
+
+        Args:
+            embedding (Embeddings): Embedding model used to encode queries.
+            collection_name (str): Name of the collection.
+            qdrant_path (str, optional): Path of embedded Qdrant storage.
+            url (str, optional): Qdrant server URL.
+
+        Returns:
+            Qdrant: Vector store bound to the shared client.
+        """
+        handle = self.get_handle(qdrant_path, url)
+        key = (self._location_key(qdrant_path, url), collection_name, getattr(embedding, "model_name", id(embedding)))
+        with self._lock:
+            store = self._stores.get(key)
+        if store is not None and store.embeddings is embedding and store.client is handle.client:
+            return store
+        # Ask the server outside the lock, so a slow location does not block the others
+        if not handle.client.collection_exists(collection_name):
+            raise ValueError(f"Collection '{collection_name}' does not exist at {handle.location}.")
+        from langchain_qdrant import Qdrant
+
+        store = Qdrant(client=handle.client, collection_name=collection_name, embeddings=embedding)
+        with self._lock:
+            self._stores[key] = store
+        return store
+
+    def close_all(self):
+        """Closes every open client, releasing embedded storage locks."""
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+            self._stores.clear()
+        for handle in handles:
+            self._close(handle)
+
+
+store_manager = VectorStoreManager(
+    url=config.QDRANT_URL,
+    api_key=config.QDRANT_API_KEY,
+    prefer_grpc=config.QDRANT_PREFER_GRPC,
+    grpc_port=config.QDRANT_GRPC_PORT,
+    pool_size=config.QDRANT_POOL_SIZE,
+    timeout=config.QDRANT_TIMEOUT,
+    allowed_urls=config.QDRANT_ALLOWED_URLS,
+    allowed_paths=config.QDRANT_ALLOWED_PATHS,
+    pinned_paths=[config.SESSION_QDRANT_PATH],
+    max_handles=config.QDRANT_MAX_HANDLES,
+)
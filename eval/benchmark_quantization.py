@@ -0,0 +1,163 @@
+"""
+Benchmark the memory and recall trade-off of collection storage options.
+
+Copies the vectors of an existing collection into one scratch collection per
+configuration on a Qdrant server, then reports for each configuration the
+estimated RAM use, recall@k against exact (brute-force float32) search, and
+query latency.
+
+Quantization, on-disk storage and HNSW settings only exist on a Qdrant server,
+so this needs one, e.g. `docker run -p 6333:6333 qdrant/qdrant`. By default a
+server only builds the HNSW graph for segments above 20,000 KB of vectors
+(about 13,000 vectors of dimension 384) and searches smaller ones by brute
+force, so the scratch collections lower the threshold to 1 KB (0 would turn
+indexing off) and are only benchmarked once every vector is indexed.
+
+Example:
+    python -m eval.benchmark_quantization --source-path data/vector_stores/rubin_qdrant \
+        --source-collection rubin_telescope --qdrant-url http://localhost:6333 \
+        --queries eval/questions.txt --embedding-model sentence-transformers/all-MiniLM-L12-v2
+"""
+import argparse
+import random
+import statistics
+import time
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from core.retriever.collection_options import CollectionOptions, search_params
+
+CONFIGURATIONS = {
+    "float32": CollectionOptions(),
+    "float32-on-disk": CollectionOptions(on_disk_vectors=True),
+    "scalar": CollectionOptions(quantization="scalar"),
+    "scalar-on-disk": CollectionOptions(quantization="scalar", on_disk_vectors=True),
+    "binary-on-disk": CollectionOptions(quantization="binary", on_disk_vectors=True),
+    "scalar-on-disk-m8": CollectionOptions(quantization="scalar", on_disk_vectors=True, hnsw_m=8),
+}
+
+
+def estimate_ram_bytes(options: CollectionOptions, count: int, dim: int) -> int:
+    """
+    Estimates the RAM a collection needs for vectors and the HNSW graph.
+
+    On-disk vectors are memory-mapped and only count if they are hot in the
+    page cache, so they are left out; payloads are not included.
+    """
+    total = 0 if options.on_disk_vectors else count * dim * 4
+    if options.quantization == "scalar":
+        total += count * dim
+    elif options.quantization == "binary":
+        total += count * dim // 8
+    # Level 0 of the graph links every point to 2 * m neighbours (4-byte ids).
+    total += count * 2 * (options.hnsw_m or 16) * 4
+    return total
+
+
+def read_vectors(client: QdrantClient, collection_name: str, batch_size: int = 512):
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        yield points
+        if offset is None:
+            return
+
+
+def wait_until_indexed(client: QdrantClient, collection_name: str, timeout: float = 600):
+    """Waits until the optimizer is idle and every vector is in the HNSW graph."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = client.get_collection(collection_name)
+        if info.status == models.CollectionStatus.GREEN and (info.indexed_vectors_count or 0) >= (info.points_count or 0):
+            return
+        time.sleep(1)
+    raise TimeoutError(f"Collection '{collection_name}' was not indexed within {timeout}s.")
+
+
+def load_queries(args, source: QdrantClient) -> list:
+    """Embeds the questions in `--queries`, or samples stored vectors as queries."""
+    if args.queries:
+        from core.embeddings.registry import embedding_registry
+        with open(args.queries) as f:
+            questions = [line.strip() for line in f if line.strip()]
+        return embedding_registry.get(args.embedding_model).embed_documents(questions)
+    points, _ = source.scroll(collection_name=args.source_collection, limit=10 * args.num_queries, with_vectors=True)
+    return [point.vector for point in random.Random(0).sample(points, min(args.num_queries, len(points)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source-collection", required=True, help="Collection whose vectors are benchmarked.")
+    parser.add_argument("--source-path", help="Embedded storage path of the source collection.")
+    parser.add_argument("--source-url", help="Qdrant server URL of the source collection.")
+    parser.add_argument("--qdrant-url", required=True, help="Qdrant server used for the scratch collections.")
+    parser.add_argument("--queries", help="Text file with one question per line.")
+    parser.add_argument("--embedding-model", help="Embedding model used for --queries.")
+    parser.add_argument("--num-queries", type=int, default=100, help="Stored vectors sampled as queries without --queries.")
+    parser.add_argument("--k", type=int, default=10, help="Number of neighbours compared for recall.")
+    parser.add_argument("--hnsw-ef", type=int, nargs="*", default=[None, 64, 128], help="Search-time ef values to try.")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch collections.")
+    args = parser.parse_args(argv)
+    if args.queries and not args.embedding_model:
+        parser.error("--embedding-model is required with --queries")
+
+    source = QdrantClient(url=args.source_url) if args.source_url else QdrantClient(path=args.source_path)
+    target = QdrantClient(url=args.qdrant_url, timeout=120)
+    count = source.count(args.source_collection).count
+    queries = load_queries(args, source)
+    dim = len(queries[0])
+    print(f"{count} vectors of dimension {dim}, {len(queries)} queries, recall@{args.k}\n")
+
+    exact = None  # query index -> ids of the true nearest neighbours
+    print(f"{'configuration':<20} {'hnsw_ef':>7} {'est. RAM MB':>11} {'recall':>7} {'p50 ms':>7} {'p95 ms':>7}")
+    for name, options in CONFIGURATIONS.items():
+        collection_name = f"bench_{args.source_collection}_{name}"
+        if target.collection_exists(collection_name):
+            target.delete_collection(collection_name)
+        target.create_collection(
+            collection_name=collection_name,
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),
+            **options.create_kwargs(dim),
+        )
+        for points in read_vectors(source, args.source_collection):
+            target.upsert(
+                collection_name=collection_name,
+                points=[models.PointStruct(id=point.id, vector=point.vector) for point in points],
+                wait=True,
+            )
+        wait_until_indexed(target, collection_name)
+
+        if exact is None:
+            exact = [
+                {point.id for point in target.search(collection_name, vector, limit=args.k,
+                                                     search_params=search_params(exact=True))}
+                for vector in queries
+            ]
+
+        ram_mb = estimate_ram_bytes(options, count, dim) / 2**20
+        for hnsw_ef in args.hnsw_ef:
+            params = search_params(hnsw_ef=hnsw_ef)
+            latencies, hits = [], 0
+            for vector, truth in zip(queries, exact):
+                start = time.perf_counter()
+                points = target.search(collection_name, vector, limit=args.k, search_params=params)
+                latencies.append(1000 * (time.perf_counter() - start))
+                hits += len(truth & {point.id for point in points})
+            recall = hits / sum(len(truth) for truth in exact)
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+            print(f"{name:<20} {hnsw_ef or 'default':>7} {ram_mb:>11.1f} {recall:>7.3f} "
+                  f"{statistics.median(latencies):>7.2f} {p95:>7.2f}")
+
+        if not args.keep:
+            target.delete_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,14 @@ import streamlit as st
 import requests
 import json
 import time
-from langchain.document_loaders import PyMuPDFLoader
 from config import (
     API_BASE_URL, 
     EMBEDDING_MODEL, 
     GENERATION_MODEL, 
     RETRIEVAL_K, 
+    RETRIEVAL_SEARCH_TYPE, 
     EXISTING_COLLECTION, 
-    EXISTING_QDRANT_PATH, 
-    expand_query, 
-    format_prompt
+    EXISTING_QDRANT_PATH
 )
 
 st.title("RAG Chatbot")
@@ -31,26 +29,62 @@ for message in st.session_state.messages:
 # File uploader for documents
 uploaded_files = st.file_uploader("Attach documents (PDFs)", type=["pdf"], accept_multiple_files=True)
 
-# Function to process uploaded PDFs
-def process_uploaded_files(uploaded_files):
-    """Reads uploaded PDF files and extracts text + metadata."""
-    documents = []
-    for file in uploaded_files:
-        with open(file.name, "wb") as f:
-            f.write(file.getbuffer())
-        loader = PyMuPDFLoader(file.name)  # Load PDF
-        pages = loader.load()
+# Function to upload PDFs once and get back a collection id for later questions
+def upload_files(uploaded_files):
+    """Sends the uploaded PDFs to the API once per distinct set of files."""
+    upload_key = tuple(sorted(file.file_id for file in uploaded_files))
+    cached = st.session_state.get("uploaded_collection")
+    if cached and cached["key"] == upload_key:
+        return cached["collection_id"]
 
-        for page in pages:
-            documents.append({
-                "page_content": page.page_content,
-                "metadata": page.metadata
-            })
+    files = [("files", (file.name, file.getvalue(), "application/pdf")) for file in uploaded_files]
+    response = requests.post(
+        f"{API_BASE_URL}/documents/pdf",
+        files=files,
+        data={"embedding_model": EMBEDDING_MODEL}
+    )
+    response.raise_for_status()
+    collection_id = response.json()["collection_id"]
+    st.session_state.uploaded_collection = {"key": upload_key, "collection_id": collection_id}
+    return collection_id
 
-    return documents
+# Function to read the Server-Sent Events of the single-request RAG endpoint
+def stream_rag(payload):
+    """Yields (event, data) pairs from /rag/stream: the retrieved chunks, then answer tokens."""
+    with requests.post(f"{API_BASE_URL}/rag/stream", json=payload, stream=True) as response:
+        if response.status_code == 404:
+            raise FileNotFoundError(response.json().get("detail"))
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                event = None
+            elif line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+                if event == "error":
+                    raise RuntimeError(data.get("detail", "Generation failed."))
+                yield event, data
+                if event == "end":
+                    return
 
-# Process PDFs only if uploaded
-documents = process_uploaded_files(uploaded_files) if uploaded_files else []
+def open_rag_stream(payload):
+    """Starts the RAG stream and returns (retrieved docs, iterator over answer tokens)."""
+    events = stream_rag(payload)
+    event, data = next(events)
+    docs = data.get("docs", []) if event == "chunks" else []
+    tokens = (data["token"] for event, data in events if event is None)
+    return docs, tokens
+
+# Upload PDFs only if attached
+collection_id = None
+if uploaded_files:
+    with st.spinner("Indexing uploaded documents..."):
+        try:
+            collection_id = upload_files(uploaded_files)
+        except Exception as e:
+            st.error(f"❌ Document upload failed: {str(e)}")
 
 # User input for question
 if query := st.chat_input("Your question:"):
@@ -58,49 +92,48 @@ if query := st.chat_input("Your question:"):
     with st.chat_message("user"):
         st.markdown(query)
 
+    rag_payload = {
+        "collection_id": collection_id,
+        "query": query,
+        "existing_collection": EXISTING_COLLECTION,
+        "existing_qdrant_path": EXISTING_QDRANT_PATH,
+        "embedding_model": EMBEDDING_MODEL,
+        "generation_model": GENERATION_MODEL,
+        "k": RETRIEVAL_K,
+        "search_type": RETRIEVAL_SEARCH_TYPE
+    }
+    retrieved_docs, tokens = [], iter(())
     with st.spinner("Retrieving relevant documents..."):
         try:
-            retrieve_payload = {
-                "documents": documents,
-                "query": expand_query(query),
-                "existing_collection": EXISTING_COLLECTION,
-                "existing_qdrant_path": EXISTING_QDRANT_PATH,
-                "embedding_model": EMBEDDING_MODEL
-            }
-            retrieve_response = requests.post(f"{API_BASE_URL}/retrieve/", json=retrieve_payload)
-            retrieved_docs = retrieve_response.json().get("docs", []) if retrieve_response.status_code == 200 else []
+            try:
+                retrieved_docs, tokens = open_rag_stream(rag_payload)
+            except FileNotFoundError:
+                if not collection_id:
+                    raise
+                # The uploaded collection expired on the server; upload again and retry
+                st.session_state.pop("uploaded_collection", None)
+                rag_payload["collection_id"] = upload_files(uploaded_files)
+                retrieved_docs, tokens = open_rag_stream(rag_payload)
         except Exception as e:
-            retrieved_docs = []
-            st.error(f"❌ Retrieval API failed: {str(e)}")
+            st.error(f"❌ RAG API failed: {str(e)}")
 
-    # Show retrieved documents immediately
-    retrieved_text = "\n\n".join(doc["page_content"][:500] for doc in retrieved_docs)
+    # Show retrieved documents before the answer streams in
     if retrieved_docs:
         with st.chat_message("assistant"):
             st.markdown("### Retrieved Document Chunks:")
             for doc in retrieved_docs:
                 st.markdown(f"- {doc['page_content'][:500]}")
 
-    # Generate response using retrieved documents as context
-    with st.spinner("Generating response..."):
+    with st.chat_message("assistant"):
         try:
-            generate_payload = {
-                "prompt": format_prompt(retrieved_text, query),
-                "generation_model": GENERATION_MODEL
-            }
-            generate_response = requests.post(f"{API_BASE_URL}/generate/", json=generate_payload)
-            generated_answer = generate_response.json().get("answer", "") if generate_response.status_code == 200 else "⚠️ Failed to generate response."
+            generated_answer = st.write_stream(tokens)
         except Exception as e:
             generated_answer = "⚠️ Failed to generate response."
             st.error(f"❌ Generation API failed: {str(e)}")
 
-    # Display AI-generated response
     assistant_message = {
         "role": "assistant",
         "content": generated_answer,
         "chunks": [doc["page_content"][:500] for doc in retrieved_docs]
     }
     st.session_state.messages.append(assistant_message)
-
-    with st.chat_message("assistant"):
-        st.markdown(generated_answer)
@@ -1,5 +1,3 @@
-import textwrap
-
 # API Base URL
 API_BASE_URL = "http://localhost:8000/api"
 
@@ -14,23 +12,4 @@ EXISTING_QDRANT_PATH = "data/vector_stores/rubin_qdrant"
 
 # Retrieval Settings
 RETRIEVAL_K = 2  # Number of relevant documents to retrieve
-
-# Expand query with synonyms or additional keywords
-def expand_query(query: str) -> str:
-    """Modify query for better retrieval."""
-    if "Rubin" in query:
-        query += " LSST Large Synoptic Survey Telescope"
-    return query
-
-# Prompt template for generation
-def format_prompt(context: str, question: str) -> str:
-    """Format the retrieval context into the final prompt."""
-    return textwrap.dedent(f"""
-    You are an astrophysics expert with a focus on the Rubin telescope project 
-    (formerly known as Large Synoptic Survey Telescope - LSST). Please answer the 
-    question on astrophysics based on the following context:
-
-    {context}
-
-    Question: {question}
-    """)
+RETRIEVAL_SEARCH_TYPE = "mmr"  # "mmr" for diverse results, "similarity" for the fastest search, "hybrid" for keyword + dense
@@ -0,0 +1,38 @@
+import pytest
+from core.generator.answer_cache import SemanticAnswerCache
+
+NAMESPACE = ("rubin_telescope", 1.0, "generation-model", "embedding-model")
+
+def test_near_duplicate_question_hits():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store(NAMESPACE, [1.0, 0.0, 0.0], "What is DP0.2?", "A data preview.")
+
+    hit = cache.lookup(NAMESPACE, [0.95, 0.05, 0.0])
+    assert hit["answer"] == "A data preview."
+    assert cache.lookup(NAMESPACE, [0.0, 1.0, 0.0]) is None
+    # Other models or collections do not share answers
+    assert cache.lookup(("other", 1.0, "generation-model", "embedding-model"), [1.0, 0.0, 0.0]) is None
+
+def test_new_collection_version_invalidates_answers():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store(NAMESPACE, [1.0, 0.0], "q", "old answer")
+
+    reindexed = ("rubin_telescope", 2.0, *NAMESPACE[2:])
+    assert cache.lookup(reindexed, [1.0, 0.0]) is None
+    assert len(cache) == 0
+
+def test_ttl_and_lru_eviction():
+    cache = SemanticAnswerCache(threshold=0.9, max_entries=2)
+    cache.store(NAMESPACE, [1.0, 0.0, 0.0], "a", "A")
+    cache.store(NAMESPACE, [0.0, 1.0, 0.0], "b", "B")
+    cache.lookup(NAMESPACE, [1.0, 0.0, 0.0])
+    cache.store(NAMESPACE, [0.0, 0.0, 1.0], "c", "C")
+    assert cache.lookup(NAMESPACE, [0.0, 1.0, 0.0]) is None
+    assert cache.lookup(NAMESPACE, [1.0, 0.0, 0.0])["answer"] == "A"
+
+    expired = SemanticAnswerCache(threshold=0.9, ttl_seconds=0)
+    expired.store(NAMESPACE, [1.0, 0.0], "q", "answer")
+    assert expired.lookup(NAMESPACE, [1.0, 0.0]) is None
+
+if __name__ == "__main__":
+    pytest.main()
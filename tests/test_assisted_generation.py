@@ -0,0 +1,104 @@
+import types
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from core.generator import language_model
+from core.generator.language_model import LanguageModel
+
+class FakeTokenizer:
+    pad_token_id = 0
+
+    def __init__(self, vocab=None):
+        self.vocab = vocab or {"a": 0, "b": 1}
+
+    def get_vocab(self):
+        return self.vocab
+
+class FakeLLM:
+    def __init__(self, model):
+        self.model = model
+        self.kwargs = None
+
+    def generate(self, input_ids, **kwargs):
+        # Three verification rounds over ten draft tokens produce twelve new tokens
+        self.kwargs = kwargs
+        for _ in range(3):
+            self.model._count_forward("rounds")
+        for _ in range(10):
+            self.model._count_forward("proposed")
+        return torch.zeros((1, input_ids.shape[1] + 12), dtype=torch.long)
+
+def test_assisted_generation_reports_acceptance_rate():
+    model = LanguageModel("main", generation_config={"assistant_model": "draft", "max_new_tokens": 16})
+    model.tokenizer = FakeTokenizer()
+    model.llm = FakeLLM(model)
+    model.assistant = object()
+
+    model._run_generate({"input_ids": torch.zeros((1, 5), dtype=torch.long)}, decoding="greedy")
+    assert model.llm.kwargs["assistant_model"] is model.assistant
+    stats = model.assisted_stats()
+    assert stats["accepted"] == 9 and stats["proposed"] == 10
+    assert stats["acceptance_rate"] == 0.9 and stats["tokens_per_round"] == 4.0
+
+    # Batches are generated without the draft model, and not counted
+    model._run_generate({"input_ids": torch.zeros((2, 5), dtype=torch.long)}, decoding="greedy")
+    assert "assistant_model" not in model.llm.kwargs
+    assert model.assisted_stats()["generations"] == 1
+
+class FakeCausalLM(torch.nn.Module):
+    """Module whose `generate` runs real forward passes, like assisted decoding does."""
+
+    def __init__(self, rounds=0, draft_tokens=0, accepted=0):
+        super().__init__()
+        self.linear = torch.nn.Linear(1, 1)
+        self.generation_config = types.SimpleNamespace()
+        self.device = torch.device("cpu")
+        self.rounds, self.draft_tokens, self.accepted = rounds, draft_tokens, accepted
+
+    def forward(self, x):
+        return self.linear(x)
+
+    def generate(self, input_ids, assistant_model=None, **kwargs):
+        x = torch.zeros(1, 1)
+        for _ in range(self.rounds):
+            for _ in range(self.draft_tokens):
+                assistant_model(x)
+            self(x)
+        return torch.zeros((1, input_ids.shape[1] + self.accepted + self.rounds), dtype=torch.long)
+
+def load_with_draft(monkeypatch, draft_vocab=None):
+    draft = FakeCausalLM()
+    monkeypatch.setattr(language_model, "AutoTokenizer",
+                        types.SimpleNamespace(from_pretrained=lambda *args, **kwargs: FakeTokenizer(draft_vocab)))
+    monkeypatch.setattr(language_model, "AutoModelForCausalLM",
+                        types.SimpleNamespace(from_pretrained=lambda *args, **kwargs: draft))
+    model = LanguageModel("main", generation_config={"assistant_model": "draft", "num_assistant_tokens": 4})
+    model.tokenizer = FakeTokenizer()
+    # Three rounds of four draft tokens, seven of which are accepted
+    model.llm = FakeCausalLM(rounds=3, draft_tokens=4, accepted=7)
+    model.load_assistant_model()
+    return model, draft
+
+def test_forward_hooks_count_rounds_and_draft_tokens(monkeypatch):
+    model, draft = load_with_draft(monkeypatch)
+    assert model.assistant is draft
+    assert draft.generation_config.num_assistant_tokens == 4
+
+    # Forward passes outside an assisted generation, e.g. prefix caching, are not counted
+    model.llm(torch.zeros(1, 1))
+    draft(torch.zeros(1, 1))
+
+    model._run_generate({"input_ids": torch.zeros((1, 5), dtype=torch.long)}, decoding="greedy")
+    stats = model.assisted_stats()
+    assert (stats["rounds"], stats["proposed"], stats["accepted"], stats["new_tokens"]) == (3, 12, 7, 10)
+
+    # Each generation adds its own forward passes
+    model._run_generate({"input_ids": torch.zeros((1, 5), dtype=torch.long)}, decoding="greedy")
+    assert model.assisted_stats()["proposed"] == 24
+
+def test_draft_model_with_another_tokenizer_is_not_used(monkeypatch):
+    model, _ = load_with_draft(monkeypatch, draft_vocab={"other": 0})
+    assert model.assistant is None
+    assert model.assisted_stats() is None
@@ -0,0 +1,49 @@
+import sys
+import types
+import pytest
+from core import config
+from core.generator import backends
+from core.generator.llama_cpp_model import LlamaCppModel
+
+class FakeLlama:
+    def __init__(self, model_path, **kwargs):
+        self.model_path = model_path
+        self.kwargs = kwargs
+        self.calls = []
+
+    def create_completion(self, prompt, stream=False, **kwargs):
+        self.calls.append(kwargs)
+        if stream:
+            return iter([{"choices": [{"text": "a "}]}, {"choices": [{"text": "b"}]}])
+        return {"choices": [{"text": f"<{prompt}>"}]}
+
+@pytest.fixture
+def fake_llama_cpp(monkeypatch):
+    monkeypatch.setitem(sys.modules, "llama_cpp", types.SimpleNamespace(Llama=FakeLlama))
+
+def test_backend_is_selected_per_model(monkeypatch, fake_llama_cpp, tmp_path):
+    gguf = tmp_path / "model.gguf"
+    gguf.write_bytes(b"0" * 10)
+    monkeypatch.setattr(config, "GENERATION_MODEL_CONFIGS", {
+        "cpu-model": {"backend": "llama_cpp", "model_path": str(gguf), "n_threads": 3},
+        "bad-model": {"backend": "onnx"},
+    })
+    assert backends.model_settings("other")["backend"] == config.GENERATION_BACKEND
+
+    model = backends.load_language_model("cpu-model")
+    assert isinstance(model, LlamaCppModel)
+    assert model.llm.kwargs["n_threads"] == 3 and model.llm.kwargs["n_threads_batch"] == 3
+    assert model.memory_footprint() == 10
+
+    with pytest.raises(ValueError):
+        backends.load_language_model("bad-model")
+
+def test_llama_cpp_generation(fake_llama_cpp):
+    model = LlamaCppModel("m", model_path="model.gguf")
+    model.load_language_model()
+
+    assert model.batch_inference(["x", "y"], decoding="greedy") == ["<x>", "<y>"]
+    assert all(call["temperature"] == 0.0 and "seed" not in call for call in model.llm.calls)
+
+    assert "".join(model.stream("x", seed=7)) == "a b"
+    assert model.llm.calls[-1]["seed"] == 7
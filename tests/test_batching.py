@@ -0,0 +1,104 @@
+import threading
+import time
+import pytest
+from core.generator.batching import BatchScheduler
+
+class RecordingBatchFn:
+    def __init__(self, delay=0.0, fail=False):
+        self.batches = []
+        self.delay = delay
+        self.fail = fail
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model failed")
+        return [item.upper() for item in items]
+
+def submit_all(scheduler, items):
+    return [scheduler.submit(item) for item in items]
+
+def test_batches_up_to_max_batch_size():
+    batch_fn = RecordingBatchFn()
+    scheduler = BatchScheduler(batch_fn, max_batch_size=3, max_wait_ms=200)
+    futures = submit_all(scheduler, ["a", "b", "c", "d", "e"])
+    assert [future.result(timeout=2) for future in futures] == ["A", "B", "C", "D", "E"]
+    assert batch_fn.batches == [["a", "b", "c"], ["d", "e"]]
+    assert scheduler.stats()["batch_sizes"] == {2: 1, 3: 1}
+    scheduler.close()
+
+def test_runs_partial_batch_after_max_wait():
+    batch_fn = RecordingBatchFn()
+    scheduler = BatchScheduler(batch_fn, max_batch_size=8, max_wait_ms=20)
+    start = time.perf_counter()
+    assert scheduler.infer("a", timeout=2) == "A"
+    assert time.perf_counter() - start < 1
+    assert batch_fn.batches == [["a"]]
+    scheduler.close()
+
+def test_failure_propagates_to_every_request_in_the_batch():
+    scheduler = BatchScheduler(RecordingBatchFn(fail=True), max_batch_size=4, max_wait_ms=100)
+    futures = submit_all(scheduler, ["a", "b"])
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(timeout=2)
+    assert scheduler.stats()["failed_batches"] == 1
+    scheduler.close()
+
+def test_wrong_number_of_outputs_fails_the_batch():
+    scheduler = BatchScheduler(lambda items: items[:1], max_batch_size=4, max_wait_ms=100)
+    futures = submit_all(scheduler, ["a", "b"])
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=2)
+    scheduler.close()
+
+def test_different_keys_never_share_a_batch():
+    batch_fn = RecordingBatchFn()
+    scheduler = BatchScheduler(batch_fn, max_batch_size=8, max_wait_ms=50, key_fn=lambda item: item[0])
+    futures = submit_all(scheduler, ["x1", "y1", "x2", "y2", "x3"])
+    assert [future.result(timeout=2) for future in futures] == ["X1", "Y1", "X2", "Y2", "X3"]
+    assert all(len({item[0] for item in batch}) == 1 for batch in batch_fn.batches)
+    assert batch_fn.batches == [["x1", "x2", "x3"], ["y1", "y2"]]
+    scheduler.close()
+
+def test_deferred_requests_are_served_first_and_in_order():
+    batch_fn = RecordingBatchFn()
+    scheduler = BatchScheduler(batch_fn, max_batch_size=2, max_wait_ms=50, key_fn=lambda item: item[0])
+    # y1 and y2 are set aside while the x batch fills up, y3 is still queued after it
+    futures = submit_all(scheduler, ["x1", "y1", "y2", "x2", "y3"])
+    for future in futures:
+        future.result(timeout=2)
+    assert batch_fn.batches == [["x1", "x2"], ["y1", "y2"], ["y3"]]
+    scheduler.close()
+
+def test_close_finishes_queued_requests_and_rejects_new_ones():
+    batch_fn = RecordingBatchFn(delay=0.02)
+    scheduler = BatchScheduler(batch_fn, max_batch_size=2, max_wait_ms=10)
+    futures = submit_all(scheduler, ["a", "b", "c"])
+    scheduler.close()
+    assert [future.result(timeout=2) for future in futures] == ["A", "B", "C"]
+    scheduler._thread.join(timeout=2)
+    assert not scheduler._thread.is_alive()
+    with pytest.raises(RuntimeError):
+        scheduler.submit("d")
+
+def test_concurrent_callers_share_batches():
+    batch_fn = RecordingBatchFn(delay=0.02)
+    scheduler = BatchScheduler(batch_fn, max_batch_size=4, max_wait_ms=50)
+    results = {}
+    def call(i):
+        results[i] = scheduler.infer(f"q{i}", timeout=5)
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {i: f"Q{i}" for i in range(8)}
+    assert all(len(batch) <= 4 for batch in batch_fn.batches)
+    assert len(batch_fn.batches) < 8
+    scheduler.close()
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,53 @@
+import pytest
+from types import SimpleNamespace
+from core.retriever.bm25 import BM25Index, LexicalIndexRegistry, tokenize
+
+def test_tokenize_keeps_identifiers_whole_and_split():
+    terms = tokenize("The DP0.2 release of the Butler")
+    assert "dp0.2" in terms
+    assert "dp0" in terms and "2" in terms
+    assert "butler" in terms
+    assert "the" not in terms
+
+def test_search_ranks_exact_identifier_matches_first():
+    index = BM25Index()
+    index.add("a", "Data Preview 0.2 (DP0.2) uses the Butler to access data.")
+    index.add("b", "The telescope observes the southern sky every night.")
+    index.add("c", "LSST data products are described in the data release notes.")
+
+    results = index.search("How do I use the Butler with DP0.2?", k=2)
+    assert results[0][0] == "a"
+    assert all(doc_id != "b" for doc_id, _ in results)
+
+def test_remove_and_persist(tmp_path):
+    index = BM25Index()
+    index.add("a", "Rubin Observatory camera")
+    index.add("b", "Rubin Observatory mirror")
+    index.remove("a")
+    assert [doc_id for doc_id, _ in index.search("camera")] == []
+
+    path = tmp_path / "index.bm25.json.gz"
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert len(loaded) == 1
+    assert loaded.search("mirror") == index.search("mirror")
+
+class FakeClient:
+    def __init__(self, points):
+        self.points = points
+
+    def scroll(self, collection_name, limit, offset, with_payload, with_vectors):
+        return [SimpleNamespace(id=id_, payload={"page_content": text}) for id_, text in self.points.items()], None
+
+def test_registry_rebuilds_collections_without_sidecar_after_invalidate():
+    registry = LexicalIndexRegistry()
+    client = FakeClient({"old": "Rubin camera"})
+    assert registry.get(client, ":memory:", "docs_x").search("camera")[0][0] == "old"
+
+    client.points = {"new": "Rubin camera"}
+    assert registry.get(client, ":memory:", "docs_x").search("camera")[0][0] == "old"
+    registry.invalidate(":memory:", "docs_x")
+    assert registry.get(client, ":memory:", "docs_x").search("camera")[0][0] == "new"
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,46 @@
+import pytest
+from qdrant_client.http import models
+from core.retriever.collection_options import CollectionOptions, search_params
+
+def test_defaults_create_plain_float32_collection():
+    kwargs = CollectionOptions().create_kwargs(384)
+    assert kwargs["vectors_config"].size == 384
+    assert kwargs["vectors_config"].on_disk is None
+    assert kwargs["quantization_config"] is None
+    assert kwargs["hnsw_config"] is None
+
+def test_scalar_quantization_with_vectors_on_disk():
+    kwargs = CollectionOptions(quantization="scalar", on_disk_vectors=True, hnsw_m=8).create_kwargs(384)
+    assert kwargs["vectors_config"].on_disk is True
+    assert kwargs["quantization_config"].scalar.type == models.ScalarType.INT8
+    assert kwargs["quantization_config"].scalar.always_ram is True
+    assert kwargs["hnsw_config"].m == 8
+
+def test_update_only_sends_settings_given():
+    kwargs = CollectionOptions(hnsw_m=8).update_kwargs()
+    assert kwargs == {"hnsw_config": models.HnswConfigDiff(m=8)}
+
+def test_update_disables_quantization_only_when_asked():
+    kwargs = CollectionOptions(quantization="none", on_disk_vectors=False).update_kwargs()
+    assert kwargs["quantization_config"] == models.Disabled.DISABLED
+    assert kwargs["vectors_config"][""].on_disk is False
+    assert "collection_params" not in kwargs
+
+    kwargs = CollectionOptions(quantization="binary", on_disk_payload=True).update_kwargs()
+    assert kwargs["quantization_config"].binary.always_ram is True
+    assert kwargs["collection_params"].on_disk_payload is True
+    assert "vectors_config" not in kwargs
+
+def test_unknown_quantization_is_rejected():
+    with pytest.raises(ValueError):
+        CollectionOptions(quantization="pq")
+
+def test_search_params_only_when_set():
+    assert search_params() is None
+    params = search_params(hnsw_ef=128, rescore=True, oversampling=2.0)
+    assert params.hnsw_ef == 128
+    assert params.quantization.rescore is True
+    assert params.quantization.oversampling == 2.0
+
+if __name__ == "__main__":
+    pytest.main()
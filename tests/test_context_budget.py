@@ -0,0 +1,38 @@
+from langchain_core.documents import Document
+from core.generator.context_budget import ContextBudgeter, context_budget, sentence_ends
+
+def count_words(texts):
+    return [len(text.split()) for text in texts]
+
+def test_sentence_ends_keep_text_as_written():
+    text = "One two. Three four!\n\nFive six"
+    assert [text[:end] for end in sentence_ends(text)] == ["One two.", "One two. Three four!", text]
+
+def test_packs_best_chunks_and_trims_at_sentences():
+    budgeter = ContextBudgeter(count_words, min_trim_tokens=2)
+    docs = [
+        Document(page_content="a b c d", metadata={"rank": 1}),
+        Document(page_content="One two three. Four five six. Seven eight nine.", metadata={"rank": 2}),
+        Document(page_content="x y z", metadata={"rank": 3}),
+    ]
+    packed, info = budgeter.pack(docs, 10)
+
+    assert [doc.metadata["rank"] for doc in packed] == [1, 2]
+    assert packed[1].page_content == "One two three. Four five six."
+    assert packed[1].metadata["trimmed"]
+    assert info == {"budget_tokens": 10, "context_tokens": 10, "chunks": 2, "dropped": 1, "trimmed": 1}
+
+def test_skips_chunks_without_a_fitting_sentence():
+    budgeter = ContextBudgeter(count_words, min_trim_tokens=2)
+    docs = [Document(page_content="a b c d e f"), Document(page_content="g h")]
+    packed, info = budgeter.pack(docs, 3)
+    assert [doc.page_content for doc in packed] == ["g h"]
+
+def test_budget_leaves_room_for_prompt_and_answer():
+    class Model:
+        def context_length(self):
+            return 4096
+        def max_new_tokens(self):
+            return 512
+    assert context_budget(Model(), reserved_tokens=100, max_tokens=8000) == 3484
+    assert context_budget(Model(), reserved_tokens=100, max_tokens=1000) == 1000
@@ -0,0 +1,56 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L12-v2"
+
+sample_documents = [
+    {
+        "page_content": "The Vera C. Rubin Observatory will carry out the Legacy Survey of Space and Time.",
+        "metadata": {"source": "doc1"}
+    },
+    {
+        "page_content": "Data Preview 0.2 gives early access to simulated LSST data products.",
+        "metadata": {"source": "doc2"}
+    }
+]
+
+def test_upload_then_retrieve_by_collection_id():
+    """
+    Documents are uploaded once and later queries only send the collection id.
+    """
+    response = client.post("/api/documents/", json={
+        "documents": sample_documents,
+        "embedding_model": EMBEDDING_MODEL
+    })
+    assert response.status_code == 200
+    collection_id = response.json()["collection_id"]
+    assert response.json()["num_documents"] == len(sample_documents)
+
+    # Uploading the same documents again maps to the same collection
+    again = client.post("/api/documents/", json={
+        "documents": sample_documents[::-1],
+        "embedding_model": EMBEDDING_MODEL
+    })
+    assert again.json()["collection_id"] == collection_id
+
+    response = client.post("/api/retrieve/", json={
+        "collection_id": collection_id,
+        "query": "What is Data Preview 0.2?",
+        "embedding_model": EMBEDDING_MODEL
+    })
+    assert response.status_code == 200
+    assert len(response.json()["docs"]) > 0
+
+def test_retrieve_unknown_collection_id():
+    response = client.post("/api/retrieve/", json={
+        "collection_id": "docs_unknown",
+        "query": "What is LSST?",
+        "embedding_model": EMBEDDING_MODEL
+    })
+    assert response.status_code == 404
+
+if __name__ == "__main__":
+    pytest.main()
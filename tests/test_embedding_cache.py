@@ -0,0 +1,73 @@
+import itertools
+import types
+import pytest
+from core.embeddings import cache as cache_module
+from core.embeddings.cache import CachedEmbeddings, EmbeddingCache, content_hash
+
+class FakeEmbedder:
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[len(text) * self.scale, 0.5] for text in texts]
+
+    def embed_query(self, text):
+        return [len(text) * self.scale, 1.0]
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Every write and lookup gets a later timestamp, so LRU order is well defined
+    ticks = itertools.count(1)
+    monkeypatch.setattr(cache_module, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+def test_only_missing_documents_are_embedded(tmp_path):
+    embedder = FakeEmbedder()
+    embeddings = CachedEmbeddings(embedder, EmbeddingCache(tmp_path / "cache.sqlite"), "model")
+
+    first = embeddings.embed_documents(["a", "bb", "a"])
+    assert first == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    assert embedder.calls == [["a", "bb"]]
+
+    assert embeddings.embed_documents(["bb", "ccc"]) == [[2.0, 0.5], [3.0, 0.5]]
+    assert embedder.calls[-1] == ["ccc"]
+    stats = embeddings.cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+
+def test_queries_are_not_cached(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    embeddings = CachedEmbeddings(FakeEmbedder(), cache, "model")
+    assert embeddings.embed_query("abc") == [3.0, 1.0]
+    assert cache.get_many("model", [content_hash("abc")]) == {}
+
+def test_vectors_are_namespaced_by_model(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    small, large = FakeEmbedder(1.0), FakeEmbedder(10.0)
+    CachedEmbeddings(small, cache, "small").embed_documents(["abc"])
+
+    assert CachedEmbeddings(large, cache, "large").embed_documents(["abc"]) == [[30.0, 0.5]]
+    assert large.calls == [["abc"]]
+    assert CachedEmbeddings(small, cache, "small").embed_documents(["abc"]) == [[3.0, 0.5]]
+    assert len(small.calls) == 1
+
+def test_evicts_least_recently_used_vectors(tmp_path, clock):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_entries=2)
+    cache.put_many("model", {"a": [1.0]})
+    cache.put_many("model", {"b": [2.0]})
+    cache.get_many("model", ["a"])
+    cache.put_many("model", {"c": [3.0]})
+
+    assert cache.get_many("model", ["a", "b", "c"]) == {"a": [1.0], "c": [3.0]}
+    assert cache.stats()["evictions"] == 1
+
+def test_cache_survives_restart(tmp_path):
+    EmbeddingCache(tmp_path / "cache.sqlite").put_many("model", {content_hash("text"): [0.25, 0.5]})
+
+    embedder = FakeEmbedder()
+    embeddings = CachedEmbeddings(embedder, EmbeddingCache(tmp_path / "cache.sqlite"), "model")
+    assert embeddings.embed_documents(["text"]) == [[0.25, 0.5]]
+    assert embedder.calls == []
+
+if __name__ == "__main__":
+    pytest.main()
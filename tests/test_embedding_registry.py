@@ -0,0 +1,112 @@
+import threading
+import time
+import pytest
+from core.embeddings.registry import EmbeddingModelRegistry, estimate_model_bytes
+
+class FakeTensor:
+    def __init__(self, n):
+        self.n = n
+
+    def numel(self):
+        return self.n
+
+    def element_size(self):
+        return 4
+
+class FakeModule:
+    def __init__(self, params):
+        self.params = params
+
+    def parameters(self):
+        return [FakeTensor(self.params)]
+
+    def buffers(self):
+        return []
+
+class FakeEmbedding:
+    def __init__(self, name, params):
+        self.name = name
+        self.client = FakeModule(params)
+
+def make_registry(sizes=None, **kwargs):
+    loads = []
+    def loader(name, device):
+        loads.append(name)
+        time.sleep(0.05)
+        return FakeEmbedding(name, (sizes or {}).get(name, 256))
+    return EmbeddingModelRegistry(loader=loader, **kwargs), loads
+
+def loaded(registry):
+    return [entry["model_name"] for entry in registry.stats()["loaded"]]
+
+def test_estimates_parameter_memory():
+    assert estimate_model_bytes(FakeEmbedding("a", 100)) == 400
+    assert estimate_model_bytes(object()) == 0
+
+def test_concurrent_first_requests_load_once():
+    registry, loads = make_registry()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("a"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["a"]
+    assert all(embedding is results[0] for embedding in results)
+    assert registry.stats()["misses"] == 4
+
+def test_failed_load_reaches_waiters_and_can_be_retried():
+    attempts = []
+    def loader(name, device):
+        attempts.append(name)
+        time.sleep(0.05)
+        if len(attempts) == 1:
+            raise OSError("download failed")
+        return FakeEmbedding(name, 1)
+    registry = EmbeddingModelRegistry(loader=loader)
+    errors = []
+    def get():
+        try:
+            registry.get("a")
+        except OSError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=get) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3 and attempts == ["a"]
+    assert registry.get("a").name == "a"
+    assert registry.stats()["load_errors"] == 1
+
+def test_evicts_least_recently_used_model():
+    registry, loads = make_registry(max_models=2)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")
+    assert loaded(registry) == ["a", "c"]
+    registry.get("b")
+    assert loads == ["a", "b", "c", "b"]
+    assert registry.stats()["evictions"] == 2
+
+def test_evicts_to_stay_within_memory_budget():
+    # Sizes are in parameters of 4 bytes each
+    registry, _ = make_registry({"a": 100, "b": 100, "c": 150, "huge": 1000}, memory_budget_bytes=1000)
+    registry.get("a")
+    registry.get("b")
+    assert loaded(registry) == ["a", "b"]
+    registry.get("c")
+    assert loaded(registry) == ["b", "c"]
+    # The most recently used model stays loaded even if it alone exceeds the budget
+    registry.get("huge")
+    assert loaded(registry) == ["huge"]
+
+def test_models_are_keyed_by_device():
+    registry, loads = make_registry()
+    assert registry.get("a", "cpu") is not registry.get("a", "cuda")
+    assert registry.get("a", "cpu") is registry.get("a", "cpu")
+    assert loads == ["a", "a"]
+
+if __name__ == "__main__":
+    pytest.main()
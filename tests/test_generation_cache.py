@@ -0,0 +1,28 @@
+import pytest
+from core.generator.generation_cache import InMemoryGenerationCache, SQLiteGenerationCache, generation_key
+
+def test_key_depends_on_model_prompt_and_settings():
+    key = generation_key("model", "prompt", {"decoding": "greedy", "seed": None})
+    assert key == generation_key("model", "prompt", {"seed": None, "decoding": "greedy"})
+    assert key != generation_key("other-model", "prompt", {"decoding": "greedy", "seed": None})
+    assert key != generation_key("model", "prompt!", {"decoding": "greedy", "seed": None})
+    assert key != generation_key("model", "prompt", {"decoding": "sample", "seed": 1})
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_lru_eviction(backend, tmp_path):
+    cache = InMemoryGenerationCache(2) if backend == "memory" else SQLiteGenerationCache(tmp_path / "cache.sqlite", 2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["evictions"] == 1
+
+def test_sqlite_cache_survives_restart(tmp_path):
+    SQLiteGenerationCache(tmp_path / "cache.sqlite").put("key", "answer")
+    assert SQLiteGenerationCache(tmp_path / "cache.sqlite").get("key") == "answer"
+
+if __name__ == "__main__":
+    pytest.main()
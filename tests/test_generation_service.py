@@ -0,0 +1,120 @@
+import threading
+import time
+import pytest
+from app.services import generation_service, rag_service
+from app.services.inference_worker import InferenceWorker
+from core import config
+from core.generator.answer_cache import SemanticAnswerCache
+from core.generator.generation_cache import InMemoryGenerationCache
+from core.generator.llama_cpp_model import TextQueueStreamer
+from core.generator.model_manager import ModelManager
+
+class FakeModel:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+        self.generation_config = {"max_new_tokens": 8}
+
+    def memory_footprint(self):
+        return 0
+
+    def decoding_kwargs(self, decoding="sample"):
+        return {"max_new_tokens": self.generation_config["max_new_tokens"], "do_sample": decoding == "sample"}
+
+    def _generate(self):
+        with self._lock:
+            self.active += 1
+            self.calls += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+
+    def batch_inference(self, prompts, decoding="sample", seed=None):
+        self._generate()
+        return [prompt.upper() for prompt in prompts]
+
+    def stream(self, prompt, launch=None, decoding="sample", seed=None):
+        streamer = TextQueueStreamer()
+        def run():
+            try:
+                self._generate()
+                streamer.put(prompt.upper())
+            finally:
+                streamer.end()
+        launch(run)
+        return streamer
+
+@pytest.fixture
+def service(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(generation_service, "model_manager", ModelManager(["m"], loader=lambda name: model))
+    monkeypatch.setattr(generation_service, "generation_worker", InferenceWorker(max_workers=4, max_queue=8))
+    monkeypatch.setattr(generation_service, "SCHEDULERS", {})
+    monkeypatch.setattr(generation_service, "GENERATION_LOCKS", {})
+    yield model
+    for scheduler in generation_service.SCHEDULERS.values():
+        scheduler.close()
+
+def test_streams_and_batches_never_generate_concurrently(service):
+    results = []
+    def stream(i):
+        results.append("".join(generation_service.stream_answer(f"s{i}", "m")))
+    def batch(i):
+        results.append(generation_service.generate_answer(f"b{i}", "m")["answer"])
+    threads = [threading.Thread(target=fn, args=(i,)) for i in range(3) for fn in (stream, batch)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == ["B0", "B1", "B2", "S0", "S1", "S2"]
+    assert service.calls >= 4
+    assert service.max_active == 1
+
+def test_generation_cache_key_covers_model_settings(service, monkeypatch):
+    monkeypatch.setattr(generation_service, "generation_cache", InMemoryGenerationCache(16))
+    monkeypatch.setattr(config, "GENERATION_MODEL_CONFIGS", {})
+    generation_service.generate_answer("p", "m", decoding="greedy")
+    assert generation_service.cached_generation("p", "m", decoding="greedy") == "P"
+    assert generation_service.cached_generation("p", "m", decoding="sample", seed=1) is None
+
+    service.generation_config["max_new_tokens"] = 16
+    assert generation_service.cached_generation("p", "m", decoding="greedy") is None
+    service.generation_config["max_new_tokens"] = 8
+    monkeypatch.setattr(config, "GENERATION_MODEL_CONFIGS", {"m": {"backend": "llama_cpp", "model_path": "m.gguf"}})
+    assert generation_service.cached_generation("p", "m", decoding="greedy") is None
+
+class FakeEmbeddingRegistry:
+    def get(self, model_name):
+        return self
+
+    def embed_query(self, text):
+        return [1.0, float(len(text))]
+
+def test_answer_cache_is_keyed_on_the_request_options(monkeypatch):
+    monkeypatch.setattr(generation_service, "answer_cache", SemanticAnswerCache(threshold=0.99))
+    monkeypatch.setattr(generation_service, "embedding_registry", FakeEmbeddingRegistry())
+    monkeypatch.setattr(generation_service, "collection_version", lambda path, collection: "v1")
+    def lookup(decoding="sample", seed=None, use_cache=True, **options):
+        kwargs = {"collection_id": "docs", "k": 4, "search_type": "similarity", "rerank": None, **options}
+        return rag_service._lookup("Where is Rubin?", "m", "e", decoding, seed, use_cache, kwargs)
+
+    hit, remember = lookup()
+    assert hit is None
+    remember("In Chile.", [])
+    assert lookup()[0]["answer"] == "In Chile."
+    assert lookup(k=8)[0] is None
+    assert lookup(search_type="hybrid")[0] is None
+    assert lookup(rerank={"rerank_top_n": 2, "rerank_budget_ms": None, "rerank_model": None})[0] is None
+    # Deterministic requests and use_cache=False neither read nor write the cache
+    for kwargs in ({"decoding": "greedy"}, {"seed": 1}, {"use_cache": False}):
+        hit, remember = lookup(**kwargs)
+        assert hit is None
+        remember("Elsewhere.", [])
+    assert lookup()[0]["answer"] == "In Chile."
+
+if __name__ == "__main__":
+    pytest.main()
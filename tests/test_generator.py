@@ -1,3 +1,4 @@
+import json
 import pytest
 import httpx
 from fastapi.testclient import TestClient
@@ -28,5 +29,23 @@ def test_generate_endpoint(prompt, generation_model, expected_status):
 
     print(f"✅ Test passed for prompt: {prompt}")
 
+def test_generate_stream_endpoint():
+    """
+    Test that the streaming endpoint emits token events followed by an end event.
+    """
+    payload = {
+        "prompt": "What is the capital of France?",
+        "generation_model": "allenai/OLMo-2-1124-7B-Instruct"
+    }
+
+    with client.stream("POST", "/api/generate/stream", json=payload) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        lines = [line for line in response.iter_lines() if line]
+
+    tokens = [json.loads(line[len("data:"):])["token"] for line in lines[:-2]]
+    assert len(tokens) > 0
+    assert lines[-2] == "event: end"
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import pytest
+from langchain_core.documents import Document
+from core.ingestion import manifest as manifest_module
+from core.ingestion import pipeline
+from core.ingestion.manifest import Manifest
+from core.ingestion.pipeline import IngestionPipeline
+from core.retriever.store_manager import VectorStoreManager
+
+class FakeEmbedding:
+    model_name = "fake"
+
+    def embed_query(self, text):
+        digest = hashlib.sha256(text.encode()).digest()
+        return [byte / 255 for byte in digest[:4]]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+class FakeRegistry:
+    def get(self, name):
+        return FakeEmbedding()
+
+def fake_parse(paths, workers=None, max_pending=None):
+    # One page per line, so "PDFs" are plain text files
+    for path in paths:
+        with open(path) as f:
+            yield path, [Document(page_content=line, metadata={"source": path}) for line in f.read().splitlines()]
+
+@pytest.fixture
+def make_pipeline(monkeypatch, tmp_path):
+    monkeypatch.setattr(pipeline, "embedding_registry", FakeRegistry())
+    monkeypatch.setattr(pipeline, "store_manager", VectorStoreManager())
+    monkeypatch.setattr(pipeline, "iter_parsed", fake_parse)
+    # In-memory collections keep their BM25 sidecar under ./data
+    monkeypatch.chdir(tmp_path)
+    return lambda: IngestionPipeline("docs", "fake", qdrant_path=":memory:", chunk_size=0,
+                                     manifest_path=tmp_path / "docs.manifest.json")
+
+def write(path, text, mtime=None):
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+def test_unchanged_size_and_mtime_skip_hashing(tmp_path, monkeypatch):
+    source = write(tmp_path / "a.pdf", "one\ntwo")
+    manifest = Manifest(tmp_path / "manifest.json")
+    manifest.files[source] = Manifest.describe(source, [])
+    monkeypatch.setattr(manifest_module, "file_fingerprint", lambda path: pytest.fail("file was hashed"))
+    assert manifest.is_unchanged(source)
+
+def test_touched_file_with_same_content_is_unchanged(tmp_path):
+    source = write(tmp_path / "a.pdf", "one\ntwo", mtime=1000)
+    manifest = Manifest(tmp_path / "manifest.json")
+    manifest.files[source] = Manifest.describe(source, [])
+    os.utime(source, (2000, 2000))
+    assert manifest.is_unchanged(source)
+    assert manifest.files[source]["mtime"] == 2000
+
+@pytest.mark.parametrize("content", ["one\nTWO", "one\ntwo\nthree"])
+def test_changed_file_is_not_unchanged(tmp_path, content):
+    source = write(tmp_path / "a.pdf", "one\ntwo", mtime=1000)
+    manifest = Manifest(tmp_path / "manifest.json")
+    manifest.files[source] = Manifest.describe(source, [])
+    write(tmp_path / "a.pdf", content, mtime=2000)
+    assert not manifest.is_unchanged(source)
+    assert not manifest.is_unchanged(str(tmp_path / "new.pdf"))
+
+def test_manifest_round_trip_and_clear(tmp_path):
+    source = write(tmp_path / "a.pdf", "one")
+    manifest = Manifest(tmp_path / "manifest.json")
+    manifest.embedding_model = "fake"
+    manifest.files[source] = Manifest.describe(source, [("hash", "id-1")])
+    manifest.save()
+
+    loaded = Manifest(tmp_path / "manifest.json")
+    assert loaded.embedding_model == "fake"
+    assert loaded.point_ids(source) == ["id-1"]
+    assert loaded.updated_at is not None
+
+    loaded.clear()
+    assert not (tmp_path / "manifest.json").exists()
+    assert Manifest(tmp_path / "manifest.json").files == {}
+
+def test_plan_only_embeds_changed_chunks(make_pipeline, tmp_path):
+    ingestion = make_pipeline()
+    source = write(tmp_path / "a.pdf", "x")
+    pages = [Document(page_content=text) for text in ("intro", "body", "body")]
+    record, new_docs, new_ids, stale = ingestion.plan(source, pages)
+    # Repeated chunks get distinct ids
+    assert len(set(new_ids)) == 3 and stale == []
+    ingestion.manifest.files[source] = record
+
+    record, new_docs, new_ids, stale = ingestion.plan(source, [Document(page_content=text) for text in ("intro", "new body")])
+    assert [doc.page_content for doc in new_docs] == ["new body"]
+    assert len(stale) == 2
+    assert [point for _, point in record["chunks"]][0] == ingestion.manifest.point_ids(source)[0]
+
+def test_incremental_runs(make_pipeline, tmp_path):
+    folder = tmp_path / "pdfs"
+    folder.mkdir()
+    write(folder / "a.pdf", "a1\na2")
+    write(folder / "b.pdf", "b1")
+    write(folder / "c.pdf", "c1\nc2")
+
+    stats = make_pipeline().run(str(folder))
+    assert (stats["files"], stats["chunks_written"], stats["vectors"]) == (3, 5, 5)
+
+    ingestion = make_pipeline()
+    stats = ingestion.run(str(folder))
+    assert (stats["files"], stats["unchanged"], stats["chunks_written"]) == (0, 3, 0)
+
+    write(folder / "a.pdf", "a1\na2 changed")
+    (folder / "b.pdf").unlink()
+    write(folder / "d.pdf", "d1")
+    stats = ingestion.run(str(folder))
+    assert stats["files"] == 2 and stats["removed"] == 1 and stats["unchanged"] == 1
+    # a2 and b1 are replaced by "a2 changed" and d1; a1 keeps its vector
+    assert stats["chunks_written"] == 2 and stats["chunks_deleted"] == 2
+    assert stats["vectors"] == 5
+    assert sorted(Manifest(tmp_path / "docs.manifest.json").files) == ["a.pdf", "c.pdf", "d.pdf"]
+
+def test_runs_through_another_folder_spelling_stay_incremental(make_pipeline, tmp_path):
+    # make_pipeline runs from tmp_path, so "pdfs" and "./sub/../pdfs" are relative to it
+    (tmp_path / "pdfs" / "sub").mkdir(parents=True)
+    write(tmp_path / "pdfs" / "a.pdf", "a1\na2")
+    write(tmp_path / "pdfs" / "sub" / "b.pdf", "b1")
+    assert make_pipeline().run("pdfs")["chunks_written"] == 3
+
+    for folder in [str(tmp_path / "pdfs"), "./pdfs/sub/../"]:
+        stats = make_pipeline().run(folder)
+        assert (stats["unchanged"], stats["removed"], stats["chunks_written"], stats["chunks_deleted"]) == (2, 0, 0, 0)
+    assert sorted(Manifest(tmp_path / "docs.manifest.json").files) == ["a.pdf", "sub/b.pdf"]
+
+def test_manifests_keyed_by_path_are_adopted(make_pipeline, tmp_path):
+    (tmp_path / "pdfs").mkdir()
+    source = write(tmp_path / "pdfs" / "a.pdf", "a1")
+    assert make_pipeline().run("pdfs")["chunks_written"] == 1
+    manifest = Manifest(tmp_path / "docs.manifest.json")
+    manifest.files[source] = manifest.files.pop("a.pdf")
+    manifest.save()
+
+    stats = make_pipeline().run("pdfs")
+    assert (stats["unchanged"], stats["removed"], stats["vectors"]) == (1, 0, 1)
+
+if __name__ == "__main__":
+    pytest.main()
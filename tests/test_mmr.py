@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from core.retriever.mmr import maximal_marginal_relevance
+
+def test_mmr_relevance_only_matches_similarity_ranking():
+    query = np.array([1.0, 0.0])
+    candidates = np.array([[0.5, 0.5], [1.0, 0.1], [0.0, 1.0], [0.9, 0.0]])
+    assert maximal_marginal_relevance(query, candidates, k=3, lambda_mult=1.0) == [3, 1, 0]
+
+def test_mmr_skips_near_duplicates():
+    query = np.array([1.0, 0.0])
+    candidates = np.array([[1.0, 0.0], [0.99, 0.01], [0.7, 0.7]])
+    # The near-duplicate of the best hit loses to the more diverse candidate
+    assert maximal_marginal_relevance(query, candidates, k=2, lambda_mult=0.3) == [0, 2]
+
+@pytest.mark.parametrize("k,expected", [(0, 0), (2, 2), (10, 3)])
+def test_mmr_returns_at_most_k_distinct_indices(k, expected):
+    rng = np.random.default_rng(0)
+    selected = maximal_marginal_relevance(rng.normal(size=8), rng.normal(size=(3, 8)), k=k)
+    assert len(selected) == expected
+    assert len(set(selected)) == expected
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,62 @@
+import threading
+import time
+import pytest
+from core.generator.model_manager import ModelManager, ModelNotAllowedError
+
+class FakeModel:
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def memory_footprint(self):
+        return self.size
+
+def make_manager(**kwargs):
+    loads = []
+    def loader(name):
+        loads.append(name)
+        time.sleep(0.05)
+        return FakeModel(name, 100)
+    return ModelManager(["a", "b", "c"], loader=loader, **kwargs), loads
+
+def test_rejects_models_outside_allowlist():
+    manager, loads = make_manager()
+    with pytest.raises(ModelNotAllowedError):
+        manager.get("unknown")
+    assert loads == []
+
+def test_concurrent_first_requests_load_once():
+    manager, loads = make_manager()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get("a"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["a"]
+    assert all(model is results[0] for model in results)
+
+def test_evicts_least_recently_used_idle_model():
+    evicted = []
+    manager, loads = make_manager(max_models=2)
+    manager.on_evict(evicted.append)
+    manager.get("a")
+    manager.get("b")
+    manager.get("a")
+    manager.get("c")
+    assert evicted == ["b"]
+    assert {m["model_name"]: m["state"] for m in manager.stats()["models"]} == {"a": "loaded", "b": "unloaded", "c": "loaded"}
+
+def test_memory_budget_skips_leased_models():
+    manager, loads = make_manager(max_models=3, memory_budget_bytes=150)
+    with manager.lease("a"):
+        manager.get("b")
+        states = {m["model_name"]: m["state"] for m in manager.stats()["models"]}
+        assert states["a"] == "loaded" and states["b"] == "loaded"
+    manager.get("c")
+    states = {m["model_name"]: m["state"] for m in manager.stats()["models"]}
+    assert states["c"] == "loaded"
+    assert [states["a"], states["b"]].count("loaded") == 0
+
+if __name__ == "__main__":
+    pytest.main()
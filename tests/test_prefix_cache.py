@@ -0,0 +1,73 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from core.generator.language_model import LanguageModel
+from core.generator.prompt import PROMPT_PREFIX, format_prompt
+
+def save_tiny_gpt2(path):
+    """Saves a randomly initialized two-layer GPT-2 with a small byte-level BPE tokenizer."""
+    from tokenizers import Tokenizer, models, pre_tokenizers, decoders, trainers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    bpe = Tokenizer(models.BPE())
+    bpe.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    bpe.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(vocab_size=400, special_tokens=["<|endoftext|>"],
+                                  initial_alphabet=pre_tokenizers.ByteLevel.alphabet())
+    bpe.train_from_iterator([PROMPT_PREFIX, format_prompt("The survey lasts ten years.", "How long?")], trainer)
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=bpe, eos_token="<|endoftext|>", bos_token="<|endoftext|>",
+                                        model_input_names=["input_ids", "attention_mask"])
+    tokenizer.save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=len(tokenizer), n_positions=1024, n_embd=32, n_layer=2, n_head=2,
+                        bos_token_id=tokenizer.eos_token_id, eos_token_id=tokenizer.eos_token_id)
+    GPT2LMHeadModel(config).save_pretrained(path)
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    path = tmp_path_factory.mktemp("tiny-gpt2")
+    save_tiny_gpt2(path)
+    model = LanguageModel(str(path), generation_config={"prompt_prefixes": [PROMPT_PREFIX], "max_new_tokens": 8})
+    model.load_language_model(quantization=None)
+    return model
+
+def plain_generate(model, prompt):
+    """Greedy completion of the whole prompt, without the prefix cache."""
+    inputs = model.tokenizer(prompt, return_tensors="pt").to(model.llm.device)
+    with torch.no_grad():
+        output = model.llm.generate(**inputs, pad_token_id=model.tokenizer.pad_token_id, **model.decoding_kwargs("greedy"))
+    return model.tokenizer.decode(output[0, inputs["input_ids"].shape[1]:], skip_special_tokens=True)
+
+def test_rag_prompts_share_the_cached_prefix():
+    model = LanguageModel("model", generation_config={"prompt_prefixes": [PROMPT_PREFIX]})
+    prompts = [format_prompt("context one", "question?"), format_prompt("other\n\ncontext", "why?")]
+    assert model._match_prefix(prompts) == PROMPT_PREFIX
+    assert model._match_prefix(prompts + ["What is the capital of France?"]) is None
+    assert model._match_prefix([PROMPT_PREFIX]) is None
+
+def test_prefixed_generation_matches_plain_generation(tiny_model):
+    prompt = format_prompt("The Rubin Observatory is in Chile.", "Where is the Rubin Observatory?")
+    expected = plain_generate(tiny_model, prompt)
+    hits = tiny_model.prefix_cache_stats()["hits"]
+
+    assert tiny_model._generate([prompt], PROMPT_PREFIX, decoding="greedy") == [expected]
+    # The shared cache is copied, so a second generation starts from the same state
+    assert tiny_model._generate([prompt], PROMPT_PREFIX, decoding="greedy") == [expected]
+    assert tiny_model.prefix_cache_stats()["hits"] == hits + 2
+
+def test_padded_prefixed_batch_matches_plain_generation(tiny_model):
+    prompts = [
+        format_prompt("LSST is a survey.", "What is LSST?"),
+        format_prompt("The camera has 3.2 gigapixels and the survey lasts ten years.", "How large is the camera?"),
+    ]
+    inputs = tiny_model._prefixed_inputs(prompts, PROMPT_PREFIX)
+    # The shorter prompt is padded between the prefix and its own tokens
+    assert inputs["attention_mask"][0].tolist() != inputs["attention_mask"][1].tolist()
+
+    assert tiny_model._generate(prompts, PROMPT_PREFIX, decoding="greedy") == [plain_generate(tiny_model, p) for p in prompts]
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,53 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+sample_documents = [
+    {
+        "page_content": "The Rubin Observatory is located on Cerro Pachón in Chile.",
+        "metadata": {"source": "doc1"}
+    },
+    {
+        "page_content": "Vector databases are optimized for similarity search using embeddings.",
+        "metadata": {"source": "doc2"}
+    }
+]
+
+payload = {
+    "documents": sample_documents,
+    "query": "Where is the Rubin Observatory?",
+    "embedding_model": "sentence-transformers/all-MiniLM-L12-v2",
+    "generation_model": "allenai/OLMo-2-1124-7B-Instruct",
+    "k": 1,
+    "decoding": "greedy"
+}
+
+def test_rag_endpoint():
+    """
+    Test that one request retrieves context and generates an answer.
+    """
+    response = client.post("/api/rag/", json=payload)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["answer"]) > 0
+    assert body["docs"][0]["metadata"]["source"] == "doc1"
+
+def test_rag_stream_sends_chunks_before_tokens():
+    """
+    Test that the stream starts with the retrieved chunks, then tokens, then an end event.
+    """
+    with client.stream("POST", "/api/rag/stream", json={**payload, "query": "Which site hosts Rubin?"}) as response:
+        assert response.status_code == 200
+        lines = [line for line in response.iter_lines() if line]
+
+    assert lines[0] == "event: chunks"
+    assert json.loads(lines[1][len("data:"):])["docs"][0]["metadata"]["source"] == "doc1"
+    assert lines[-2] == "event: end"
+    assert any(line.startswith("data:") and "token" in line for line in lines[2:-2])
+
+if __name__ == "__main__":
+    pytest.main()
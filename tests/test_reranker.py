@@ -0,0 +1,127 @@
+import sys
+import threading
+import time
+import types
+import pytest
+from langchain_core.documents import Document
+from core.retriever import retriever
+from core.retriever.reranker import CrossEncoderReranker, RerankerRegistry, RerankModelNotAllowedError
+
+def make_registry(**kwargs):
+    loads = []
+    def loader(name):
+        loads.append(name)
+        time.sleep(0.05)
+        return object()
+    return RerankerRegistry(["a", "b", "c"], loader=loader, **kwargs), loads
+
+def test_rejects_models_outside_allowlist():
+    registry, loads = make_registry()
+    with pytest.raises(RerankModelNotAllowedError):
+        registry.get("unknown")
+    assert loads == []
+
+def test_concurrent_first_requests_load_once():
+    registry, loads = make_registry()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("a"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["a"]
+    assert all(reranker is results[0] for reranker in results)
+
+def test_different_models_load_concurrently():
+    # Each load waits for the other one to start, so loads under one lock would time out
+    barrier = threading.Barrier(2, timeout=2)
+    def loader(name):
+        barrier.wait()
+        return object()
+    registry = RerankerRegistry(["a", "b"], loader=loader)
+    errors = []
+    def get(name):
+        try:
+            registry.get(name)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=get, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert set(registry._models) == {"a", "b"}
+
+def test_evicts_least_recently_used_model():
+    registry, loads = make_registry(max_models=2)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")
+    assert list(registry._models) == ["a", "c"]
+    registry.get("b")
+    assert loads == ["a", "b", "c", "b"]
+
+def test_failed_load_can_be_retried():
+    attempts = []
+    def loader(name):
+        attempts.append(name)
+        if len(attempts) == 1:
+            raise OSError("download failed")
+        return object()
+    registry = RerankerRegistry(["a"], loader=loader)
+    with pytest.raises(OSError):
+        registry.get("a")
+    assert registry.get("a") is registry.get("a")
+    assert attempts == ["a", "a"]
+
+class FakeCrossEncoder:
+    """Takes 2ms per pair and scores longer texts higher."""
+    def __init__(self, model_name, device=None, max_length=512):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(len(pairs))
+        time.sleep(0.002 * len(pairs))
+        return [len(text) for _, text in pairs]
+
+@pytest.fixture
+def fake_cross_encoder(monkeypatch):
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(CrossEncoder=FakeCrossEncoder))
+
+def candidates(n):
+    return [(Document(page_content="x" * (i + 1)), 1.0) for i in range(n)]
+
+def test_budget_applies_from_the_first_request(fake_cross_encoder):
+    reranker = CrossEncoderReranker("m")
+    assert reranker.estimate_ms(10) >= 20
+    reranker.model.calls.clear()
+
+    results, info = reranker.rerank("q", candidates(20), k=2, budget_ms=20)
+    assert info["reranked"] and 2 <= info["candidates"] < 20
+    assert reranker.model.calls == [info["candidates"]]
+
+    _, info = reranker.rerank("q", candidates(20), k=5, budget_ms=1)
+    assert info["skipped_reason"] == "latency budget"
+
+def test_given_cost_estimate_skips_calibration(fake_cross_encoder):
+    reranker = CrossEncoderReranker("m", seconds_per_pair=0.01)
+    assert reranker.model.calls == []
+    assert reranker.estimate_ms(3) == pytest.approx(30)
+
+def test_rerank_time_excludes_loading(fake_cross_encoder, monkeypatch):
+    def slow_get_reranker(model_name=None):
+        time.sleep(0.2)
+        return CrossEncoderReranker("m", seconds_per_pair=0.002)
+    monkeypatch.setattr(retriever, "get_reranker", slow_get_reranker)
+    monkeypatch.setattr(retriever.embedding_registry, "get", lambda model_name: None)
+    search = retriever.Retriever("e")
+    search.search = lambda query, k, **kwargs: candidates(k)
+
+    results, timings = search.search_reranked("q", k=2, rerank_top_n=5)
+    assert [doc.page_content for doc, _ in results] == ["xxxxx", "xxxx"]
+    assert timings["rerank_ms"] < 100
+
+if __name__ == "__main__":
+    pytest.main()
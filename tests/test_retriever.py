@@ -49,5 +49,52 @@ def test_retrieve_endpoint(query, expected_status):
         assert "page_content" in doc
         assert len(doc["page_content"]) > 0  # Check content preview is non-empty
 
+def test_retrieve_batch_endpoint():
+    """
+    Test that batch retrieval returns one result list per query, in order.
+    """
+    upload = client.post("/api/documents/", json={
+        "documents": sample_documents,
+        "embedding_model": "sentence-transformers/all-MiniLM-L12-v2"
+    })
+    queries = ["What is FastAPI?", "Explain vector databases"]
+    payload = {
+        "queries": queries,
+        "k": 1,
+        "collection_id": upload.json()["collection_id"],
+        "embedding_model": "sentence-transformers/all-MiniLM-L12-v2"
+    }
+
+    response = client.post("/api/retrieve/batch", json=payload)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["query"] for result in results] == queries
+    assert all(len(result["docs"]) == 1 for result in results)
+    assert results[0]["docs"][0]["metadata"]["source"] == "doc1"
+    assert results[1]["docs"][0]["metadata"]["source"] == "doc2"
+
+def test_retrieve_with_rerank():
+    """
+    Test that re-ranking returns k documents and reports its time separately.
+    """
+    payload = {
+        "documents": sample_documents,
+        "query": "What is FastAPI?",
+        "embedding_model": "sentence-transformers/all-MiniLM-L12-v2",
+        "k": 1,
+        "rerank": True,
+        "rerank_top_n": 2
+    }
+
+    response = client.post("/api/retrieve/", json=payload)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["docs"]) == 1
+    assert body["docs"][0]["metadata"]["source"] == "doc1"
+    assert body["timings"]["reranked"] is True
+    assert body["timings"]["rerank_ms"] > 0
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,94 @@
+import hashlib
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from core.retriever import session_store
+from core.retriever.session_store import CollectionNotFoundError, SessionCollectionManager, document_set_id
+from core.retriever.store_manager import VectorStoreManager
+
+class FakeEmbedding(Embeddings):
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        digest = hashlib.sha256(text.encode()).digest()
+        return [byte / 255 for byte in digest[:4]]
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [self.embed_query(text) for text in texts]
+
+def docs(*texts):
+    return [Document(page_content=text, metadata={"page": i}) for i, text in enumerate(texts)]
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(session_store, "store_manager", VectorStoreManager())
+    monkeypatch.setattr(session_store, "with_embedding_cache", lambda embedding, model_name: embedding)
+    return SessionCollectionManager(":memory:", ttl_seconds=60)
+
+def expire(manager, name):
+    manager._last_used[name] -= 3600
+
+def test_document_set_id_is_deterministic():
+    first = document_set_id(docs("a", "b"), "model")
+    assert first == document_set_id(list(reversed(docs("a", "b"))), "model")
+    assert first.startswith(session_store.SESSION_PREFIX)
+    assert first != document_set_id(docs("a", "b"), "other-model")
+    assert first != document_set_id(docs("a", "c"), "model")
+    assert first != document_set_id([Document(page_content="a", metadata={"page": 5}), docs("b")[0]], "model")
+
+def test_same_documents_reuse_the_collection(manager):
+    embedding = FakeEmbedding()
+    store = manager.get_or_create(docs("a", "b"), embedding, "model")
+    again = manager.get_or_create(docs("a", "b"), embedding, "model")
+    assert again.collection_name == store.collection_name
+    assert embedding.calls == 1
+    assert manager.handle.client.count(store.collection_name).count == 2
+    assert manager.get(store.collection_name, embedding).collection_name == store.collection_name
+
+def test_reuse_does_not_keep_a_build_lock(manager):
+    embedding = FakeEmbedding()
+    manager.get_or_create(docs("a", "b"), embedding, "model")
+    manager.get_or_create(docs("a", "b"), embedding, "model")
+    assert manager._creating == {}
+
+def test_idle_collections_expire(manager):
+    embedding = FakeEmbedding()
+    old = manager.get_or_create(docs("old"), embedding, "model").collection_name
+    fresh = manager.get_or_create(docs("fresh"), embedding, "model").collection_name
+    expire(manager, old)
+
+    assert manager.collect_garbage() == [old]
+    assert not manager.handle.client.collection_exists(old)
+    assert manager.handle.client.collection_exists(fresh)
+    with pytest.raises(CollectionNotFoundError):
+        manager.get(old, embedding)
+    with pytest.raises(CollectionNotFoundError):
+        with manager.using(old):
+            pass
+
+def test_collections_in_use_are_not_collected(manager):
+    embedding = FakeEmbedding()
+    name = manager.get_or_create(docs("a"), embedding, "model").collection_name
+    with manager.using(name):
+        expire(manager, name)
+        assert manager.collect_garbage() == []
+        assert manager.handle.client.collection_exists(name)
+    # Finishing the search counts as a use
+    assert manager.collect_garbage() == []
+    expire(manager, name)
+    assert manager.collect_garbage() == [name]
+
+def test_expired_collection_is_rebuilt_on_upload(manager):
+    embedding = FakeEmbedding()
+    name = manager.get_or_create(docs("a"), embedding, "model").collection_name
+    expire(manager, name)
+    manager.collect_garbage()
+
+    assert manager.get_or_create(docs("a"), embedding, "model").collection_name == name
+    assert embedding.calls == 2
+    assert manager.handle.client.count(name).count == 1
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,101 @@
+import threading
+import pytest
+from core.retriever import store_manager as store_manager_module
+from core.retriever.store_manager import QdrantLocationNotAllowedError, StoreHandle, VectorStoreManager
+
+class FakeClient:
+    def __init__(self, location):
+        self.location = location
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def collection_exists(self, collection_name):
+        return True
+
+def make_manager(**kwargs):
+    opened = []
+    manager = VectorStoreManager(**kwargs)
+    def open_location(kind, location):
+        opened.append(location)
+        return StoreHandle(FakeClient(location), location, local=kind != "url")
+    manager._open = open_location
+    return manager, opened
+
+def test_only_allowed_urls_are_accepted():
+    manager = VectorStoreManager(url="http://qdrant:6333")
+    manager.check_location()
+    manager.check_location(url="http://qdrant:6333/")
+    with pytest.raises(QdrantLocationNotAllowedError):
+        manager.check_location(url="http://169.254.169.254")
+
+    manager = VectorStoreManager(allowed_urls=["http://a:6333", "http://b:6333"])
+    manager.check_location(url="http://b:6333")
+    with pytest.raises(QdrantLocationNotAllowedError):
+        manager.check_location(url="http://c:6333")
+
+def test_only_existing_storages_in_allowed_directories_are_accepted(tmp_path):
+    storage = tmp_path / "stores" / "docs"
+    storage.mkdir(parents=True)
+    (storage / "meta.json").write_text("{}")
+    manager = VectorStoreManager(allowed_paths=[tmp_path / "stores"])
+    manager.check_location(str(storage))
+    manager.check_location(str(tmp_path / "stores" / ".." / "stores" / "docs"))
+    for path in [tmp_path / "stores" / "new", tmp_path / "stores" / ".." / "elsewhere", "/etc"]:
+        with pytest.raises(QdrantLocationNotAllowedError):
+            manager.check_location(str(path))
+    assert not (tmp_path / "stores" / "new").exists()
+    # Paths are not used with a server, so they are not checked
+    VectorStoreManager(url="http://qdrant:6333").check_location("/etc")
+
+def test_evicts_and_closes_least_recently_used_location(tmp_path):
+    manager, opened = make_manager(max_handles=3)
+    memory = manager.get_handle(":memory:")
+    first = manager.get_handle(str(tmp_path / "a"))
+    second = manager.get_handle(str(tmp_path / "b"))
+    manager.get_handle(str(tmp_path / "a"))
+    manager.get_handle(str(tmp_path / "c"))
+
+    # In-memory storage is kept, since closing it would lose its data
+    assert manager.get_handle(":memory:") is memory
+    assert second.client.closed and not first.client.closed
+    assert len(opened) == 4
+
+def test_locations_in_use_are_closed_once_idle(tmp_path):
+    manager, _ = make_manager(max_handles=1)
+    with manager.using(str(tmp_path / "a")) as first:
+        second = manager.get_handle(str(tmp_path / "b"))
+        assert not first.client.closed
+    assert first.client.closed and not second.client.closed
+
+def test_pinned_locations_stay_open(tmp_path):
+    manager, _ = make_manager(max_handles=1, pinned_paths=[str(tmp_path / "sessions")])
+    sessions = manager.get_handle(str(tmp_path / "sessions"))
+    other = manager.get_handle(str(tmp_path / "a"))
+    manager.get_handle(str(tmp_path / "b"))
+    assert not sessions.client.closed and other.client.closed
+
+def test_concurrent_first_requests_open_once(tmp_path):
+    manager, opened = make_manager()
+    handles = []
+    threads = [threading.Thread(target=lambda: handles.append(manager.get_handle(str(tmp_path)))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(opened) == 1
+    assert all(handle is handles[0] for handle in handles)
+
+def test_retrieval_rejects_urls_outside_allowlist(monkeypatch):
+    from app.services.retrieval_service import open_vector_store
+    monkeypatch.setattr(store_manager_module.store_manager, "allowed_urls", [])
+    with pytest.raises(QdrantLocationNotAllowedError):
+        with open_vector_store(None, [], "docs", None, "http://internal:8080"):
+            pass
+    with pytest.raises(QdrantLocationNotAllowedError):
+        with open_vector_store(None, [], "docs", "/tmp/anywhere"):
+            pass
+
+if __name__ == "__main__":
+    pytest.main()
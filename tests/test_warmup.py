@@ -0,0 +1,52 @@
+import threading
+from app.services.warmup import Warmup
+
+def test_reports_per_model_state_until_ready():
+    release = threading.Event()
+    def slow_loader(name):
+        release.wait(5)
+    def failing_loader(name):
+        raise RuntimeError("no such model")
+
+    warmup = Warmup()
+    warmup.start({"embedding": (lambda name: None, ["e"]), "generation": (slow_loader, ["g"])})
+    assert not warmup.is_ready()
+    assert warmup.status()["ready_seconds"] is None
+
+    release.set()
+    warmup.wait(5)
+    status = warmup.status()
+    assert status["ready"] and status["ready_seconds"] >= status["serving_seconds"]
+    assert {m["model_name"]: m["state"] for m in status["models"]} == {"e": "loaded", "g": "loaded"}
+
+    failed = Warmup()
+    failed.start({"generation": (failing_loader, ["g"])})
+    failed.wait(5)
+    status = failed.status()
+    # Once warm-up gives up, the API is ready and lists the model that failed
+    assert status["ready"] and status["failed"] == ["g"]
+    assert status["models"][0]["error"] == "no such model"
+
+def test_retries_failed_loads():
+    attempts = []
+    def flaky_loader(name):
+        attempts.append(name)
+        if len(attempts) < 3:
+            raise RuntimeError("connection reset")
+    def broken_loader(name):
+        raise RuntimeError("no such model")
+
+    warmup = Warmup(max_attempts=3, retry_seconds=0.01)
+    warmup.start({"embedding": (flaky_loader, ["e"]), "generation": (broken_loader, ["g"])})
+    warmup.wait(5)
+    status = warmup.status()
+    models = {m["model_name"]: m for m in status["models"]}
+    assert attempts == ["e", "e", "e"]
+    assert models["e"]["state"] == "loaded" and models["e"]["error"] is None
+    assert models["g"]["state"] == "failed" and models["g"]["attempts"] == 3
+    assert status["ready"] and status["failed"] == ["g"]
+
+def test_ready_without_models():
+    warmup = Warmup()
+    warmup.start({"embedding": (lambda name: None, [])})
+    assert warmup.status()["ready"]